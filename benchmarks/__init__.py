@@ -0,0 +1 @@
+"""Performance benchmarks for the Perplexica MCP server."""
@@ -0,0 +1,91 @@
+"""Benchmark decoding of large Perplexica search responses.
+
+Compares the original decode path (``response.json()`` and keyword
+arguments to ``SearchResponse``) with a single ``model_validate`` call, using
+the standard library parser and, when installed, orjson, on payloads with many
+long sources::
+
+    python -m benchmarks.bench_decode --sources 50 --source-length 20000
+"""
+
+import argparse
+import json
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+from perplexica_mcp.decoding import orjson
+from perplexica_mcp.server import SearchResponse
+
+from .stub import StubConfig, build_payload
+
+
+@dataclass
+class DecodeResult:
+    """Timing of one decode strategy."""
+
+    name: str
+    iterations: int
+    mean_ms: float
+    speedup: float
+
+
+def strategies() -> Dict[str, Callable[[bytes], SearchResponse]]:
+    """Decode strategies by name, from the original path to the current one."""
+    available: Dict[str, Callable[[bytes], SearchResponse]] = {
+        "json+kwargs": lambda body: SearchResponse(**json.loads(body)),
+        "json+validate": lambda body: SearchResponse.model_validate(json.loads(body)),
+    }
+    if orjson is not None:
+        available["orjson+validate"] = lambda body: SearchResponse.model_validate(orjson.loads(body))
+    return available
+
+
+def time_decode(decode: Callable[[bytes], Any], body: bytes, iterations: int) -> float:
+    """Return the mean seconds per decode of ``body``."""
+    decode(body)
+    start = time.perf_counter()
+    for _ in range(iterations):
+        decode(body)
+    return (time.perf_counter() - start) / iterations
+
+
+def run_decode_benchmarks(config: StubConfig, iterations: int = 200) -> List[DecodeResult]:
+    """Time every strategy on one payload built from ``config``."""
+    body = json.dumps(build_payload(config, "benchmark query")).encode("utf-8")
+    timings = {name: time_decode(decode, body, iterations) for name, decode in strategies().items()}
+    baseline = timings["json+kwargs"]
+    return [
+        DecodeResult(name=name, iterations=iterations, mean_ms=seconds * 1000, speedup=baseline / seconds)
+        for name, seconds in timings.items()
+    ]
+
+
+def format_results(results: Sequence[DecodeResult], payload_bytes: int) -> str:
+    """Format results as a plain-text table."""
+    header = f"{'strategy':<20}{'iterations':>12}{'mean ms':>12}{'speedup':>10}"
+    lines = [f"payload: {payload_bytes / 2**20:.2f} MiB", header, "-" * len(header)]
+    for r in results:
+        lines.append(f"{r.name:<20}{r.iterations:>12}{r.mean_ms:>12.3f}{r.speedup:>9.2f}x")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=200, help="decodes per strategy")
+    parser.add_argument("--sources", type=int, default=50, help="sources per search response")
+    parser.add_argument("--source-length", type=int, default=20000, help="characters of pageContent per source")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    config = StubConfig(sources=args.sources, source_length=args.source_length)
+    results = run_decode_benchmarks(config, args.iterations)
+    if args.json:
+        print(json.dumps([asdict(r) for r in results], indent=2))
+    else:
+        payload_bytes = len(json.dumps(build_payload(config, "benchmark query")))
+        print(format_results(results, payload_bytes))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+"""Benchmark the MCP request path against a local stub Perplexica.
+
+Runs ``PerplexicaServer.call_tool`` for searches, streamed searches, model
+listing and concurrent searches, and reports throughput, latency percentiles
+and peak traced memory for each scenario::
+
+    python -m benchmarks.bench_server --requests 200 --concurrency 16 --latency 0.05 --sources 20
+
+With ``--cassette`` the stub is replaced by responses recorded from a real
+Perplexica with ``PERPLEXICA_CASSETTE_MODE=record``, replayed with their
+recorded timing sped up by ``--cassette-speed``.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import time
+import tracemalloc
+from contextlib import asynccontextmanager, contextmanager
+from dataclasses import asdict, dataclass
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterator, List, Optional, Sequence
+
+from mcp.types import CallToolRequest, CallToolRequestParams, CallToolResult
+
+from perplexica_mcp.server import PerplexicaServer
+
+from .stub import StubConfig, run_stub
+
+
+@dataclass
+class BenchResult:
+    """Measurements for one benchmark scenario."""
+
+    name: str
+    requests: int
+    concurrency: int
+    errors: int
+    seconds: float
+    throughput: float
+    p50: float
+    p95: float
+    p99: float
+    peak_memory_bytes: Optional[int]
+
+
+def percentile(sorted_values: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile of already sorted values."""
+    if not sorted_values:
+        return 0.0
+    index = min(max(math.ceil(q * len(sorted_values)) - 1, 0), len(sorted_values) - 1)
+    return sorted_values[index]
+
+
+@contextmanager
+def environment(**values: str) -> Iterator[None]:
+    """Temporarily set environment variables."""
+    previous = {key: os.environ.get(key) for key in values}
+    os.environ.update(values)
+    try:
+        yield
+    finally:
+        for key, value in previous.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+
+
+def tool_request(name: str, arguments: Optional[Dict[str, Any]] = None) -> CallToolRequest:
+    return CallToolRequest(method="tools/call", params=CallToolRequestParams(name=name, arguments=arguments))
+
+
+async def measure(
+    name: str,
+    requests: int,
+    concurrency: int,
+    make_call: Callable[[int], Awaitable[CallToolResult]],
+    trace_memory: bool = True,
+) -> BenchResult:
+    """Run ``requests`` calls with at most ``concurrency`` in flight and measure them."""
+    latencies: List[float] = []
+    errors = 0
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(i: int) -> None:
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            result = await make_call(i)
+            latencies.append(time.perf_counter() - start)
+            if result.isError:
+                errors += 1
+
+    if trace_memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - start
+    peak: Optional[int] = None
+    if trace_memory:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    latencies.sort()
+    return BenchResult(
+        name=name,
+        requests=requests,
+        concurrency=concurrency,
+        errors=errors,
+        seconds=elapsed,
+        throughput=requests / elapsed if elapsed else 0.0,
+        p50=percentile(latencies, 0.50),
+        p95=percentile(latencies, 0.95),
+        p99=percentile(latencies, 0.99),
+        peak_memory_bytes=peak,
+    )
+
+
+@asynccontextmanager
+async def backend_environment(
+    config: StubConfig, cassette: Optional[str] = None, cassette_speed: Optional[float] = None
+) -> AsyncIterator[None]:
+    """Point new servers at the stub, or at a replayed cassette when one is given."""
+    if cassette is None:
+        async with run_stub(config) as base_url:
+            with environment(PERPLEXICA_BASE_URL=base_url, PERPLEXICA_BASE_URLS=""):
+                yield
+        return
+
+    # Benchmark queries differ from the recorded ones, so replay by search options.
+    with environment(
+        PERPLEXICA_BASE_URLS="",
+        PERPLEXICA_CASSETTE_MODE="replay",
+        PERPLEXICA_CASSETTE_PATH=cassette,
+        PERPLEXICA_CASSETTE_MATCH="options",
+        PERPLEXICA_CASSETTE_TIMING="true" if cassette_speed else "false",
+        PERPLEXICA_CASSETTE_SPEED=str(cassette_speed or 1.0),
+    ):
+        yield
+
+
+async def run_benchmarks(
+    config: StubConfig,
+    requests: int = 100,
+    concurrency: int = 16,
+    trace_memory: bool = True,
+    scenarios: Optional[Sequence[str]] = None,
+    cassette: Optional[str] = None,
+    cassette_speed: Optional[float] = None,
+) -> List[BenchResult]:
+    """Start the stub, run each scenario against a fresh server and return the results.
+
+    Every search uses a distinct query so the response cache and request
+    coalescing do not hide the cost of the request path.
+    """
+    results: List[BenchResult] = []
+    async with backend_environment(config, cassette, cassette_speed):
+        server = PerplexicaServer()
+        try:
+
+            def search(prefix: str, stream: bool = False) -> Callable[[int], Awaitable[CallToolResult]]:
+                def call(i: int) -> Awaitable[CallToolResult]:
+                    arguments = {"query": f"{prefix} benchmark query {i}", "stream": stream}
+                    return server.call_tool(tool_request("perplexica_search", arguments))
+
+                return call
+
+            def get_models(i: int) -> Awaitable[CallToolResult]:
+                return server.call_tool(tool_request("perplexica_get_models"))
+
+            available = {
+                "search": (1, search("sequential")),
+                "search_stream": (1, search("streamed", stream=True)),
+                "get_models": (1, get_models),
+                "search_concurrent": (concurrency, search("concurrent")),
+            }
+            for name in scenarios or available:
+                scenario_concurrency, make_call = available[name]
+                results.append(await measure(name, requests, scenario_concurrency, make_call, trace_memory))
+        finally:
+            await server.cleanup()
+    return results
+
+
+def format_results(results: Sequence[BenchResult]) -> str:
+    """Format results as a plain-text table."""
+    header = f"{'scenario':<20}{'reqs':>7}{'conc':>6}{'errors':>8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}"
+    header += f"{'p99 ms':>10}{'peak MiB':>10}"
+    lines = [header, "-" * len(header)]
+    for r in results:
+        peak = f"{r.peak_memory_bytes / 2**20:.2f}" if r.peak_memory_bytes is not None else "-"
+        lines.append(
+            f"{r.name:<20}{r.requests:>7}{r.concurrency:>6}{r.errors:>8}{r.throughput:>10.1f}"
+            f"{r.p50 * 1000:>10.2f}{r.p95 * 1000:>10.2f}{r.p99 * 1000:>10.2f}{peak:>10}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=100, help="calls per scenario")
+    parser.add_argument("--concurrency", type=int, default=16, help="in-flight calls for concurrent scenarios")
+    parser.add_argument("--latency", type=float, default=0.0, help="stub search latency in seconds")
+    parser.add_argument("--models-latency", type=float, default=0.0, help="stub /api/models latency in seconds")
+    parser.add_argument("--sources", type=int, default=5, help="sources per search response")
+    parser.add_argument("--source-length", type=int, default=2000, help="characters of pageContent per source")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of searches failing with HTTP 500")
+    parser.add_argument("--scenario", action="append", help="run only this scenario (repeatable)")
+    parser.add_argument("--no-memory", action="store_true", help="skip tracemalloc peak memory tracking")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    parser.add_argument("--cassette", help="replay this recorded cassette instead of starting the stub")
+    parser.add_argument(
+        "--cassette-speed",
+        type=float,
+        help="replay with the recorded timing sped up by this factor (default: no delays)",
+    )
+    args = parser.parse_args(argv)
+
+    config = StubConfig(
+        latency=args.latency,
+        models_latency=args.models_latency,
+        sources=args.sources,
+        source_length=args.source_length,
+        error_rate=args.error_rate,
+    )
+    results = asyncio.run(
+        run_benchmarks(
+            config,
+            args.requests,
+            args.concurrency,
+            not args.no_memory,
+            args.scenario,
+            cassette=args.cassette,
+            cassette_speed=args.cassette_speed,
+        )
+    )
+    if args.json:
+        print(json.dumps([asdict(r) for r in results], indent=2))
+    else:
+        print(format_results(results))
+
+
+if __name__ == "__main__":
+    main()
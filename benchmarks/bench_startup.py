@@ -0,0 +1,182 @@
+"""Benchmark cold start of the stdio server.
+
+Each run starts a fresh interpreter and reports the mean, fastest and slowest
+of ``--runs`` runs for:
+
+- ``import mcp``: importing the MCP SDK modules the server is built on, the
+  floor no change to this package can go below;
+- ``import server``: importing ``perplexica_mcp.server``, including the SDK;
+- ``initialize``: spawning ``python -m perplexica_mcp`` until its
+  ``initialize`` response arrives, including interpreter startup;
+- ``tools/list``: the first ``tools/list`` round trip after ``initialize``.
+
+::
+
+    python -m benchmarks.bench_startup --runs 10
+
+No Perplexica is needed: the server does not call it before the first search.
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from mcp.types import LATEST_PROTOCOL_VERSION
+
+import perplexica_mcp
+
+# An address nothing listens on, in case anything does reach for Perplexica.
+UNREACHABLE_BASE_URL = "http://127.0.0.1:9"
+
+IMPORT_SCRIPT = "import time; start = time.perf_counter(); import {module}; print(time.perf_counter() - start)"
+SDK_MODULES = "mcp.server.lowlevel, mcp.server.models, mcp.server.stdio, mcp.types"
+
+
+@dataclass
+class StartupResult:
+    """Timings of one startup phase."""
+
+    name: str
+    runs: int
+    mean_ms: float
+    min_ms: float
+    max_ms: float
+
+
+def environment() -> Dict[str, str]:
+    """Environment for child interpreters, importing this checkout of the package."""
+    env = dict(os.environ, PERPLEXICA_BASE_URL=UNREACHABLE_BASE_URL)
+    env.pop("PERPLEXICA_BASE_URLS", None)
+    src = os.path.dirname(os.path.dirname(os.path.abspath(perplexica_mcp.__file__)))
+    env["PYTHONPATH"] = os.pathsep.join(filter(None, [src, env.get("PYTHONPATH")]))
+    return env
+
+
+def time_import(module: str) -> float:
+    """Return the seconds a fresh interpreter takes to import ``module``."""
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_SCRIPT.format(module=module)],
+        check=True,
+        capture_output=True,
+        text=True,
+        env=environment(),
+    ).stdout
+    return float(output.strip())
+
+
+def _message(method: str, params: Dict[str, Any], id: Optional[int] = None) -> bytes:
+    message: Dict[str, Any] = {"jsonrpc": "2.0", "method": method, "params": params}
+    if id is not None:
+        message["id"] = id
+    return json.dumps(message).encode("utf-8") + b"\n"
+
+
+def _send(process: "subprocess.Popen[bytes]", message: bytes) -> None:
+    assert process.stdin is not None
+    process.stdin.write(message)
+    process.stdin.flush()
+
+
+def _response(process: "subprocess.Popen[bytes]", id: int) -> Dict[str, Any]:
+    assert process.stdout is not None
+    while True:
+        line = process.stdout.readline()
+        if not line:
+            raise RuntimeError(f"Server exited before answering request {id}")
+        message = json.loads(line)
+        if message.get("id") == id:
+            return message
+
+
+def time_session() -> Tuple[float, float]:
+    """Return the seconds from spawning the server to its ``initialize`` response, and of the first ``tools/list``."""
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "perplexica_mcp"],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+        env=environment(),
+    )
+    try:
+        initialize = {
+            "protocolVersion": LATEST_PROTOCOL_VERSION,
+            "capabilities": {},
+            "clientInfo": {"name": "bench_startup", "version": "0"},
+        }
+        _send(process, _message("initialize", initialize, id=1))
+        if "error" in _response(process, 1):
+            raise RuntimeError("initialize failed")
+        initialized = time.perf_counter()
+
+        _send(process, _message("notifications/initialized", {}))
+        _send(process, _message("tools/list", {}, id=2))
+        tools = _response(process, 2)
+        listed = time.perf_counter()
+        if not tools.get("result", {}).get("tools"):
+            raise RuntimeError("tools/list returned no tools")
+        return initialized - start, listed - initialized
+    finally:
+        assert process.stdin is not None
+        process.stdin.close()
+        try:
+            process.wait(timeout=10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+        assert process.stdout is not None
+        process.stdout.close()
+
+
+def summarize(name: str, seconds: Sequence[float]) -> StartupResult:
+    return StartupResult(
+        name=name,
+        runs=len(seconds),
+        mean_ms=sum(seconds) / len(seconds) * 1000,
+        min_ms=min(seconds) * 1000,
+        max_ms=max(seconds) * 1000,
+    )
+
+
+def run_startup_benchmarks(runs: int = 5) -> List[StartupResult]:
+    """Time every startup phase ``runs`` times, each in a fresh interpreter."""
+    sdk = [time_import(SDK_MODULES) for _ in range(runs)]
+    server = [time_import("perplexica_mcp.server") for _ in range(runs)]
+    sessions = [time_session() for _ in range(runs)]
+    return [
+        summarize("import mcp", sdk),
+        summarize("import server", server),
+        summarize("initialize", [initialize for initialize, _ in sessions]),
+        summarize("tools/list", [tools for _, tools in sessions]),
+    ]
+
+
+def format_results(results: Sequence[StartupResult]) -> str:
+    """Format results as a plain-text table."""
+    header = f"{'phase':<16}{'runs':>6}{'mean ms':>10}{'min ms':>10}{'max ms':>10}"
+    lines = [header, "-" * len(header)]
+    for r in results:
+        lines.append(f"{r.name:<16}{r.runs:>6}{r.mean_ms:>10.1f}{r.min_ms:>10.1f}{r.max_ms:>10.1f}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="fresh interpreters per phase")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    results = run_startup_benchmarks(args.runs)
+    if args.json:
+        print(json.dumps([asdict(r) for r in results], indent=2))
+    else:
+        print(format_results(results))
+
+
+if __name__ == "__main__":
+    main()
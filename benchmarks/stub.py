@@ -0,0 +1,143 @@
+"""Local stub of the Perplexica HTTP API for benchmarks."""
+
+import argparse
+import asyncio
+import json
+import random
+import sys
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass
+from typing import AsyncIterator, Dict, List
+
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+
+@dataclass
+class StubConfig:
+    """Behaviour of the stub backend."""
+
+    latency: float = 0.0
+    """Seconds to wait before answering a search."""
+    models_latency: float = 0.0
+    """Seconds to wait before answering ``/api/models``."""
+    sources: int = 5
+    """Number of sources returned per search."""
+    source_length: int = 2000
+    """Characters of ``pageContent`` per source."""
+    message_length: int = 1000
+    """Characters in the answer."""
+    error_rate: float = 0.0
+    """Share of searches answered with HTTP 500."""
+    stream_chunks: int = 20
+    """Number of ``response`` events a streamed answer is split into."""
+    seed: int = 0
+
+
+def build_payload(config: StubConfig, query: str) -> Dict[str, object]:
+    """Build a search response body of the configured size."""
+    sources: List[Dict[str, object]] = [
+        {
+            "pageContent": (f"Source {i} for {query}. " * (config.source_length // 20 + 1))[: config.source_length],
+            "metadata": {"title": f"Result {i}: {query}", "url": f"https://example.com/{i}?q={query}"},
+        }
+        for i in range(config.sources)
+    ]
+    return {"message": ("Answer. " * (config.message_length // 8 + 1))[: config.message_length], "sources": sources}
+
+
+def create_app(config: StubConfig) -> Starlette:
+    """Create the stub ASGI application."""
+    rng = random.Random(config.seed)
+    counters = {"search": 0, "models": 0}
+
+    async def search(request: Request) -> Response:
+        counters["search"] += 1
+        body = await request.json()
+        if config.latency:
+            await asyncio.sleep(config.latency)
+        if rng.random() < config.error_rate:
+            return JSONResponse({"message": "stub failure"}, status_code=500)
+
+        payload = build_payload(config, body.get("query", ""))
+        if not body.get("stream"):
+            return JSONResponse(payload)
+
+        async def events() -> AsyncIterator[bytes]:
+            yield (json.dumps({"type": "init", "data": "Stream connected"}) + "\n").encode()
+            yield (json.dumps({"type": "sources", "data": payload["sources"]}) + "\n").encode()
+            message = str(payload["message"])
+            step = max(len(message) // max(config.stream_chunks, 1), 1)
+            for i in range(0, len(message), step):
+                yield (json.dumps({"type": "response", "data": message[i : i + step]}) + "\n").encode()
+            yield (json.dumps({"type": "done"}) + "\n").encode()
+
+        return StreamingResponse(events(), media_type="application/json")
+
+    async def models(request: Request) -> Response:
+        counters["models"] += 1
+        if config.models_latency:
+            await asyncio.sleep(config.models_latency)
+        return JSONResponse(
+            {
+                "chatModels": {"openai": {"gpt-4o-mini": {"displayName": "GPT 4 omni mini"}}},
+                "embeddingModels": {"openai": {"text-embedding-3-large": {"displayName": "Text Embedding 3 Large"}}},
+            }
+        )
+
+    app = Starlette(routes=[Route("/api/search", search, methods=["POST"]), Route("/api/models", models)])
+    app.state.counters = counters
+    return app
+
+
+async def serve(config: StubConfig, host: str = "127.0.0.1", port: int = 0) -> None:
+    """Serve the stub, printing its base URL once it accepts connections."""
+    server = uvicorn.Server(
+        uvicorn.Config(create_app(config), host=host, port=port, log_level="warning", lifespan="off")
+    )
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        if task.done():
+            task.result()
+        await asyncio.sleep(0.01)
+    bound_port = server.servers[0].sockets[0].getsockname()[1]
+    print(f"http://{host}:{bound_port}", flush=True)
+    await task
+
+
+@asynccontextmanager
+async def run_stub(config: StubConfig) -> AsyncIterator[str]:
+    """Serve the stub on a free local port and yield its base URL.
+
+    The stub runs in a child process so that it does not compete with the
+    server under test for the event loop or the GIL.
+    """
+    process = await asyncio.create_subprocess_exec(
+        sys.executable, "-m", "benchmarks.stub", "--config", json.dumps(asdict(config)), stdout=asyncio.subprocess.PIPE
+    )
+    try:
+        assert process.stdout is not None
+        line = await process.stdout.readline()
+        if not line:
+            raise RuntimeError("Stub Perplexica server failed to start")
+        yield line.decode().strip()
+    finally:
+        if process.returncode is None:
+            process.terminate()
+        await process.wait()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Run a stub Perplexica server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--config", default="{}", help="StubConfig fields as JSON")
+    args = parser.parse_args()
+    asyncio.run(serve(StubConfig(**json.loads(args.config)), args.host, args.port))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,36 @@
 """Main entry point for the Perplexica MCP server."""
 
+import argparse
 import asyncio
+import os
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog="perplexica_mcp", description="Perplexica MCP server")
+    parser.add_argument(
+        "--transport",
+        choices=["stdio", "http"],
+        default=os.getenv("PERPLEXICA_MCP_TRANSPORT", "stdio"),
+        help="stdio for a single client, http to serve streamable HTTP (/mcp) and SSE (/sse) to many clients",
+    )
+    parser.add_argument("--host", default=os.getenv("PERPLEXICA_MCP_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PERPLEXICA_MCP_PORT", "8000")))
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=int(os.getenv("PERPLEXICA_MCP_WORKERS", "1")),
+        help="worker processes sharing the HTTP port (implies stateless streamable HTTP sessions)",
+    )
+    return parser.parse_args()
 
-from .server import main
 
 if __name__ == "__main__":
-    asyncio.run(main())
+    args = parse_args()
+    if args.transport == "http":
+        from .transport import run_http
+
+        run_http(args.host, args.port, args.workers)
+    else:
+        from .server import main
+
+        asyncio.run(main())
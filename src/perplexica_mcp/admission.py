@@ -0,0 +1,126 @@
+"""Admission control for calls to Perplexica."""
+
+import asyncio
+import heapq
+import itertools
+import os
+from typing import Any, Awaitable, Callable, Dict, List, Tuple, TypeVar
+
+from .tracing import span
+
+T = TypeVar("T")
+
+PRIORITIES = ("interactive", "batch")
+
+
+class AdmissionRejected(Exception):
+    """Raised instead of queueing a call when the wait queue is full."""
+
+
+class AdmissionController:
+    """Cap concurrent upstream searches and queue the excess by priority.
+
+    At most ``max_concurrency`` calls run at once. Further calls wait in a
+    queue ordered by priority (``interactive`` before ``batch``) and then by
+    arrival; once ``max_queue`` calls are waiting, new ones are rejected with
+    ``AdmissionRejected`` straight away rather than piling more latency onto
+    everyone. A ``max_concurrency`` of 0 disables the limit.
+
+    When ``downgrade_queue_depth`` is set, ``should_downgrade`` reports that
+    ``balanced`` searches should run in ``speed`` mode while at least that many
+    calls are queued.
+    """
+
+    def __init__(self, max_concurrency: int = 16, max_queue: int = 64, downgrade_queue_depth: int = 0) -> None:
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.downgrade_queue_depth = downgrade_queue_depth
+
+        self._waiters: List[Tuple[int, int, "asyncio.Future[None]"]] = []
+        self._sequence = itertools.count()
+        self.active = 0
+        self.queued = 0
+
+        self.admitted = 0
+        self.delayed = 0
+        self.rejected = 0
+        self.downgraded = 0
+
+    @classmethod
+    def from_env(cls) -> "AdmissionController":
+        """Create a controller configured from ``PERPLEXICA_MAX_*`` variables."""
+        return cls(
+            max_concurrency=int(os.getenv("PERPLEXICA_MAX_CONCURRENCY", "16")),
+            max_queue=int(os.getenv("PERPLEXICA_MAX_QUEUE", "64")),
+            downgrade_queue_depth=int(os.getenv("PERPLEXICA_DOWNGRADE_QUEUE_DEPTH", "0")),
+        )
+
+    async def call(self, fn: Callable[[], Awaitable[T]], priority: str = "interactive") -> T:
+        """Run ``fn`` once a slot is free."""
+        if self.max_concurrency <= 0:
+            return await fn()
+
+        await self._acquire(priority)
+        try:
+            return await fn()
+        finally:
+            self._release()
+
+    def should_downgrade(self, optimization_mode: str) -> bool:
+        """Whether a search in ``optimization_mode`` should be run in ``speed`` mode instead."""
+        if optimization_mode != "balanced" or self.downgrade_queue_depth <= 0:
+            return False
+        if self.queued < self.downgrade_queue_depth:
+            return False
+        self.downgraded += 1
+        return True
+
+    async def _acquire(self, priority: str) -> None:
+        if priority not in PRIORITIES:
+            raise ValueError(f"Unknown priority: {priority}")
+        if self.active < self.max_concurrency and not self.queued:
+            self.active += 1
+            self.admitted += 1
+            return
+        if self.queued >= self.max_queue:
+            self.rejected += 1
+            raise AdmissionRejected(
+                f"Perplexica is at capacity ({self.active} searches running, {self.queued} queued); retry later"
+            )
+
+        waiter: "asyncio.Future[None]" = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (PRIORITIES.index(priority), next(self._sequence), waiter))
+        self.queued += 1
+        self.delayed += 1
+        try:
+            with span("queue", priority=priority, position=self.queued):
+                await waiter
+        except asyncio.CancelledError:
+            if waiter.cancelled():
+                self.queued -= 1
+            else:
+                # The slot was handed over just as the caller went away; pass it on.
+                self._release()
+            raise
+        self.admitted += 1
+
+    def _release(self) -> None:
+        self.active -= 1
+        while self._waiters and self.active < self.max_concurrency:
+            _, _, waiter = heapq.heappop(self._waiters)
+            if waiter.done():
+                continue  # cancelled while queued
+            waiter.set_result(None)
+            self.queued -= 1
+            self.active += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Return current load and admission counters."""
+        return {
+            "active": self.active,
+            "queued": self.queued,
+            "admitted": self.admitted,
+            "delayed": self.delayed,
+            "rejected": self.rejected,
+            "downgraded": self.downgraded,
+        }
@@ -0,0 +1,243 @@
+"""Load balancing across several Perplexica instances."""
+
+import asyncio
+import itertools
+import os
+import time
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, List, Optional, Sequence, TypeVar
+
+import httpx
+
+from .hedging import Hedger
+from .metrics import UNCOUNTED
+
+if TYPE_CHECKING:
+    from .server import ChunkCallback, PerplexicaClient, SearchRequest, SearchResponse
+
+T = TypeVar("T")
+
+STRATEGIES = ("least_outstanding", "ewma")
+
+
+def is_backend_failure(error: BaseException) -> bool:
+    """Return whether an error says something about the backend's health.
+
+    Client errors (4xx) are caused by the request, not the node, so they do not
+    count towards ejection.
+    """
+    current: Optional[BaseException] = error
+    while current is not None:
+        if isinstance(current, httpx.HTTPStatusError):
+            return current.response.status_code >= 500
+        current = current.__cause__ or current.__context__
+    return True
+
+
+class Backend:
+    """A Perplexica instance and its routing state."""
+
+    def __init__(self, client: "PerplexicaClient") -> None:
+        self.client = client
+        self.outstanding = 0
+        self.ewma_latency: Optional[float] = None
+        self.consecutive_failures = 0
+        self.healthy = True
+        self.requests = 0
+        self.failures = 0
+        self.ejections = 0
+
+    @property
+    def base_url(self) -> str:
+        return self.client.base_url
+
+    def record_success(self, latency: float, alpha: float) -> None:
+        self.requests += 1
+        self.consecutive_failures = 0
+        if self.ewma_latency is None:
+            self.ewma_latency = latency
+        else:
+            self.ewma_latency = alpha * latency + (1 - alpha) * self.ewma_latency
+
+    def record_failure(self, eject_after: int) -> None:
+        self.requests += 1
+        self.failures += 1
+        self.consecutive_failures += 1
+        if self.healthy and self.consecutive_failures >= eject_after:
+            self.eject()
+
+    def eject(self) -> None:
+        if self.healthy:
+            self.healthy = False
+            self.ejections += 1
+
+    def readmit(self) -> None:
+        self.healthy = True
+        self.consecutive_failures = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "baseUrl": self.base_url,
+            "healthy": self.healthy,
+            "outstanding": self.outstanding,
+            "ewmaLatency": self.ewma_latency,
+            "requests": self.requests,
+            "failures": self.failures,
+            "ejections": self.ejections,
+            "circuit": self.client.breaker.stats(),
+            "timeouts": self.client.timeouts.stats(),
+            "http": self.client.http.stats(),
+        }
+
+
+class BackendPool:
+    """Spread requests over several ``PerplexicaClient`` instances.
+
+    Requests go to the healthy backend with the fewest outstanding requests,
+    or with the lowest load-weighted EWMA latency when ``strategy`` is
+    ``"ewma"``. A backend is ejected after ``eject_after`` consecutive
+    failures or a failed health probe against ``/api/models``, and re-admitted
+    once a probe succeeds again; backends whose circuit breaker is open are
+    skipped as well. If every backend is ejected, requests are still routed
+    rather than failed outright. With a ``hedger``, a slow search is raced
+    against a duplicate sent to a different backend.
+    """
+
+    def __init__(
+        self,
+        clients: Sequence["PerplexicaClient"],
+        strategy: str = "least_outstanding",
+        probe_interval: float = 10.0,
+        probe_timeout: float = 5.0,
+        eject_after: int = 3,
+        ewma_alpha: float = 0.3,
+        hedger: Optional[Hedger] = None,
+    ) -> None:
+        if not clients:
+            raise ValueError("BackendPool needs at least one backend")
+        if strategy not in STRATEGIES:
+            raise ValueError(f"Unknown load balancing strategy: {strategy}")
+        self.backends = [Backend(client) for client in clients]
+        self.strategy = strategy
+        self.probe_interval = probe_interval
+        self.probe_timeout = probe_timeout
+        self.eject_after = eject_after
+        self.ewma_alpha = ewma_alpha
+        self.hedger = hedger
+        self._rotation = itertools.count()
+        self._probe_task: Optional["asyncio.Task[None]"] = None
+
+    @classmethod
+    def from_env(cls, clients: Sequence["PerplexicaClient"]) -> "BackendPool":
+        """Create a pool configured from ``PERPLEXICA_LB_*`` variables."""
+        return cls(
+            clients,
+            strategy=os.getenv("PERPLEXICA_LB_STRATEGY", "least_outstanding"),
+            probe_interval=float(os.getenv("PERPLEXICA_HEALTH_INTERVAL", "10")),
+            eject_after=int(os.getenv("PERPLEXICA_EJECT_FAILURES", "3")),
+            hedger=Hedger.from_env(),
+        )
+
+    @property
+    def base_url(self) -> str:
+        return ",".join(backend.base_url for backend in self.backends)
+
+    def choose(self, exclude: Sequence[Backend] = ()) -> Backend:
+        """Pick the backend for the next request."""
+        self._ensure_probing()
+        candidates = [b for b in self.backends if b.healthy and b.client.breaker.allows_requests and b not in exclude]
+        if not candidates:
+            candidates = [b for b in self.backends if b not in exclude] or list(self.backends)
+
+        # Rotate the starting point so ties are spread evenly.
+        offset = next(self._rotation) % len(candidates)
+        candidates = candidates[offset:] + candidates[:offset]
+        if self.strategy == "ewma":
+            return min(candidates, key=lambda b: (b.ewma_latency or 0.0) * (b.outstanding + 1))
+        return min(candidates, key=lambda b: b.outstanding)
+
+    async def call(self, fn: Callable[["PerplexicaClient"], Awaitable[T]], backend: Optional[Backend] = None) -> T:
+        """Run ``fn`` against a chosen backend, tracking load and health."""
+        backend = backend or self.choose()
+        backend.outstanding += 1
+        start = time.monotonic()
+        try:
+            result = await fn(backend.client)
+        except Exception as e:
+            if is_backend_failure(e):
+                backend.record_failure(self.eject_after)
+            raise
+        else:
+            backend.record_success(time.monotonic() - start, self.ewma_alpha)
+            return result
+        finally:
+            backend.outstanding -= 1
+
+    async def search(self, request: "SearchRequest") -> "SearchResponse":
+        """Perform a search on the least loaded backend."""
+        if self.hedger is None or request.stream or len(self.backends) < 2:
+            return await self.call(lambda client: client.search(request))
+
+        first = self.choose()
+        return await self.hedger.run(
+            request.focusMode,
+            lambda: self.call(lambda client: client.search(request), first),
+            lambda: self.call(lambda client: client.search(request), self.choose(exclude=[first])),
+        )
+
+    async def search_stream(
+        self, request: "SearchRequest", on_chunk: Optional["ChunkCallback"] = None
+    ) -> "SearchResponse":
+        """Perform a streamed search on the least loaded backend."""
+        return await self.call(lambda client: client.search_stream(request, on_chunk))
+
+    async def get_models(self) -> Dict[str, Any]:
+        """Get available models from the least loaded backend."""
+        return await self.call(lambda client: client.get_models())
+
+    async def probe(self) -> None:
+        """Health-check every backend once, ejecting or re-admitting as needed."""
+
+        async def probe_one(backend: Backend) -> None:
+            try:
+                response = await backend.client.client.get(
+                    f"{backend.base_url}/api/models", timeout=self.probe_timeout, extensions={UNCOUNTED: True}
+                )
+                response.raise_for_status()
+            except Exception:
+                backend.eject()
+            else:
+                backend.readmit()
+
+        await asyncio.gather(*(probe_one(backend) for backend in self.backends))
+
+    def _ensure_probing(self) -> None:
+        if self._probe_task is None and self.probe_interval > 0:
+            self._probe_task = asyncio.get_running_loop().create_task(self._probe_loop())
+
+    async def _probe_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.probe_interval)
+            await self.probe()
+
+    def stats(self) -> List[Dict[str, Any]]:
+        """Return routing and health state per backend."""
+        return [backend.stats() for backend in self.backends]
+
+    async def prepare(self) -> None:
+        """Create every backend's HTTP client off the event loop."""
+        await asyncio.gather(*(backend.client.prepare() for backend in self.backends))
+
+    async def warm(self) -> None:
+        """Open pooled connections to every backend."""
+        await asyncio.gather(*(backend.client.warm() for backend in self.backends))
+
+    async def close(self) -> None:
+        """Stop health probes and close every backend client."""
+        if self._probe_task is not None:
+            self._probe_task.cancel()
+            try:
+                await self._probe_task
+            except asyncio.CancelledError:
+                pass
+            self._probe_task = None
+        await asyncio.gather(*(backend.client.close() for backend in self.backends))
@@ -0,0 +1,165 @@
+"""Circuit breaker for calls to Perplexica."""
+
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Tuple, TypeVar
+
+from .backends import is_backend_failure
+
+T = TypeVar("T")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling Perplexica while the circuit is open."""
+
+
+class CircuitBreaker:
+    """Fail fast while Perplexica is down or badly degraded.
+
+    The breaker tracks the last ``window`` calls. Once at least ``min_calls``
+    have been seen, it opens when the share of failed calls reaches
+    ``failure_rate`` or the share of calls slower than ``slow_call_seconds``
+    reaches ``slow_call_rate``. While open, calls raise ``CircuitOpenError``
+    immediately. After ``open_seconds`` the breaker goes half-open and lets
+    ``trial_calls`` requests through: if they all succeed quickly it closes,
+    and any failure opens it again.
+    """
+
+    def __init__(
+        self,
+        window: int = 20,
+        min_calls: int = 5,
+        failure_rate: float = 0.5,
+        slow_call_seconds: float = 45.0,
+        slow_call_rate: float = 0.8,
+        open_seconds: float = 30.0,
+        trial_calls: int = 3,
+        enabled: bool = True,
+    ) -> None:
+        self.min_calls = min_calls
+        self.failure_rate = failure_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.slow_call_rate = slow_call_rate
+        self.open_seconds = open_seconds
+        self.trial_calls = trial_calls
+        self.enabled = enabled
+
+        self._outcomes: Deque[Tuple[bool, bool]] = deque(maxlen=window)
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._trials_started = 0
+        self._trials_passed = 0
+
+        self.opened = 0
+        self.rejected = 0
+
+    @classmethod
+    def from_env(cls) -> "CircuitBreaker":
+        """Create a breaker configured from ``PERPLEXICA_BREAKER_*`` variables."""
+        return cls(
+            window=int(os.getenv("PERPLEXICA_BREAKER_WINDOW", "20")),
+            min_calls=int(os.getenv("PERPLEXICA_BREAKER_MIN_CALLS", "5")),
+            failure_rate=float(os.getenv("PERPLEXICA_BREAKER_FAILURE_RATE", "0.5")),
+            slow_call_seconds=float(os.getenv("PERPLEXICA_BREAKER_SLOW_CALL_SECONDS", "45")),
+            slow_call_rate=float(os.getenv("PERPLEXICA_BREAKER_SLOW_CALL_RATE", "0.8")),
+            open_seconds=float(os.getenv("PERPLEXICA_BREAKER_OPEN_SECONDS", "30")),
+            trial_calls=int(os.getenv("PERPLEXICA_BREAKER_TRIAL_CALLS", "3")),
+            enabled=os.getenv("PERPLEXICA_BREAKER_ENABLED", "true").lower() not in ("0", "false", "no"),
+        )
+
+    @property
+    def state(self) -> str:
+        """Current state, moving from open to half-open once the open period is over."""
+        if self._state == OPEN and time.monotonic() - self._opened_at >= self.open_seconds:
+            self._state = HALF_OPEN
+            self._trials_started = 0
+            self._trials_passed = 0
+        return self._state
+
+    @property
+    def allows_requests(self) -> bool:
+        """Whether a call made now would be let through."""
+        state = self.state
+        return state == CLOSED or (state == HALF_OPEN and self._trials_started < self.trial_calls)
+
+    async def call(self, fn: Callable[[], Awaitable[T]]) -> T:
+        """Run ``fn`` through the breaker."""
+        if not self.enabled:
+            return await fn()
+
+        state = self._admit()
+        start = time.monotonic()
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            if state == HALF_OPEN:
+                self._trials_started -= 1
+            raise
+        except Exception as e:
+            self._record(state, not is_backend_failure(e), time.monotonic() - start)
+            raise
+        self._record(state, True, time.monotonic() - start)
+        return result
+
+    def _admit(self) -> str:
+        state = self.state
+        if state == OPEN or (state == HALF_OPEN and self._trials_started >= self.trial_calls):
+            self.rejected += 1
+            remaining = max(self.open_seconds - (time.monotonic() - self._opened_at), 0.0)
+            raise CircuitOpenError(
+                f"Perplexica is unavailable (circuit open after repeated failures); retry in {remaining:.0f}s"
+            )
+        if state == HALF_OPEN:
+            self._trials_started += 1
+        return state
+
+    def _record(self, state: str, success: bool, latency: float) -> None:
+        slow = latency >= self.slow_call_seconds
+        if state == HALF_OPEN:
+            if self._state != HALF_OPEN:
+                return
+            if not success or slow:
+                self._open()
+            else:
+                self._trials_passed += 1
+                if self._trials_passed >= self.trial_calls:
+                    self._close()
+            return
+
+        if self._state != CLOSED:
+            return
+        self._outcomes.append((success, slow))
+        if len(self._outcomes) < self.min_calls:
+            return
+        failures = sum(1 for ok, _ in self._outcomes if not ok)
+        slow_calls = sum(1 for _, is_slow in self._outcomes if is_slow)
+        if (
+            failures / len(self._outcomes) >= self.failure_rate
+            or slow_calls / len(self._outcomes) >= self.slow_call_rate
+        ):
+            self._open()
+
+    def _open(self) -> None:
+        self._state = OPEN
+        self._opened_at = time.monotonic()
+        self._outcomes.clear()
+        self.opened += 1
+
+    def _close(self) -> None:
+        self._state = CLOSED
+        self._outcomes.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the current state and trip counters."""
+        return {
+            "state": self.state,
+            "opened": self.opened,
+            "rejected": self.rejected,
+            "recentCalls": len(self._outcomes),
+        }
@@ -0,0 +1,301 @@
+"""Response cache for Perplexica searches."""
+
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Generic, Optional, Tuple, TypeVar, cast
+
+T = TypeVar("T")
+
+# Seconds a cached answer stays fresh, per focus mode. Web and social results
+# go stale quickly; academic and computational answers rarely change.
+DEFAULT_FOCUS_TTLS: Dict[str, float] = {
+    "webSearch": 600.0,
+    "academicSearch": 86400.0,
+    "writingAssistant": 3600.0,
+    "wolframAlphaSearch": 86400.0,
+    "youtubeSearch": 3600.0,
+    "redditSearch": 1800.0,
+}
+
+
+def normalize_query(query: str) -> str:
+    """Collapse whitespace and case so trivially different queries share a key."""
+    return " ".join(query.split()).casefold()
+
+
+def request_key(request: Dict[str, Any]) -> str:
+    """Build a stable cache key from a dumped ``SearchRequest``.
+
+    ``stream`` only changes how the answer is delivered, not the answer itself,
+    so it is left out of the key.
+    """
+    normalized = {k: v for k, v in request.items() if k != "stream" and v is not None}
+    normalized["query"] = normalize_query(str(normalized.get("query", "")))
+    if isinstance(normalized.get("systemInstructions"), str):
+        normalized["systemInstructions"] = normalized["systemInstructions"].strip()
+    encoded = json.dumps(normalized, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def parse_ttls(value: str) -> Dict[str, float]:
+    """Parse a ``focusMode=seconds,...`` TTL override string."""
+    ttls: Dict[str, float] = {}
+    for item in value.split(","):
+        if not item.strip():
+            continue
+        focus_mode, _, seconds = item.partition("=")
+        if not seconds:
+            raise ValueError(f"Invalid cache TTL entry: {item!r}")
+        ttls[focus_mode.strip()] = float(seconds)
+    return ttls
+
+
+class SearchCache:
+    """Two-tier search response cache.
+
+    Entries live in a bounded in-memory LRU and, when ``path`` is given, in a
+    SQLite table so they survive restarts. Each entry expires after the TTL of
+    its focus mode; a TTL of ``0`` disables caching for that mode.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 256,
+        default_ttl: float = 600.0,
+        focus_ttls: Optional[Dict[str, float]] = None,
+        path: Optional[str] = None,
+        max_disk_entries: int = 10000,
+    ) -> None:
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.focus_ttls = dict(DEFAULT_FOCUS_TTLS)
+        if focus_ttls:
+            self.focus_ttls.update(focus_ttls)
+        self.max_disk_entries = max_disk_entries
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._db: Optional[sqlite3.Connection] = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS search_cache ("
+                "key TEXT PRIMARY KEY, focus_mode TEXT NOT NULL, expires_at REAL NOT NULL, payload TEXT NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS search_cache_expires ON search_cache (expires_at)")
+            self._db.commit()
+
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @classmethod
+    def from_env(cls) -> Optional["SearchCache"]:
+        """Create a cache from ``PERPLEXICA_CACHE_*`` variables, or ``None`` when disabled."""
+        max_entries = int(os.getenv("PERPLEXICA_CACHE_SIZE", "256"))
+        path = os.getenv("PERPLEXICA_CACHE_PATH") or None
+        if max_entries <= 0 and not path:
+            return None
+        return cls(
+            max_entries=max(max_entries, 0),
+            default_ttl=float(os.getenv("PERPLEXICA_CACHE_TTL", "600")),
+            focus_ttls=parse_ttls(os.getenv("PERPLEXICA_CACHE_TTLS", "")),
+            path=path,
+            max_disk_entries=int(os.getenv("PERPLEXICA_CACHE_DISK_SIZE", "10000")),
+        )
+
+    def ttl_for(self, focus_mode: str) -> float:
+        """Return the TTL in seconds for a focus mode."""
+        return self.focus_ttls.get(focus_mode, self.default_ttl)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the cached response payload for ``key``, if still fresh."""
+        now = time.time()
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, payload = entry
+            if expires_at > now:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return payload
+            del self._entries[key]
+
+        if self._db is not None:
+            row = self._db.execute(
+                "SELECT expires_at, payload FROM search_cache WHERE key = ? AND expires_at > ?",
+                (key, now),
+            ).fetchone()
+            if row is not None:
+                payload = cast(Dict[str, Any], json.loads(row[1]))
+                self._remember(key, row[0], payload)
+                self.hits += 1
+                self.disk_hits += 1
+                return payload
+
+        self.misses += 1
+        return None
+
+    def set(self, key: str, focus_mode: str, payload: Dict[str, Any]) -> None:
+        """Store a response payload under ``key`` using the focus mode's TTL."""
+        ttl = self.ttl_for(focus_mode)
+        if ttl <= 0:
+            return
+        expires_at = time.time() + ttl
+        self._remember(key, expires_at, payload)
+
+        if self._db is not None:
+            self._db.execute(
+                "INSERT OR REPLACE INTO search_cache (key, focus_mode, expires_at, payload) VALUES (?, ?, ?, ?)",
+                (key, focus_mode, expires_at, json.dumps(payload, separators=(",", ":"))),
+            )
+            self._prune_disk()
+            self._db.commit()
+
+    def _remember(self, key: str, expires_at: float, payload: Dict[str, Any]) -> None:
+        if self.max_entries <= 0:
+            return
+        self._entries[key] = (expires_at, payload)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def _prune_disk(self) -> None:
+        assert self._db is not None
+        self._db.execute("DELETE FROM search_cache WHERE expires_at <= ?", (time.time(),))
+        self._db.execute(
+            "DELETE FROM search_cache WHERE key IN ("
+            "SELECT key FROM search_cache ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_disk_entries,),
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current sizes."""
+        return {
+            "hits": self.hits,
+            "diskHits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "maxEntries": self.max_entries,
+            "persistent": self._db is not None,
+        }
+
+    def clear(self) -> None:
+        """Drop every cached entry from both tiers."""
+        self._entries.clear()
+        if self._db is not None:
+            self._db.execute("DELETE FROM search_cache")
+            self._db.commit()
+
+    def close(self) -> None:
+        """Close the SQLite tier, if any."""
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+
+class StaleWhileRevalidate(Generic[T]):
+    """Serve a fetched value, refreshing it in the background once it is stale.
+
+    Only the very first read waits for ``fetch``; later reads return the
+    current copy immediately, kicking off a refresh when it is older than
+    ``max_age``. ``start()`` warms the value and keeps refreshing it every
+    ``max_age`` seconds. A failed refresh keeps serving the previous copy.
+    """
+
+    def __init__(self, fetch: Callable[[], Awaitable[T]], max_age: float) -> None:
+        self.fetch = fetch
+        self.max_age = max_age
+        self._value: Optional[T] = None
+        self._fetched_at = 0.0
+        self._refresh_task: Optional["asyncio.Task[T]"] = None
+        self._loop_task: Optional["asyncio.Task[None]"] = None
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_failures = 0
+
+    async def get(self) -> T:
+        """Return the cached value, fetching it only if there is none yet."""
+        if self.max_age <= 0:
+            self.misses += 1
+            return await self.fetch()
+        if self._value is None:
+            self.misses += 1
+            return await self.refresh()
+
+        if time.monotonic() - self._fetched_at >= self.max_age:
+            self.stale_hits += 1
+            self._start_refresh()
+        else:
+            self.hits += 1
+        return self._value
+
+    async def refresh(self) -> T:
+        """Fetch a fresh value, joining a refresh that is already running."""
+        return await asyncio.shield(self._start_refresh())
+
+    def start(self) -> None:
+        """Warm the value now and keep refreshing it every ``max_age`` seconds."""
+        if self._loop_task is None and self.max_age > 0:
+            self._loop_task = asyncio.get_running_loop().create_task(self._refresh_loop())
+
+    async def close(self) -> None:
+        """Stop background refreshes."""
+        for task in (self._loop_task, self._refresh_task):
+            if task is not None and not task.done():
+                task.cancel()
+                try:
+                    await task
+                except BaseException:
+                    pass
+        self._loop_task = None
+        self._refresh_task = None
+
+    def _start_refresh(self) -> "asyncio.Task[T]":
+        if self._refresh_task is None or self._refresh_task.done():
+            self._refresh_task = asyncio.get_running_loop().create_task(self._do_refresh())
+            self._refresh_task.add_done_callback(self._refresh_done)
+        return self._refresh_task
+
+    async def _do_refresh(self) -> T:
+        value = await self.fetch()
+        self._value = value
+        self._fetched_at = time.monotonic()
+        self.refreshes += 1
+        return value
+
+    def _refresh_done(self, task: "asyncio.Task[T]") -> None:
+        # Background refresh errors are only reported to callers that awaited
+        # the refresh; retrieve them here so they are not logged as unhandled.
+        if not task.cancelled() and task.exception() is not None:
+            self.refresh_failures += 1
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                pass
+            await asyncio.sleep(self.max_age)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit counters and the age of the current copy."""
+        return {
+            "hits": self.hits,
+            "staleHits": self.stale_hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "refreshFailures": self.refresh_failures,
+            "age": time.monotonic() - self._fetched_at if self._value is not None else None,
+        }
@@ -0,0 +1,297 @@
+"""Recording and replay of Perplexica HTTP traffic for deterministic load tests."""
+
+import asyncio
+import gzip
+import json
+import os
+import time
+from typing import IO, Any, AsyncIterator, Dict, List, Optional, Tuple
+
+import httpx
+
+MODES = ("record", "replay")
+MATCHES = ("exact", "options")
+FREE_TEXT_FIELDS = ("query", "history", "systemInstructions")
+SECRET_FIELDS = ("customOpenAIKey",)
+REDACTED = "[redacted]"
+
+
+class CassetteMiss(httpx.TransportError):
+    """Raised in replay mode when no recorded response matches a request."""
+
+
+def _text(data: bytes) -> str:
+    # latin-1 maps every byte to one character, so any body survives a JSON round trip.
+    return data.decode("latin-1")
+
+
+def _without_secrets(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {k: REDACTED if k in SECRET_FIELDS else _without_secrets(v) for k, v in value.items()}
+    if isinstance(value, list):
+        return [_without_secrets(item) for item in value]
+    return value
+
+
+def _redact(body: str) -> str:
+    """Return a JSON request body with its secret fields, such as API keys, replaced by a placeholder.
+
+    Bodies without secrets are returned unchanged.
+    """
+    if not any(field in body for field in SECRET_FIELDS):
+        return body
+    try:
+        fields = json.loads(body)
+    except ValueError:
+        return body
+    redacted = _without_secrets(fields)
+    if redacted == fields:
+        return body
+    return json.dumps(redacted, ensure_ascii=False, separators=(",", ":"))
+
+
+def _options(body: str) -> str:
+    """Return a JSON request body without its free-text fields, in canonical form."""
+    try:
+        fields = json.loads(body)
+    except ValueError:
+        return body
+    if not isinstance(fields, dict):
+        return body
+    return json.dumps({k: v for k, v in fields.items() if k not in FREE_TEXT_FIELDS}, sort_keys=True)
+
+
+class Cassette:
+    """A file of recorded request/response pairs, one JSON object per line.
+
+    In ``record`` mode every request sent to Perplexica is passed through and
+    its response is written once fully read: status, headers, and the body as
+    it arrived in chunks, with the time of the headers and of each chunk since
+    the request was sent. In ``replay`` mode the file is loaded into memory and
+    responses are served from it without any network access, optionally
+    sleeping to reproduce the recorded timing divided by ``speed``.
+
+    Request bodies are recorded and matched decompressed, so gzip request
+    compression does not affect them. Secret request fields
+    (``customOpenAIKey``) are never written to the file: they are replaced by
+    a placeholder when recording, and when matching, so replays do not depend
+    on the key sent.
+
+    Requests are matched on method, path and body. With ``match="options"``
+    a request whose body was never recorded is answered with one of the
+    responses recorded for the same method, path and search options, i.e. the
+    body without its free text (``query``, ``history`` and
+    ``systemInstructions``), so load tests can send queries that differ from
+    the recording and still get a streamed or plain response of the right
+    focus mode. Repeated requests cycle through all responses recorded for
+    them.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        mode: str = "replay",
+        timing: bool = False,
+        speed: float = 1.0,
+        match: str = "exact",
+    ) -> None:
+        if mode not in MODES:
+            raise ValueError(f"Cassette mode must be one of: {', '.join(MODES)}")
+        if match not in MATCHES:
+            raise ValueError(f"Cassette match must be one of: {', '.join(MATCHES)}")
+        if speed <= 0:
+            raise ValueError("Cassette speed must be positive")
+        self.path = path
+        self.mode = mode
+        self.timing = timing
+        self.speed = speed
+        self.match = match
+        self._file: Optional[IO[str]] = None
+        self._exact: Dict[Tuple[str, str, str], List[Dict[str, Any]]] = {}
+        self._similar: Dict[Tuple[str, str, str], List[Dict[str, Any]]] = {}
+        self._positions: Dict[Tuple[str, str, str], int] = {}
+
+        self.interactions = 0
+        self.replayed = 0
+        self.misses = 0
+
+        if mode == "record":
+            self._file = open(path, "a", encoding="utf-8")
+        else:
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    if line.strip():
+                        self._load(json.loads(line))
+
+    @classmethod
+    def from_env(cls) -> Optional["Cassette"]:
+        """Create a cassette from ``PERPLEXICA_CASSETTE_*`` variables, or ``None`` when not configured."""
+        mode = os.getenv("PERPLEXICA_CASSETTE_MODE", "").lower()
+        if not mode:
+            return None
+        path = os.getenv("PERPLEXICA_CASSETTE_PATH")
+        if not path:
+            raise ValueError("PERPLEXICA_CASSETTE_PATH is required when PERPLEXICA_CASSETTE_MODE is set")
+        return cls(
+            path,
+            mode=mode,
+            timing=os.getenv("PERPLEXICA_CASSETTE_TIMING", "false").lower() in ("1", "true", "yes"),
+            speed=float(os.getenv("PERPLEXICA_CASSETTE_SPEED", "1")),
+            match=os.getenv("PERPLEXICA_CASSETTE_MATCH", "exact").lower(),
+        )
+
+    def transport(self, inner: Optional[httpx.AsyncBaseTransport] = None) -> httpx.AsyncBaseTransport:
+        """Return an httpx transport that records to or replays from this cassette.
+
+        In record mode requests are sent with ``inner``, a default HTTP
+        transport unless given.
+        """
+        if self.mode == "record":
+            return _RecordingTransport(self, inner or httpx.AsyncHTTPTransport())
+        return _ReplayTransport(self)
+
+    def _load(self, interaction: Dict[str, Any]) -> None:
+        request = interaction["request"]
+        self._exact.setdefault((request["method"], request["path"], request["body"]), []).append(interaction)
+        self._similar.setdefault((request["method"], request["path"], _options(request["body"])), []).append(
+            interaction
+        )
+        self.interactions += 1
+
+    def _write(self, interaction: Dict[str, Any]) -> None:
+        assert self._file is not None
+        self._file.write(json.dumps(interaction, ensure_ascii=False, separators=(",", ":")) + "\n")
+        self._file.flush()
+        self.interactions += 1
+
+    def _find(self, method: str, path: str, body: str) -> Optional[Dict[str, Any]]:
+        key = (method, path, body)
+        candidates = self._exact.get(key)
+        if not candidates and self.match == "options":
+            key = (method, path, _options(body))
+            candidates = self._similar.get(key)
+        if not candidates:
+            return None
+        position = self._positions.get(key, 0)
+        self._positions[key] = position + 1
+        return candidates[position % len(candidates)]
+
+    def stats(self) -> Dict[str, Any]:
+        """Return the mode and interaction counters."""
+        return {
+            "mode": self.mode,
+            "path": self.path,
+            "interactions": self.interactions,
+            "replayed": self.replayed,
+            "misses": self.misses,
+        }
+
+    def close(self) -> None:
+        """Close the cassette file in record mode."""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+
+def _request_body(request: httpx.Request) -> bytes:
+    """Return a request body, decompressed if it was sent gzip-encoded."""
+    # Compressed bodies carry a timestamp, and hide secrets from redaction.
+    if request.headers.get("Content-Encoding", "").lower() == "gzip":
+        try:
+            return gzip.decompress(request.content)
+        except (OSError, EOFError):
+            pass
+    return request.content
+
+
+def _request_fields(request: httpx.Request) -> Dict[str, str]:
+    return {
+        "method": request.method,
+        "path": request.url.raw_path.decode("ascii"),
+        "body": _redact(_text(_request_body(request))),
+    }
+
+
+class _RecordingTransport(httpx.AsyncBaseTransport):
+    def __init__(self, cassette: Cassette, transport: httpx.AsyncBaseTransport) -> None:
+        self.cassette = cassette
+        self._transport = transport
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await request.aread()
+        start = time.monotonic()
+        response = await self._transport.handle_async_request(request)
+        interaction: Dict[str, Any] = {
+            "request": _request_fields(request),
+            "status": response.status_code,
+            "headers": [[_text(name), _text(value)] for name, value in response.headers.raw],
+            "headersAt": round(time.monotonic() - start, 6),
+            "chunks": [],
+        }
+        stream = _RecordingStream(self.cassette, response.stream, interaction, start)
+        return httpx.Response(
+            response.status_code, headers=response.headers, stream=stream, extensions=response.extensions
+        )
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+class _RecordingStream(httpx.AsyncByteStream):
+    def __init__(self, cassette: Cassette, stream: Any, interaction: Dict[str, Any], start: float) -> None:
+        self.cassette = cassette
+        self._stream = stream
+        self._interaction: Optional[Dict[str, Any]] = interaction
+        self._start = start
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        async for chunk in self._stream:
+            if self._interaction is not None:
+                self._interaction["chunks"].append([round(time.monotonic() - self._start, 6), _text(chunk)])
+            yield chunk
+        self._finish()
+
+    async def aclose(self) -> None:
+        # The client may stop reading early, e.g. after the "done" event of a
+        # search stream; what it read is what a replay needs to serve.
+        self._finish()
+        await self._stream.aclose()
+
+    def _finish(self) -> None:
+        if self._interaction is not None:
+            self.cassette._write(self._interaction)
+            self._interaction = None
+
+
+class _ReplayTransport(httpx.AsyncBaseTransport):
+    def __init__(self, cassette: Cassette) -> None:
+        self.cassette = cassette
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        await request.aread()
+        fields = _request_fields(request)
+        interaction = self.cassette._find(fields["method"], fields["path"], fields["body"])
+        if interaction is None:
+            self.cassette.misses += 1
+            raise CassetteMiss(f"No recorded response for {fields['method']} {fields['path']}", request=request)
+        self.cassette.replayed += 1
+
+        if self.cassette.timing:
+            await asyncio.sleep(interaction["headersAt"] / self.cassette.speed)
+        headers = [(name.encode("latin-1"), value.encode("latin-1")) for name, value in interaction["headers"]]
+        stream = _ReplayStream(interaction, self.cassette.speed if self.cassette.timing else None)
+        return httpx.Response(interaction["status"], headers=headers, stream=stream)
+
+
+class _ReplayStream(httpx.AsyncByteStream):
+    def __init__(self, interaction: Dict[str, Any], speed: Optional[float]) -> None:
+        self._interaction = interaction
+        self._speed = speed
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        elapsed = self._interaction["headersAt"]
+        for at, chunk in self._interaction["chunks"]:
+            if self._speed is not None and at > elapsed:
+                await asyncio.sleep((at - elapsed) / self._speed)
+                elapsed = at
+            yield chunk.encode("latin-1")
@@ -0,0 +1,26 @@
+"""JSON decoding of Perplexica responses."""
+
+import json
+from typing import Any, Union
+
+import httpx
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - depends on the optional "fast" extra
+    orjson = None  # type: ignore[assignment]
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    """Decode JSON, using orjson when it is installed."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def response_json(response: httpx.Response) -> Any:
+    """Decode a response body, using orjson when it is installed."""
+    content = response.content
+    if orjson is not None and isinstance(content, bytes):
+        return orjson.loads(content)
+    return response.json()
@@ -0,0 +1,51 @@
+"""Merging of sources from searches run in several focus modes."""
+
+from typing import TYPE_CHECKING, Any, Dict, List, Sequence, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+if TYPE_CHECKING:
+    from .server import SearchResponse
+
+TRACKING_PARAMS = frozenset({"fbclid", "gclid", "ref", "ref_src"})
+
+
+def normalize_url(url: str) -> str:
+    """Reduce a URL to a form shared by trivially different links to the same page.
+
+    ``http`` versus ``https``, host case, a leading ``www.``, default ports,
+    trailing slashes, fragments, tracking parameters and query parameter order
+    are ignored.
+    """
+    parts = urlsplit(url.strip())
+    if not parts.netloc:
+        return url.strip()
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+    query = sorted(
+        (key, value)
+        for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith("utm_") and key.lower() not in TRACKING_PARAMS
+    )
+    scheme = "https" if parts.scheme.lower() in ("http", "https") else parts.scheme.lower()
+    return urlunsplit((scheme, host, parts.path.rstrip("/"), urlencode(query), ""))
+
+
+def merge_sources(results: Sequence[Tuple[str, "SearchResponse"]]) -> List[Dict[str, Any]]:
+    """Merge the sources of ``(focusMode, response)`` pairs into one deduplicated list.
+
+    Sources are keyed by normalized URL, or by their text when they have no
+    URL, and keep the order in which they were first seen. Each entry holds
+    the first copy of the ``source`` and every ``focusModes`` that returned it.
+    """
+    merged: Dict[str, Dict[str, Any]] = {}
+    for focus_mode, response in results:
+        for source in response.sources:
+            url = str(source.metadata.get("url") or "")
+            key = normalize_url(url) if url else f"content:{source.pageContent}"
+            entry = merged.setdefault(key, {"source": source, "focusModes": []})
+            if focus_mode not in entry["focusModes"]:
+                entry["focusModes"].append(focus_mode)
+    return list(merged.values())
@@ -0,0 +1,197 @@
+"""Output formats and size budgets for search results."""
+
+import json
+import os
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+OUTPUT_FORMATS = ("markdown", "json", "links")
+DEFAULT_SNIPPET_LENGTH = 200
+# Room for the truncation marker or the closing JSON fields, with plenty to spare.
+MIN_MAX_BYTES = 256
+TRUNCATED_NOTE = "\n\n*[Truncated to fit the output budget]*\n"
+# Brackets, closing fields and a cut string's quotes, which are written even once a JSON result is truncated.
+JSON_RESERVE = 128
+
+
+def requested_format(arguments: Dict[str, Any], default: str = "markdown") -> str:
+    """Return and validate the ``format`` tool argument."""
+    value = arguments.get("format", default)
+    if value not in OUTPUT_FORMATS:
+        raise ValueError(f"format must be one of: {', '.join(OUTPUT_FORMATS)}")
+    return str(value)
+
+
+def snippet(text: str, length: int) -> str:
+    """Return the first ``length`` characters of ``text``, marking a cut with an ellipsis."""
+    if length <= 0:
+        return ""
+    return text[:length] + "..." if len(text) > length else text
+
+
+def dumps(value: Any) -> str:
+    """Serialize ``value`` as compact JSON."""
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def _size(text: str) -> int:
+    return len(text) if text.isascii() else len(text.encode("utf-8"))
+
+
+class OutputBudget:
+    """Limits on the size of a formatted search result.
+
+    ``max_bytes`` caps the UTF-8 size of the whole result, ``max_sources`` the
+    number of sources listed, and ``snippet_length`` the characters of each
+    source's text shown with it. ``None`` means no limit.
+    """
+
+    def __init__(
+        self,
+        max_bytes: Optional[int] = None,
+        max_sources: Optional[int] = None,
+        snippet_length: int = DEFAULT_SNIPPET_LENGTH,
+    ) -> None:
+        if max_bytes is not None and max_bytes < MIN_MAX_BYTES:
+            raise ValueError(f"maxBytes must be at least {MIN_MAX_BYTES}")
+        if max_sources is not None and max_sources < 0:
+            raise ValueError("maxSources must not be negative")
+        if snippet_length < 0:
+            raise ValueError("snippetLength must not be negative")
+        self.max_bytes = max_bytes
+        self.max_sources = max_sources
+        self.snippet_length = snippet_length
+
+    @classmethod
+    def from_env(cls) -> "OutputBudget":
+        """Create the default budget from ``PERPLEXICA_OUTPUT_*`` variables (``0`` means no limit)."""
+        max_bytes = int(os.getenv("PERPLEXICA_OUTPUT_MAX_BYTES", "0"))
+        max_sources = int(os.getenv("PERPLEXICA_OUTPUT_MAX_SOURCES", "-1"))
+        return cls(
+            max_bytes=max_bytes if max_bytes > 0 else None,
+            max_sources=max_sources if max_sources >= 0 else None,
+            snippet_length=int(os.getenv("PERPLEXICA_OUTPUT_SNIPPET_LENGTH", str(DEFAULT_SNIPPET_LENGTH))),
+        )
+
+    def with_arguments(self, arguments: Dict[str, Any]) -> "OutputBudget":
+        """Return this budget with the ``maxBytes``, ``maxSources`` and ``snippetLength`` tool arguments applied."""
+        values: Dict[str, Any] = {
+            "max_bytes": self.max_bytes,
+            "max_sources": self.max_sources,
+            "snippet_length": self.snippet_length,
+        }
+        for argument, name in (
+            ("maxBytes", "max_bytes"),
+            ("maxSources", "max_sources"),
+            ("snippetLength", "snippet_length"),
+        ):
+            if argument in arguments:
+                value = arguments[argument]
+                if not isinstance(value, int) or isinstance(value, bool):
+                    raise ValueError(f"{argument} must be an integer")
+                values[name] = value
+        return OutputBudget(**values)
+
+
+class BudgetedText:
+    """Text built piece by piece that stops growing at a byte limit.
+
+    Pieces are checked against the limit as they are written, so a result is
+    never built beyond its budget only to be cut afterwards. The last
+    ``reserve`` bytes of ``max_bytes`` are kept for closing pieces written
+    with ``reserved=True``, such as a truncation marker or the end of a JSON
+    document.
+    """
+
+    def __init__(self, max_bytes: Optional[int] = None, reserve: int = 0) -> None:
+        self._parts: List[str] = []
+        self._limit = max_bytes - reserve if max_bytes is not None else None
+        self.size = 0
+        self.truncated = False
+
+    def write(self, piece: str, reserved: bool = False) -> bool:
+        """Append ``piece`` if it fits in full; return whether it was written."""
+        size = _size(piece)
+        if reserved:
+            if self._limit is not None:
+                self._limit += size
+        elif self.truncated or (self._limit is not None and self.size + size > self._limit):
+            self.truncated = True
+            return False
+        self._parts.append(piece)
+        self.size += size
+        return True
+
+    def write_prefix(self, piece: str) -> bool:
+        """Append as much of ``piece`` as fits; return whether all of it was written."""
+        room = self._room()
+        if self.write(piece):
+            return True
+        if room is None:
+            return False
+        if room > 0:
+            self._parts.append(piece.encode("utf-8")[:room].decode("utf-8", "ignore"))
+            self.size += _size(self._parts[-1])
+        return False
+
+    def write_json_string(self, value: str) -> bool:
+        """Append ``value`` as a JSON string, cutting the string short to fit; return whether all of it fitted."""
+        room = self._room()
+        encoded = dumps(value)
+        if self.write(encoded):
+            return True
+        if room is None:
+            return False
+        # Escapes make the encoded string longer than the text, so cut until it fits.
+        cut = value.encode("utf-8")[: max(room - 2, 0)].decode("utf-8", "ignore")
+        encoded = dumps(cut)
+        while _size(encoded) > room and cut:
+            cut = cut[: len(cut) - max((_size(encoded) - room) // 2, 1)]
+            encoded = dumps(cut)
+        self._parts.append(encoded)
+        self.size += _size(encoded)
+        return False
+
+    def write_json_field(self, key: str, value: Any, first: bool = False) -> bool:
+        """Append a ``"key":value`` object member, cutting a string value short to fit.
+
+        Returns whether all of it was written; nothing is written once the
+        text is truncated.
+        """
+        if self.truncated:
+            return False
+        head = ("" if first else ",") + dumps(key) + ":"
+        if not isinstance(value, str):
+            return self.write(head + dumps(value))
+        return self.write(head) and self.write_json_string(value)
+
+    def write_json_object(self, key: str, members: Iterable[Tuple[str, Any]]) -> None:
+        """Append a ``"key":{...}`` object member holding as many of ``members`` as fit."""
+        self.write("," + dumps(key) + ":{", reserved=True)
+        for i, (member, value) in enumerate(members):
+            if not self.write_json_field(member, value, first=i == 0):
+                break
+        self.write("}", reserved=True)
+
+    def write_json_items(self, key: str, items: Iterable[Any]) -> int:
+        """Append a ``"key":[...]`` array member of as many whole ``items`` as fit; return how many were written.
+
+        ``items`` is consumed lazily, and no further once one does not fit.
+        """
+        self.write("," + dumps(key) + ":[", reserved=True)
+        count = 0
+        for item in items:
+            if not self.write(("," if count else "") + dumps(item)):
+                break
+            count += 1
+        self.write("]", reserved=True)
+        return count
+
+    def _room(self) -> Optional[int]:
+        """Bytes left before the limit, or ``None`` once truncated."""
+        if self.truncated:
+            return None
+        return self._limit - self.size if self._limit is not None else None
+
+    def getvalue(self) -> str:
+        """Return the text written so far."""
+        return "".join(self._parts)
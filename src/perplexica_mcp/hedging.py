@@ -0,0 +1,132 @@
+"""Hedged requests to cut tail latency."""
+
+import asyncio
+import math
+import os
+import time
+from collections import defaultdict, deque
+from typing import Any, Awaitable, Callable, DefaultDict, Deque, Dict, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class LatencyTracker:
+    """Recent latencies per key, for estimating percentiles."""
+
+    def __init__(self, window: int = 100) -> None:
+        self._samples: DefaultDict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=window))
+
+    def observe(self, key: str, seconds: float) -> None:
+        self._samples[key].append(seconds)
+
+    def keys(self) -> List[str]:
+        return list(self._samples)
+
+    def percentile(self, key: str, q: float, min_samples: int = 1) -> Optional[float]:
+        """Return the ``q`` quantile of recent latencies, or ``None`` with fewer than ``min_samples``."""
+        samples = self._samples.get(key)
+        if not samples or len(samples) < min_samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(math.ceil(q * len(ordered)) - 1, len(ordered) - 1)] if q > 0 else ordered[0]
+
+
+class Hedger:
+    """Send a backup request when the first one is slower than usual.
+
+    If no response has arrived after the ``percentile`` latency of recent
+    calls with the same key (at least ``min_delay`` seconds), a second attempt
+    is started and whichever succeeds first wins; the other is cancelled. No
+    hedging happens until ``min_samples`` latencies have been seen for a key,
+    and hedges are limited to ``budget`` times the number of calls so that a
+    slow Perplexica is not swamped with duplicates.
+    """
+
+    def __init__(
+        self,
+        percentile: float = 0.95,
+        budget: float = 0.1,
+        min_delay: float = 1.0,
+        min_samples: int = 20,
+        window: int = 100,
+    ) -> None:
+        self.percentile = percentile
+        self.budget = budget
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self.latency = LatencyTracker(window)
+
+        self.calls = 0
+        self.hedged = 0
+        self.wins = 0
+        self.over_budget = 0
+
+    @classmethod
+    def from_env(cls) -> Optional["Hedger"]:
+        """Create a hedger from ``PERPLEXICA_HEDGE_*`` variables, or ``None`` when hedging is off."""
+        if os.getenv("PERPLEXICA_HEDGE_ENABLED", "false").lower() not in ("1", "true", "yes"):
+            return None
+        return cls(
+            percentile=float(os.getenv("PERPLEXICA_HEDGE_PERCENTILE", "0.95")),
+            budget=float(os.getenv("PERPLEXICA_HEDGE_BUDGET", "0.1")),
+            min_delay=float(os.getenv("PERPLEXICA_HEDGE_MIN_DELAY", "1")),
+        )
+
+    def delay(self, key: str) -> Optional[float]:
+        """Seconds to wait before hedging a call with ``key``, or ``None`` if it should not be hedged."""
+        threshold = self.latency.percentile(key, self.percentile, self.min_samples)
+        return None if threshold is None else max(threshold, self.min_delay)
+
+    async def run(
+        self, key: str, fn: Callable[[], Awaitable[T]], backup: Optional[Callable[[], Awaitable[T]]] = None
+    ) -> T:
+        """Run ``fn``, racing it against ``backup`` (default: ``fn`` again) if it is slow."""
+        self.calls += 1
+        delay = self.delay(key)
+        start = time.monotonic()
+        primary = asyncio.ensure_future(fn())
+        try:
+            if delay is not None:
+                await asyncio.wait({primary}, timeout=delay)
+            if primary.done() or delay is None:
+                result = await primary
+                self.latency.observe(key, time.monotonic() - start)
+                return result
+            if self.hedged >= self.budget * self.calls:
+                self.over_budget += 1
+                result = await primary
+                self.latency.observe(key, time.monotonic() - start)
+                return result
+
+            self.hedged += 1
+            return await self._race(key, primary, asyncio.ensure_future((backup or fn)()), start)
+        finally:
+            primary.cancel()
+
+    async def _race(self, key: str, primary: "asyncio.Future[T]", hedge: "asyncio.Future[T]", start: float) -> T:
+        hedge_start = time.monotonic()
+        pending = {primary, hedge}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for attempt in done:
+                    if attempt.exception() is None:
+                        if attempt is hedge:
+                            self.wins += 1
+                            self.latency.observe(key, time.monotonic() - hedge_start)
+                        else:
+                            self.latency.observe(key, time.monotonic() - start)
+                        return attempt.result()
+            # Both attempts failed; report the original request's error.
+            return primary.result()
+        finally:
+            hedge.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hedging counters."""
+        return {
+            "calls": self.calls,
+            "hedged": self.hedged,
+            "wins": self.wins,
+            "overBudget": self.over_budget,
+        }
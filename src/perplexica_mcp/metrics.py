@@ -0,0 +1,282 @@
+"""Latency and throughput instrumentation."""
+
+import asyncio
+import bisect
+import math
+import os
+import time
+from collections import defaultdict
+from typing import Any, Callable, DefaultDict, Dict, Iterable, List, Optional, Sequence, Tuple
+
+LATENCY_BUCKETS: Tuple[float, ...] = (0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0)
+SIZE_BUCKETS: Tuple[float, ...] = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+Labels = Tuple[Tuple[str, str], ...]
+
+# httpx request extension marking health probes and connection warm-up, which are not counted as upstream responses.
+UNCOUNTED = "perplexica_uncounted"
+
+
+class Histogram:
+    """Cumulative-bucket histogram in the Prometheus style."""
+
+    def __init__(self, buckets: Sequence[float] = LATENCY_BUCKETS) -> None:
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate a quantile by linear interpolation within its bucket."""
+        if self.count == 0:
+            return None
+        rank = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = self.buckets[i - 1] if i > 0 else 0.0
+                upper = self.buckets[i] if i < len(self.buckets) else self.max
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.max
+
+    def summary(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "mean": self.sum / self.count if self.count else None,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "p99": self.quantile(0.99),
+            "max": self.max if self.count else None,
+        }
+
+    def cumulative(self) -> Iterable[Tuple[str, int]]:
+        total = 0
+        for bound, bucket_count in zip(self.buckets, self.counts):
+            total += bucket_count
+            yield _format_number(bound), total
+        yield "+Inf", self.count
+
+
+def _format_number(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+def _labels(**labels: str) -> Labels:
+    return tuple(sorted(labels.items()))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _render_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    items = list(labels) + ([extra] if extra else [])
+    if not items:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in items) + "}"
+
+
+class Metrics:
+    """Registry of MCP-layer and upstream request metrics."""
+
+    def __init__(self) -> None:
+        self.started_at = time.time()
+        self.tool_latency: DefaultDict[Labels, Histogram] = defaultdict(Histogram)
+        self.search_latency: DefaultDict[Labels, Histogram] = defaultdict(Histogram)
+        self.upstream_latency: DefaultDict[Labels, Histogram] = defaultdict(Histogram)
+        self.response_bytes: DefaultDict[Labels, Histogram] = defaultdict(lambda: Histogram(SIZE_BUCKETS))
+        self.tool_calls: DefaultDict[Labels, int] = defaultdict(int)
+        self.upstream_responses: DefaultDict[Labels, int] = defaultdict(int)
+        self.in_flight: DefaultDict[str, int] = defaultdict(int)
+        self.upstream_in_flight = 0
+
+    def tool_started(self, tool: str) -> None:
+        self.in_flight[tool] += 1
+
+    def tool_finished(
+        self,
+        tool: str,
+        seconds: float,
+        outcome: str,
+        response_bytes: int = 0,
+        focus_mode: Optional[str] = None,
+        optimization_mode: Optional[str] = None,
+    ) -> None:
+        """Record a completed tool call."""
+        self.in_flight[tool] -= 1
+        self.tool_calls[_labels(tool=tool, outcome=outcome)] += 1
+        self.tool_latency[_labels(tool=tool)].observe(seconds)
+        self.response_bytes[_labels(tool=tool)].observe(response_bytes)
+        if focus_mode is not None:
+            labels = _labels(focus_mode=focus_mode, optimization_mode=optimization_mode or "")
+            self.search_latency[labels].observe(seconds)
+
+    def upstream_finished(self, endpoint: str, seconds: float) -> None:
+        """Record the latency of a completed call to Perplexica."""
+        self.upstream_latency[_labels(endpoint=endpoint)].observe(seconds)
+
+    def upstream_status(self, endpoint: str, status: str) -> None:
+        """Count a Perplexica response status, or an error that left no response."""
+        self.upstream_responses[_labels(endpoint=endpoint, status=status)] += 1
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return all metrics as plain data."""
+
+        def keyed(values: Dict[Labels, Any], render: Any = lambda v: v) -> List[Dict[str, Any]]:
+            return [dict(labels, **{"value": render(value)}) for labels, value in sorted(values.items())]
+
+        return {
+            "uptimeSeconds": time.time() - self.started_at,
+            "toolCalls": keyed(self.tool_calls),
+            "toolLatency": keyed(self.tool_latency, Histogram.summary),
+            "searchLatency": keyed(self.search_latency, Histogram.summary),
+            "upstreamLatency": keyed(self.upstream_latency, Histogram.summary),
+            "upstreamResponses": keyed(self.upstream_responses),
+            "responseBytes": keyed(self.response_bytes, Histogram.summary),
+            "inFlight": dict(self.in_flight),
+            "upstreamInFlight": self.upstream_in_flight,
+        }
+
+    def render_prometheus(self, gauges: Optional[Dict[str, float]] = None) -> str:
+        """Render all metrics in the Prometheus text exposition format.
+
+        ``gauges`` adds extra unlabelled values, such as cache counters owned
+        by other components.
+        """
+        lines: List[str] = []
+
+        def counter(name: str, help_text: str, values: Dict[Labels, int]) -> None:
+            lines.extend([f"# HELP {name} {help_text}", f"# TYPE {name} counter"])
+            lines.extend(f"{name}{_render_labels(labels)} {value}" for labels, value in sorted(values.items()))
+
+        def histogram(name: str, help_text: str, values: Dict[Labels, Histogram]) -> None:
+            lines.extend([f"# HELP {name} {help_text}", f"# TYPE {name} histogram"])
+            for labels, hist in sorted(values.items()):
+                for bound, total in hist.cumulative():
+                    lines.append(f"{name}_bucket{_render_labels(labels, ('le', bound))} {total}")
+                lines.append(f"{name}_sum{_render_labels(labels)} {hist.sum}")
+                lines.append(f"{name}_count{_render_labels(labels)} {hist.count}")
+
+        counter("perplexica_mcp_tool_calls_total", "Tool calls by outcome.", self.tool_calls)
+        histogram("perplexica_mcp_tool_latency_seconds", "Tool call latency.", self.tool_latency)
+        histogram(
+            "perplexica_mcp_search_latency_seconds",
+            "perplexica_search latency by focus and optimization mode.",
+            self.search_latency,
+        )
+        histogram("perplexica_mcp_upstream_latency_seconds", "Perplexica HTTP call latency.", self.upstream_latency)
+        counter("perplexica_mcp_upstream_responses_total", "Perplexica responses by status.", self.upstream_responses)
+        histogram("perplexica_mcp_response_bytes", "Tool result size in bytes.", self.response_bytes)
+
+        lines.extend(
+            ["# HELP perplexica_mcp_in_flight Tool calls in progress.", "# TYPE perplexica_mcp_in_flight gauge"]
+        )
+        lines.extend(
+            f"perplexica_mcp_in_flight{_render_labels(_labels(tool=tool))} {value}"
+            for tool, value in sorted(self.in_flight.items())
+        )
+        lines.extend(
+            [
+                "# HELP perplexica_mcp_upstream_in_flight Perplexica HTTP calls in progress.",
+                "# TYPE perplexica_mcp_upstream_in_flight gauge",
+                f"perplexica_mcp_upstream_in_flight {self.upstream_in_flight}",
+            ]
+        )
+        for name, value in sorted((gauges or {}).items()):
+            lines.extend([f"# TYPE {name} gauge", f"{name} {value}"])
+        return "\n".join(lines) + "\n"
+
+
+class PrometheusExporter:
+    """Publish Prometheus metrics to a file and/or a local HTTP port."""
+
+    def __init__(
+        self,
+        render: Callable[[], str],
+        path: Optional[str] = None,
+        port: Optional[int] = None,
+        host: str = "127.0.0.1",
+        interval: float = 15.0,
+    ) -> None:
+        self.render = render
+        self.path = path
+        self.port = port
+        self.host = host
+        self.interval = interval
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._task: Optional["asyncio.Task[None]"] = None
+
+    @classmethod
+    def from_env(cls, render: Callable[[], str]) -> Optional["PrometheusExporter"]:
+        """Create an exporter from ``PERPLEXICA_METRICS_*`` variables, or ``None`` when unset."""
+        path = os.getenv("PERPLEXICA_METRICS_FILE") or None
+        port = os.getenv("PERPLEXICA_METRICS_PORT")
+        if not path and not port:
+            return None
+        return cls(
+            render,
+            path=path,
+            port=int(port) if port else None,
+            host=os.getenv("PERPLEXICA_METRICS_HOST", "127.0.0.1"),
+            interval=float(os.getenv("PERPLEXICA_METRICS_INTERVAL", "15")),
+        )
+
+    async def start(self) -> None:
+        if self.port is not None:
+            self._server = await asyncio.start_server(self._serve, self.host, self.port)
+        if self.path is not None:
+            self._task = asyncio.get_running_loop().create_task(self._write_loop())
+
+    def write(self) -> None:
+        """Atomically replace the metrics file with the current values."""
+        assert self.path is not None
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(self.render())
+        os.replace(tmp_path, self.path)
+
+    async def _write_loop(self) -> None:
+        while True:
+            self.write()
+            await asyncio.sleep(self.interval)
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request_line = await reader.readline()
+            while (await reader.readline()).strip():
+                pass
+            parts = request_line.decode("latin-1").split()
+            if len(parts) >= 2 and parts[1].split("?")[0] in ("/", "/metrics"):
+                status, body = "200 OK", self.render().encode("utf-8")
+            else:
+                status, body = "404 Not Found", b"not found\n"
+            writer.write(
+                f"HTTP/1.1 {status}\r\nContent-Type: text/plain; version=0.0.4\r\n"
+                f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode("latin-1") + body
+            )
+            await writer.drain()
+        finally:
+            writer.close()
+
+    async def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
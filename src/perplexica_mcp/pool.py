@@ -0,0 +1,141 @@
+"""HTTP connection pool, protocol and compression settings for calls to Perplexica."""
+
+import gzip
+import importlib.util
+import json
+import os
+import weakref
+from typing import Any, Dict, Optional
+
+import httpx
+
+HAS_HTTP2 = importlib.util.find_spec("h2") is not None
+
+
+class HttpPool:
+    """How a ``PerplexicaClient`` connects to Perplexica, and how well its connections are reused.
+
+    ``max_connections``, ``max_keepalive`` and ``keepalive_expiry`` size the
+    connection pool. ``http2`` multiplexes requests over one connection (this
+    needs the ``h2`` package). ``accept_encoding`` overrides the encodings
+    accepted on responses; httpx already accepts gzip and deflate, plus
+    brotli and zstd when their packages are installed. Request bodies of at
+    least ``compress_min_bytes`` are sent gzip-compressed (``0`` disables
+    this, as Perplexica must be behind a proxy that accepts them).
+    ``warm_connections`` connections are opened at startup so the first
+    searches skip connection setup.
+
+    Responses are counted by whether they arrived on a new or a reused
+    connection, and non-streamed bodies by their size on the wire and after
+    decoding.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_keepalive: int = 20,
+        keepalive_expiry: float = 5.0,
+        http2: bool = False,
+        accept_encoding: Optional[str] = None,
+        compress_min_bytes: int = 0,
+        warm_connections: int = 0,
+    ) -> None:
+        if http2 and not HAS_HTTP2:
+            raise ValueError("HTTP/2 requires the h2 package: pip install perplexica-mcp[http2]")
+        self.max_connections = max_connections
+        self.max_keepalive = max_keepalive
+        self.keepalive_expiry = keepalive_expiry
+        self.http2 = http2
+        self.accept_encoding = accept_encoding
+        self.compress_min_bytes = compress_min_bytes
+        self.warm_connections = warm_connections
+        self._connections: "weakref.WeakSet[Any]" = weakref.WeakSet()
+
+        self.responses = 0
+        self.new_connections = 0
+        self.http2_responses = 0
+        self.warmed = 0
+        self.compressed_requests = 0
+        self.bytes_received = 0
+        self.bytes_decoded = 0
+
+    @classmethod
+    def from_env(cls) -> "HttpPool":
+        """Create settings from ``PERPLEXICA_POOL_*``, ``PERPLEXICA_HTTP2`` and compression variables."""
+        return cls(
+            max_connections=int(os.getenv("PERPLEXICA_POOL_MAX_CONNECTIONS", "100")),
+            max_keepalive=int(os.getenv("PERPLEXICA_POOL_MAX_KEEPALIVE", "20")),
+            keepalive_expiry=float(os.getenv("PERPLEXICA_POOL_KEEPALIVE_EXPIRY", "5")),
+            http2=os.getenv("PERPLEXICA_HTTP2", "false").lower() in ("1", "true", "yes"),
+            accept_encoding=os.getenv("PERPLEXICA_ACCEPT_ENCODING") or None,
+            compress_min_bytes=int(os.getenv("PERPLEXICA_COMPRESS_REQUESTS_MIN_BYTES", "0")),
+            warm_connections=int(os.getenv("PERPLEXICA_WARM_CONNECTIONS", "0")),
+        )
+
+    def transport_options(self) -> Dict[str, Any]:
+        """Return ``httpx.AsyncHTTPTransport`` keyword arguments for these settings."""
+        return {
+            "limits": httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_keepalive,
+                keepalive_expiry=self.keepalive_expiry,
+            ),
+            "http2": self.http2,
+        }
+
+    def client_options(self) -> Dict[str, Any]:
+        """Return ``httpx.AsyncClient`` keyword arguments for these settings."""
+        options = self.transport_options()
+        if self.accept_encoding:
+            options["headers"] = {"Accept-Encoding": self.accept_encoding}
+        return options
+
+    def request_body(self, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Return the ``json`` or gzip-compressed ``content`` and ``headers`` arguments for a JSON request."""
+        if self.compress_min_bytes <= 0:
+            return {"json": payload, "headers": {"Content-Type": "application/json"}}
+        body = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        if len(body) < self.compress_min_bytes:
+            return {"content": body, "headers": {"Content-Type": "application/json"}}
+        self.compressed_requests += 1
+        return {
+            "content": gzip.compress(body, compresslevel=5),
+            "headers": {"Content-Type": "application/json", "Content-Encoding": "gzip"},
+        }
+
+    def observe(self, response: httpx.Response) -> None:
+        """Count a response by the connection it arrived on."""
+        self.responses += 1
+        if response.http_version == "HTTP/2":
+            self.http2_responses += 1
+        stream = response.extensions.get("network_stream")
+        if stream is None:
+            return
+        if stream not in self._connections:
+            self._connections.add(stream)
+            self.new_connections += 1
+
+    def observe_body(self, response: httpx.Response) -> None:
+        """Count the wire and decoded size of a fully read response body."""
+        self.bytes_received += response.num_bytes_downloaded
+        self.bytes_decoded += len(response.content)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return settings and connection reuse counters."""
+        reused = max(self.responses - self.new_connections, 0)
+        return {
+            "maxConnections": self.max_connections,
+            "maxKeepalive": self.max_keepalive,
+            "keepaliveExpiry": self.keepalive_expiry,
+            "http2": self.http2,
+            "responses": self.responses,
+            "newConnections": self.new_connections,
+            "reusedResponses": reused,
+            "reuseRate": reused / self.responses if self.responses else None,
+            "http2Responses": self.http2_responses,
+            "openConnections": len(self._connections),
+            "warmed": self.warmed,
+            "compressedRequests": self.compressed_requests,
+            "bytesReceived": self.bytes_received,
+            "bytesDecoded": self.bytes_decoded,
+        }
@@ -0,0 +1,202 @@
+"""Bounded store of search results served as MCP resources."""
+
+import json
+import os
+import sys
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from .sources import SourceStore
+
+URI_SCHEME = "perplexica"
+DEFAULT_PAGE_SIZE = 20
+
+RESOURCE_TEMPLATES = (
+    {
+        "name": "answer",
+        "uriTemplate": "perplexica://results/{resultId}/answer{?offset,length}",
+        "mimeType": "text/markdown",
+        "description": "Answer of a search, or characters offset to offset + length of it",
+    },
+    {
+        "name": "sources",
+        "uriTemplate": "perplexica://results/{resultId}/sources{?page,pageSize}",
+        "mimeType": "application/json",
+        "description": "One page of the source list of a search (default: 20 sources per page)",
+    },
+    {
+        "name": "source",
+        "uriTemplate": "perplexica://results/{resultId}/sources/{number}{?offset,length}",
+        "mimeType": "text/plain",
+        "description": "Full text of the numbered source of a search, or characters offset to offset + length of it",
+    },
+)
+
+
+def result_uri(result_id: str, *path: Any) -> str:
+    """Return the resource URI of a stored result or one of its parts."""
+    return "/".join([f"{URI_SCHEME}://results/{result_id}", *map(str, path)])
+
+
+def _int_param(params: Dict[str, List[str]], name: str, default: Optional[int], minimum: int) -> Optional[int]:
+    values = params.get(name)
+    if not values:
+        return default
+    try:
+        value = int(values[-1])
+    except ValueError:
+        raise ValueError(f"{name} must be an integer") from None
+    if value < minimum:
+        raise ValueError(f"{name} must be at least {minimum}")
+    return value
+
+
+def _text_range(text: str, params: Dict[str, List[str]]) -> Tuple[str, Dict[str, Any]]:
+    offset = _int_param(params, "offset", 0, 0) or 0
+    length = _int_param(params, "length", None, 1)
+    end = len(text) if length is None else min(offset + length, len(text))
+    start = min(offset, end)
+    return text[start:end], {"offset": start, "end": end, "total": len(text)}
+
+
+class ResultStore:
+    """Bounded store of recent search results, read back in parts as MCP resources.
+
+    Each result keeps its query, focus modes, answer and source list; the
+    full text of the sources stays in the :class:`SourceStore`. Results are
+    listed only to the ``owner`` that stored them, and read by anyone holding
+    their id, which is random and too long to guess. At most
+    ``max_entries`` results and about ``max_bytes`` of answers and source
+    metadata are kept, least recently used first out.
+    """
+
+    def __init__(self, max_entries: int = 256, max_bytes: int = 16 * 2**20) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._bytes = 0
+
+        self.stored = 0
+        self.reads = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @classmethod
+    def from_env(cls) -> Optional["ResultStore"]:
+        """Create a store from ``PERPLEXICA_RESULT_STORE_*`` variables, or ``None`` when disabled."""
+        max_entries = int(os.getenv("PERPLEXICA_RESULT_STORE_SIZE", "256"))
+        max_bytes = int(os.getenv("PERPLEXICA_RESULT_STORE_BYTES", str(16 * 2**20)))
+        if max_entries <= 0 or max_bytes <= 0:
+            return None
+        return cls(max_entries=max_entries, max_bytes=max_bytes)
+
+    def add(
+        self,
+        query: str,
+        focus_modes: Sequence[str],
+        answer: str,
+        sources: Sequence[Dict[str, Any]],
+        owner: str = "",
+    ) -> Optional[str]:
+        """Store a result and return its id, or ``None`` when it is larger than the whole store.
+
+        ``sources`` hold the ``title``, ``url`` and source store ``id`` of each
+        source, plus ``focusModes`` for merged multi-focus results.
+        """
+        size = sys.getsizeof(answer) + sum(sum(sys.getsizeof(value) for value in source.values()) for source in sources)
+        if size > self.max_bytes:
+            return None
+        result_id = uuid.uuid4().hex
+        self._entries[result_id] = {
+            "owner": owner,
+            "query": query,
+            "focusModes": list(focus_modes),
+            "answer": answer,
+            "sources": list(sources),
+            "createdAt": time.time(),
+            "size": size,
+        }
+        self._bytes += size
+        self.stored += 1
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted["size"]
+            self.evictions += 1
+        return result_id
+
+    def get(self, result_id: str) -> Optional[Dict[str, Any]]:
+        """Return a stored result."""
+        entry = self._entries.get(result_id)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(result_id)
+        return entry
+
+    def recent(self, owner: str = "", offset: int = 0, limit: int = 50) -> List[Tuple[str, Dict[str, Any]]]:
+        """Return up to ``limit`` results of ``owner``, most recently used first, skipping the first ``offset``."""
+        ids = [result_id for result_id in reversed(self._entries) if self._entries[result_id]["owner"] == owner]
+        ids = ids[offset : offset + limit]
+        return [(result_id, self._entries[result_id]) for result_id in ids]
+
+    def read(self, uri: str, sources: Optional[SourceStore] = None) -> Tuple[str, str, Dict[str, Any]]:
+        """Return the MIME type, text and range metadata of a result resource.
+
+        Answers and source texts are read whole or in ``offset``/``length``
+        character ranges, and source lists in pages of ``pageSize``.
+        """
+        parts = urlsplit(uri)
+        path = parts.path.strip("/").split("/")
+        if parts.scheme != URI_SCHEME or parts.netloc != "results" or len(path) not in (2, 3):
+            raise ValueError(f"Unknown resource: {uri}")
+        entry = self.get(path[0])
+        if entry is None:
+            raise ValueError(f"Unknown or expired search result: {path[0]}")
+        params = parse_qs(parts.query)
+
+        if path[1:] == ["answer"]:
+            self.reads += 1
+            text, meta = _text_range(entry["answer"], params)
+            return "text/markdown", text, meta
+
+        if path[1:] == ["sources"]:
+            self.reads += 1
+            page = _int_param(params, "page", 1, 1) or 1
+            page_size = _int_param(params, "pageSize", DEFAULT_PAGE_SIZE, 1) or DEFAULT_PAGE_SIZE
+            start = (page - 1) * page_size
+            listed = [
+                dict(source, number=number, uri=result_uri(path[0], "sources", number))
+                for number, source in enumerate(entry["sources"][start : start + page_size], start + 1)
+            ]
+            total = len(entry["sources"])
+            document = {"page": page, "pageSize": page_size, "total": total, "sources": listed}
+            if start + page_size < total:
+                document["nextPage"] = page + 1
+            return "application/json", json.dumps(document, ensure_ascii=False, separators=(",", ":")), {}
+
+        if path[1] == "sources" and path[2].isdigit() and 1 <= int(path[2]) <= len(entry["sources"]):
+            source = entry["sources"][int(path[2]) - 1]
+            stored = sources.get(source["id"]) if sources is not None and source.get("id") else None
+            if stored is None:
+                raise ValueError(f"The full text of source {path[2]} is no longer stored")
+            self.reads += 1
+            text, meta = _text_range(stored["content"], params)
+            return "text/plain", text, meta
+
+        raise ValueError(f"Unknown resource: {uri}")
+
+    def stats(self) -> Dict[str, Any]:
+        """Return counters and current sizes."""
+        return {
+            "stored": self.stored,
+            "reads": self.reads,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "maxEntries": self.max_entries,
+            "maxBytes": self.max_bytes,
+        }
@@ -1,9 +1,15 @@
 """Perplexica MCP Server implementation."""
 
 import asyncio
+import contextlib
 import json
 import os
-from typing import Any, Dict, List, Optional, Sequence, Union, cast
+import re
+import threading
+import time
+import uuid
+import weakref
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Optional, Sequence, Tuple, TypeVar, Union, cast
 
 import httpx
 from mcp.server import Server
@@ -13,12 +19,54 @@ from mcp.server.stdio import stdio_server
 from mcp.types import (
     CallToolRequest,
     CallToolResult,
+    ContentBlock,
+    InitializedNotification,
+    ListResourcesRequest,
+    ListResourcesResult,
+    ListResourceTemplatesRequest,
+    ListResourceTemplatesResult,
     ListToolsRequest,
     ListToolsResult,
+    ProgressToken,
+    ReadResourceRequest,
+    ReadResourceResult,
+    Resource,
+    ResourceLink,
+    ResourceTemplate,
+    ServerResult,
     TextContent,
+    TextResourceContents,
     Tool,
 )
-from pydantic import BaseModel, Field
+from pydantic import AnyUrl, BaseModel, Field
+
+from .admission import PRIORITIES, AdmissionController
+from .backends import BackendPool
+from .breaker import CircuitBreaker, CircuitOpenError
+from .cache import SearchCache, StaleWhileRevalidate, request_key
+from .cassette import Cassette
+from .decoding import loads, response_json
+from .fanout import merge_sources
+from .formatting import (
+    JSON_RESERVE,
+    MIN_MAX_BYTES,
+    OUTPUT_FORMATS,
+    TRUNCATED_NOTE,
+    BudgetedText,
+    OutputBudget,
+    requested_format,
+    snippet,
+)
+from .hedging import Hedger
+from .metrics import UNCOUNTED, Metrics, PrometheusExporter
+from .pool import HttpPool
+from .results import RESOURCE_TEMPLATES, ResultStore, result_uri
+from .sessions import SessionStore
+from .similarity import SimilarQueryCache
+from .singleflight import SingleFlight
+from .sources import SourceStore
+from .timeouts import AdaptiveTimeouts
+from .tracing import Tracer, http_extensions, span
 
 
 class ChatModel(BaseModel):
@@ -61,48 +109,315 @@ class SearchSource(BaseModel):
     metadata: Dict[str, Any]
 
 
+class ApproximateMatch(BaseModel):
+    """The earlier search whose cached answer was reused for a similar query."""
+
+    query: str
+    similarity: float
+
+
 class SearchResponse(BaseModel):
     """Perplexica search response."""
 
     message: str
     sources: List[SearchSource]
+    approximateMatch: Optional[ApproximateMatch] = Field(default=None, exclude=True)
+
+
+ChunkCallback = Callable[[str], Awaitable[None]]
+ProgressNotifier = Callable[[float, Optional[float], Optional[str]], Awaitable[None]]
+
+T = TypeVar("T")
+
+
+def _exception_chain(error: BaseException) -> List[BaseException]:
+    """Return an exception followed by the exceptions it was raised from."""
+    chain: List[BaseException] = []
+    current: Optional[BaseException] = error
+    while current is not None and current not in chain:
+        chain.append(current)
+        current = current.__cause__ or current.__context__
+    return chain
+
+
+class DeadlineExceeded(Exception):
+    """Raised when a tool call runs past its ``deadline`` argument."""
+
+
+def _deadline(arguments: Dict[str, Any]) -> Optional[float]:
+    """Read the optional ``deadline`` argument, in seconds."""
+    value = arguments.get("deadline")
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or value <= 0:
+        raise ValueError("deadline must be a positive number of seconds")
+    return float(value)
+
+
+def _priority(arguments: Dict[str, Any], default: str) -> str:
+    """Read the optional ``priority`` argument."""
+    priority = arguments.get("priority", default)
+    if priority not in PRIORITIES:
+        raise ValueError(f"priority must be one of: {', '.join(PRIORITIES)}")
+    return cast(str, priority)
+
+
+def _approximate_note(result: SearchResponse) -> str:
+    """Mark an answer reused from a search with a similar query."""
+    match = result.approximateMatch
+    if match is None:
+        return ""
+    return (
+        f"**Approximate cache hit:** answer reused from the similar query "
+        f'"{match.query}" (similarity {match.similarity:.2f})\n\n'
+    )
+
+
+async def _with_deadline(awaitable: Awaitable[T], deadline: Optional[float]) -> T:
+    """Await ``awaitable``, cancelling it once ``deadline`` seconds have passed."""
+    if deadline is None:
+        return await awaitable
+    try:
+        return await asyncio.wait_for(awaitable, deadline)
+    except asyncio.TimeoutError:
+        raise DeadlineExceeded(f"Deadline of {deadline:g}s exceeded") from None
+
+
+async def _gather_within(
+    awaitables: Sequence[Awaitable[T]], deadline: Optional[float]
+) -> List[Union[T, BaseException]]:
+    """Run ``awaitables`` concurrently and return their results or exceptions, in order.
+
+    Those still unfinished after ``deadline`` seconds are cancelled and get a
+    :class:`DeadlineExceeded` error, while finished results are kept.
+    """
+    tasks = [asyncio.ensure_future(awaitable) for awaitable in awaitables]
+    try:
+        _, pending = await asyncio.wait(tasks, timeout=deadline)
+    finally:
+        for task in tasks:
+            task.cancel()
+    # Let the cancelled calls abort their upstream requests before answering.
+    await asyncio.gather(*pending, return_exceptions=True)
+    return [
+        (
+            DeadlineExceeded(f"Deadline of {deadline:g}s exceeded")
+            if task in pending
+            else task.exception() or task.result()
+        )
+        for task in tasks
+    ]
 
 
 class PerplexicaClient:
     """Client for interacting with Perplexica API."""
 
-    def __init__(self, base_url: str = "http://localhost:3000") -> None:
+    def __init__(
+        self,
+        base_url: str = "http://localhost:3000",
+        metrics: Optional[Metrics] = None,
+        hedger: Optional[Hedger] = None,
+        cassette: Optional[Cassette] = None,
+    ) -> None:
         self.base_url = base_url.rstrip("/")
-        self.client = httpx.AsyncClient(timeout=60.0)
+        self.metrics = metrics
+        self.hedger = hedger
+        self.timeouts = AdaptiveTimeouts.from_env()
+        self.http = HttpPool.from_env()
+        self.cassette = cassette
+        self._client: Optional[httpx.AsyncClient] = None
+        self._client_lock = threading.Lock()
+        self.breaker = CircuitBreaker.from_env()
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """The HTTP client, created on first use.
+
+        Creating it loads the TLS trust store, which is the slowest part of
+        server startup, so it is left until the first request or
+        :meth:`prepare`.
+        """
+        with self._client_lock:
+            if self._client is None:
+                options = self.http.client_options()
+                if self.cassette is not None:
+                    inner = httpx.AsyncHTTPTransport(**self.http.transport_options())
+                    options["transport"] = self.cassette.transport(inner)
+                self._client = httpx.AsyncClient(
+                    timeout=self.timeouts.client_timeout, event_hooks={"response": [self._on_response]}, **options
+                )
+            return self._client
+
+    @client.setter
+    def client(self, client: httpx.AsyncClient) -> None:
+        self._client = client
 
     async def search(self, request: SearchRequest) -> SearchResponse:
-        """Perform a search using Perplexica."""
+        """Perform a search using Perplexica.
+
+        With a ``hedger``, a slow search is raced against a duplicate request
+        on a second connection.
+        """
+        if request.stream:
+            return await self.search_stream(request)
+        if self.hedger is not None:
+            return await self.hedger.run(request.focusMode, lambda: self._search_once(request))
+        return await self._search_once(request)
+
+    async def _search_once(self, request: SearchRequest) -> SearchResponse:
+        return await self._call("/api/search", lambda: self._search(request))
+
+    async def search_stream(self, request: SearchRequest, on_chunk: Optional[ChunkCallback] = None) -> SearchResponse:
+        """Perform a streamed search, passing answer chunks to ``on_chunk`` as they arrive."""
+        return await self._call("/api/search", lambda: self._search_stream(request, on_chunk))
+
+    async def get_models(self) -> Dict[str, Any]:
+        """Get available models from Perplexica."""
+        return await self._call("/api/models", self._get_models)
+
+    async def _call(self, endpoint: str, fn: Callable[[], Awaitable[T]]) -> T:
+        """Run an upstream call through the circuit breaker, recording metrics."""
+        if self.metrics is None:
+            return await self.breaker.call(fn)
+
+        self.metrics.upstream_in_flight += 1
+        start = time.monotonic()
+        try:
+            return await self.breaker.call(fn)
+        except asyncio.CancelledError:
+            # The caller went away; the HTTP request has been abandoned mid-flight.
+            self.metrics.upstream_status(endpoint, "cancelled")
+            raise
+        except CircuitOpenError:
+            self.metrics.upstream_status(endpoint, "circuit_open")
+            raise
+        except Exception as e:
+            if not any(isinstance(error, httpx.HTTPStatusError) for error in _exception_chain(e)):
+                self.metrics.upstream_status(endpoint, "error")
+            raise
+        finally:
+            self.metrics.upstream_in_flight -= 1
+            self.metrics.upstream_finished(endpoint, time.monotonic() - start)
+
+    async def prepare(self) -> None:
+        """Create the HTTP client in a worker thread, leaving the event loop free meanwhile."""
+        if self._client is None:
+            await asyncio.to_thread(lambda: self.client)
+
+    async def warm(self) -> None:
+        """Open ``PERPLEXICA_WARM_CONNECTIONS`` pooled connections ahead of the first searches.
+
+        Each connection is opened by an ``OPTIONS`` request to the search
+        endpoint, which Perplexica answers without running a search.
+        """
+        if self.http.warm_connections <= 0:
+            return
+        # One HTTP/2 connection carries every request.
+        count = 1 if self.http.http2 else self.http.warm_connections
         url = f"{self.base_url}/api/search"
+        results = await asyncio.gather(
+            *(
+                self.client.options(url, timeout=self.timeouts.connect, extensions={UNCOUNTED: True})
+                for _ in range(count)
+            ),
+            return_exceptions=True,
+        )
+        self.http.warmed += sum(1 for result in results if isinstance(result, httpx.Response))
+
+    async def _on_response(self, response: httpx.Response) -> None:
+        self.http.observe(response)
+        # Health probes and warm-up requests are not search or models traffic.
+        if self.metrics is not None and not response.request.extensions.get(UNCOUNTED):
+            self.metrics.upstream_status(response.request.url.path, str(response.status_code))
+
+    async def _search(self, request: SearchRequest) -> SearchResponse:
+        url = f"{self.base_url}/api/search"
+        start = time.monotonic()
 
         try:
-            response = await self.client.post(
-                url,
-                json=request.model_dump(exclude_none=True),
-                headers={"Content-Type": "application/json"},
-            )
+            with span("upstream", endpoint="/api/search", baseUrl=self.base_url):
+                response = await self.client.post(
+                    url,
+                    **self.http.request_body(request.model_dump(exclude_none=True)),
+                    timeout=self.timeouts.for_search(request.focusMode, request.optimizationMode, stream=False),
+                    extensions=http_extensions(),
+                )
             response.raise_for_status()
+            self.http.observe_body(response)
 
-            data = response.json()
-            return SearchResponse(**data)
+            with span("parse", bytes=len(response.content)):
+                data = response_json(response)
+            self.timeouts.observe(request.focusMode, request.optimizationMode, time.monotonic() - start)
+            with span("model"):
+                return SearchResponse.model_validate(data)
 
         except httpx.HTTPError as e:
+            self.timeouts.record_error(e, stream=False)
             raise Exception(f"HTTP error occurred: {e}")
         except json.JSONDecodeError as e:
             raise Exception(f"Failed to decode JSON response: {e}")
         except Exception as e:
             raise Exception(f"Search failed: {e}")
 
-    async def get_models(self) -> Dict[str, Any]:
-        """Get available models from Perplexica."""
+    async def _search_stream(self, request: SearchRequest, on_chunk: Optional[ChunkCallback]) -> SearchResponse:
+        """Read Perplexica's streamed search response.
+
+        Perplexica streams newline-delimited JSON events: ``sources`` carries the
+        source list, each ``response`` event carries a piece of the answer and
+        ``done`` marks the end of the stream.
+        """
+        url = f"{self.base_url}/api/search"
+        payload = request.model_dump(exclude_none=True)
+        payload["stream"] = True
+        start = time.monotonic()
+
+        try:
+            message_parts: List[str] = []
+            sources: List[Dict[str, Any]] = []
+            with span("upstream", endpoint="/api/search", baseUrl=self.base_url, stream=True):
+                async with self.client.stream(
+                    "POST",
+                    url,
+                    **self.http.request_body(payload),
+                    timeout=self.timeouts.for_search(request.focusMode, request.optimizationMode, stream=True),
+                    extensions=http_extensions(),
+                ) as response:
+                    response.raise_for_status()
+                    async for line in response.aiter_lines():
+                        if not line.strip():
+                            continue
+                        event = loads(line)
+                        event_type = event.get("type")
+                        if event_type == "sources":
+                            sources = event.get("data") or []
+                        elif event_type == "response":
+                            chunk = event.get("data") or ""
+                            message_parts.append(chunk)
+                            if on_chunk is not None and chunk:
+                                await on_chunk(chunk)
+                        elif event_type == "error":
+                            raise Exception(event.get("data") or "Perplexica reported a streaming error")
+                        elif event_type == "done":
+                            break
+
+            self.timeouts.observe(request.focusMode, request.optimizationMode, time.monotonic() - start)
+            with span("model"):
+                return SearchResponse.model_validate({"message": "".join(message_parts), "sources": sources})
+
+        except httpx.HTTPError as e:
+            self.timeouts.record_error(e, stream=True)
+            raise Exception(f"HTTP error occurred: {e}")
+        except json.JSONDecodeError as e:
+            raise Exception(f"Failed to decode JSON response: {e}")
+        except Exception as e:
+            raise Exception(f"Search failed: {e}")
+
+    async def _get_models(self) -> Dict[str, Any]:
         url = f"{self.base_url}/api/models"
 
         try:
-            response = await self.client.get(url)
+            with span("upstream", endpoint="/api/models", baseUrl=self.base_url):
+                response = await self.client.get(url)
             response.raise_for_status()
             data = response.json()
             return cast(Dict[str, Any], data)
@@ -116,7 +431,275 @@ class PerplexicaClient:
 
     async def close(self) -> None:
         """Close the HTTP client."""
-        await self.client.aclose()
+        if self._client is not None:
+            await self._client.aclose()
+
+
+FOCUS_MODES = (
+    "webSearch",
+    "academicSearch",
+    "writingAssistant",
+    "wolframAlphaSearch",
+    "youtubeSearch",
+    "redditSearch",
+)
+OPTIMIZATION_MODES = ("speed", "balanced")
+DEFAULT_MULTI_FOCUS_MODES = ("webSearch", "academicSearch", "redditSearch")
+TOOL_NAMES = (
+    "perplexica_search",
+    "perplexica_batch_search",
+    "perplexica_multi_search",
+    "perplexica_get_source",
+    "perplexica_get_models",
+    "perplexica_stats",
+)
+
+
+def _known(value: Any, allowed: Sequence[str]) -> str:
+    """Map a label value outside ``allowed`` to ``other`` to keep metric cardinality bounded."""
+    return value if value in allowed else "other"
+
+
+def _snake_case(name: str) -> str:
+    return re.sub(r"(?<!^)(?=[A-Z])", "_", name).lower()
+
+
+def _result_size(result: CallToolResult) -> int:
+    return sum(len(content.text.encode("utf-8")) for content in result.content if isinstance(content, TextContent))
+
+
+SEARCH_INPUT_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "query": {
+            "type": "string",
+            "description": "The search query",
+        },
+        "focusMode": {
+            "type": "string",
+            "enum": list(FOCUS_MODES),
+            "description": "The focus mode for the search",
+            "default": "webSearch",
+        },
+        "optimizationMode": {
+            "type": "string",
+            "enum": list(OPTIMIZATION_MODES),
+            "description": "Optimization mode for the search",
+            "default": "balanced",
+        },
+        "chatModel": {
+            "type": "object",
+            "properties": {
+                "provider": {"type": "string"},
+                "name": {"type": "string"},
+                "customOpenAIBaseURL": {"type": "string"},
+                "customOpenAIKey": {"type": "string"},
+            },
+            "required": ["provider", "name"],
+            "description": "Chat model configuration",
+        },
+        "embeddingModel": {
+            "type": "object",
+            "properties": {
+                "provider": {"type": "string"},
+                "name": {"type": "string"},
+            },
+            "required": ["provider", "name"],
+            "description": "Embedding model configuration",
+        },
+        "history": {
+            "type": "array",
+            "items": {
+                "type": "array",
+                "items": {"type": "string"},
+                "minItems": 2,
+                "maxItems": 2,
+            },
+            "description": "Conversation history as [role, message] pairs",
+        },
+        "sessionId": {
+            "type": "string",
+            "description": (
+                "Conversation session: the server keeps the history of searches with the same id and sends it to "
+                "Perplexica, so only new history messages need to be passed"
+            ),
+        },
+        "systemInstructions": {
+            "type": "string",
+            "description": "Custom system instructions to guide the AI's response",
+        },
+        "stream": {
+            "type": "boolean",
+            "description": "Stream answer chunks as progress notifications while the answer is generated",
+            "default": False,
+        },
+        "bypassCache": {
+            "type": "boolean",
+            "description": "Skip the response cache and fetch a fresh answer",
+            "default": False,
+        },
+        "deadline": {
+            "type": "number",
+            "exclusiveMinimum": 0,
+            "description": "Give up and cancel the upstream request after this many seconds",
+        },
+        "priority": {
+            "type": "string",
+            "enum": list(PRIORITIES),
+            "description": "Queueing priority when the server is busy (default: interactive, batch for batch searches)",
+        },
+        "format": {
+            "type": "string",
+            "enum": list(OUTPUT_FORMATS),
+            "description": (
+                "markdown for reading, compact JSON with the answer and sources (title, url, snippet, source id) "
+                "for programmatic use, or links: a short summary with links to the answer and sources as resources "
+                "to read when needed"
+            ),
+            "default": "markdown",
+        },
+        "maxBytes": {
+            "type": "integer",
+            "minimum": MIN_MAX_BYTES,
+            "description": "Cut the result short at this many UTF-8 bytes",
+        },
+        "maxSources": {
+            "type": "integer",
+            "minimum": 0,
+            "description": "List at most this many sources",
+        },
+        "snippetLength": {
+            "type": "integer",
+            "minimum": 0,
+            "description": "Characters of each source's text to include (default: 200)",
+        },
+    },
+    "required": ["query"],
+}
+
+BATCH_SEARCH_INPUT_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "searches": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": SEARCH_INPUT_SCHEMA["properties"],
+                "required": ["query"],
+            },
+            "minItems": 1,
+            "description": "Searches to run, each taking the same arguments as perplexica_search",
+        },
+        "maxConcurrency": {
+            "type": "integer",
+            "minimum": 1,
+            "description": "Maximum number of searches sent to Perplexica at once",
+        },
+        "deadline": {
+            "type": "number",
+            "exclusiveMinimum": 0,
+            "description": "Give up on unfinished searches after this many seconds",
+        },
+    },
+    "required": ["searches"],
+}
+
+MULTI_SEARCH_INPUT_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        **{
+            key: value
+            for key, value in SEARCH_INPUT_SCHEMA["properties"].items()
+            if key not in ("focusMode", "stream", "sessionId")
+        },
+        "focusModes": {
+            "type": "array",
+            "items": {"type": "string", "enum": list(FOCUS_MODES)},
+            "minItems": 1,
+            "uniqueItems": True,
+            "description": "Focus modes to search at the same time",
+            "default": list(DEFAULT_MULTI_FOCUS_MODES),
+        },
+    },
+    "required": ["query"],
+}
+
+GET_SOURCE_INPUT_SCHEMA: Dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "id": {
+            "type": "string",
+            "description": "Source id shown next to a source in a search result",
+        },
+        "offset": {
+            "type": "integer",
+            "minimum": 0,
+            "description": "Character offset to start from",
+            "default": 0,
+        },
+        "length": {
+            "type": "integer",
+            "minimum": 1,
+            "description": "Maximum number of characters to return (default: the rest of the document)",
+        },
+    },
+    "required": ["id"],
+    "additionalProperties": False,
+}
+
+# Tool definitions never change, so they are built once rather than on every tools/list request.
+TOOLS: List[Tool] = [
+    Tool(
+        name="perplexica_search",
+        description="Perform AI-powered search using Perplexica with various focus modes",
+        inputSchema=SEARCH_INPUT_SCHEMA,
+    ),
+    Tool(
+        name="perplexica_batch_search",
+        description="Run several Perplexica searches concurrently and return all results at once",
+        inputSchema=BATCH_SEARCH_INPUT_SCHEMA,
+    ),
+    Tool(
+        name="perplexica_multi_search",
+        description="Search one query in several focus modes at once and merge the answers and deduplicated sources",
+        inputSchema=MULTI_SEARCH_INPUT_SCHEMA,
+    ),
+    Tool(
+        name="perplexica_get_source",
+        description="Get the full text of a source from an earlier search result, without searching again",
+        inputSchema=GET_SOURCE_INPUT_SCHEMA,
+    ),
+    Tool(
+        name="perplexica_get_models",
+        description="Get available chat and embedding models from Perplexica",
+        inputSchema={
+            "type": "object",
+            "properties": {},
+            "additionalProperties": False,
+        },
+    ),
+    Tool(
+        name="perplexica_stats",
+        description="Get latency, throughput, cache and upstream health statistics for this server",
+        inputSchema={
+            "type": "object",
+            "properties": {
+                "format": {
+                    "type": "string",
+                    "enum": ["json", "prometheus"],
+                    "description": "Output format",
+                    "default": "json",
+                },
+            },
+            "additionalProperties": False,
+        },
+    ),
+]
+LIST_TOOLS_RESULT = ListToolsResult(tools=TOOLS)
+RESOURCE_TEMPLATE_LIST = [ResourceTemplate.model_validate(template) for template in RESOURCE_TEMPLATES]
+RESOURCES_PAGE_SIZE = 50
+# Characters of the answer shown in a "links" result.
+LINKS_SUMMARY_LENGTH = 300
 
 
 class PerplexicaServer:
@@ -124,118 +707,357 @@ class PerplexicaServer:
 
     def __init__(self) -> None:
         self.server = Server("perplexica")
-        base_url = os.getenv("PERPLEXICA_BASE_URL", "http://localhost:3000")
-        self.client = PerplexicaClient(base_url)
+        self.metrics = Metrics()
+        base_urls = [url.strip() for url in os.getenv("PERPLEXICA_BASE_URLS", "").split(",") if url.strip()]
+        self.cassette = Cassette.from_env()
+        self.client: Union[PerplexicaClient, BackendPool]
+        if len(base_urls) > 1:
+            self.client = BackendPool.from_env(
+                [PerplexicaClient(url, self.metrics, cassette=self.cassette) for url in base_urls]
+            )
+        else:
+            base_url = base_urls[0] if base_urls else os.getenv("PERPLEXICA_BASE_URL", "http://localhost:3000")
+            self.client = PerplexicaClient(base_url, self.metrics, hedger=Hedger.from_env(), cassette=self.cassette)
+        self.cache = SearchCache.from_env()
+        self.similar = SimilarQueryCache.from_env()
+        self.inflight: SingleFlight[SearchResponse] = SingleFlight()
+        self.admission = AdmissionController.from_env()
+        self.sources = SourceStore.from_env()
+        self.results = ResultStore.from_env()
+        self.sessions = SessionStore.from_env()
+        self.batch_concurrency = int(os.getenv("PERPLEXICA_BATCH_CONCURRENCY", "4"))
+        self.output_format = requested_format({"format": os.getenv("PERPLEXICA_OUTPUT_FORMAT", "markdown")})
+        self.output_budget = OutputBudget.from_env()
+        self.models = StaleWhileRevalidate(
+            self._load_models, max_age=float(os.getenv("PERPLEXICA_MODELS_REFRESH_INTERVAL", "300"))
+        )
+        self.exporter = PrometheusExporter.from_env(self.render_prometheus)
+        self.tracer = Tracer.from_env()
+        self._warming: Optional["asyncio.Task[None]"] = None
+        self._client_ids: "weakref.WeakKeyDictionary[Any, str]" = weakref.WeakKeyDictionary()
+
+        # Route MCP requests to the instance methods below.
+        self.server.request_handlers[ListToolsRequest] = self._serve_list_tools
+        self.server.request_handlers[CallToolRequest] = self._serve_call_tool
+        self.server.notification_handlers[InitializedNotification] = self._serve_initialized
+        if self.results is not None:
+            self.server.request_handlers[ListResourcesRequest] = self._serve_list_resources
+            self.server.request_handlers[ListResourceTemplatesRequest] = self._serve_list_resource_templates
+            self.server.request_handlers[ReadResourceRequest] = self._serve_read_resource
+
+    async def _serve_list_tools(self, request: ListToolsRequest) -> ServerResult:
+        return ServerResult(await self.list_tools(request))
+
+    async def _serve_call_tool(self, request: CallToolRequest) -> ServerResult:
+        return ServerResult(await self.call_tool(request))
+
+    async def _serve_initialized(self, notification: InitializedNotification) -> None:
+        self.warm_up()
+
+    async def _serve_list_resources(self, request: ListResourcesRequest) -> ServerResult:
+        return ServerResult(await self.list_resources(request))
+
+    async def _serve_list_resource_templates(self, request: ListResourceTemplatesRequest) -> ServerResult:
+        return ServerResult(await self.list_resource_templates(request))
 
-        # Handlers are available as instance methods; the low-level Server
-        # can be decorated to register them if needed.
+    async def _serve_read_resource(self, request: ReadResourceRequest) -> ServerResult:
+        return ServerResult(await self.read_resource(request))
 
     async def list_tools(self, request: Optional[ListToolsRequest] = None) -> ListToolsResult:
         """List available tools."""
-        return ListToolsResult(
-            tools=[
-                Tool(
-                    name="perplexica_search",
-                    description="Perform AI-powered search using Perplexica with various focus modes",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {
-                            "query": {
-                                "type": "string",
-                                "description": "The search query",
-                            },
-                            "focusMode": {
-                                "type": "string",
-                                "enum": [
-                                    "webSearch",
-                                    "academicSearch",
-                                    "writingAssistant",
-                                    "wolframAlphaSearch",
-                                    "youtubeSearch",
-                                    "redditSearch",
-                                ],
-                                "description": "The focus mode for the search",
-                                "default": "webSearch",
-                            },
-                            "optimizationMode": {
-                                "type": "string",
-                                "enum": ["speed", "balanced"],
-                                "description": "Optimization mode for the search",
-                                "default": "balanced",
-                            },
-                            "chatModel": {
-                                "type": "object",
-                                "properties": {
-                                    "provider": {"type": "string"},
-                                    "name": {"type": "string"},
-                                    "customOpenAIBaseURL": {"type": "string"},
-                                    "customOpenAIKey": {"type": "string"},
-                                },
-                                "required": ["provider", "name"],
-                                "description": "Chat model configuration",
-                            },
-                            "embeddingModel": {
-                                "type": "object",
-                                "properties": {
-                                    "provider": {"type": "string"},
-                                    "name": {"type": "string"},
-                                },
-                                "required": ["provider", "name"],
-                                "description": "Embedding model configuration",
-                            },
-                            "history": {
-                                "type": "array",
-                                "items": {
-                                    "type": "array",
-                                    "items": {"type": "string"},
-                                    "minItems": 2,
-                                    "maxItems": 2,
-                                },
-                                "description": "Conversation history as [role, message] pairs",
-                            },
-                            "systemInstructions": {
-                                "type": "string",
-                                "description": "Custom system instructions to guide the AI's response",
-                            },
-                            "stream": {
-                                "type": "boolean",
-                                "description": "Enable streaming responses",
-                                "default": False,
-                            },
-                        },
-                        "required": ["query"],
-                    },
-                ),
-                Tool(
-                    name="perplexica_get_models",
-                    description="Get available chat and embedding models from Perplexica",
-                    inputSchema={
-                        "type": "object",
-                        "properties": {},
-                        "additionalProperties": False,
-                    },
-                ),
-            ]
+        return LIST_TOOLS_RESULT
+
+    async def list_resources(self, request: Optional[ListResourcesRequest] = None) -> ListResourcesResult:
+        """List the answer and source list of this client's recent search results, most recently used first."""
+        assert self.results is not None
+        cursor = request.params.cursor if request is not None and request.params is not None else None
+        offset = int(cursor) if cursor and cursor.isdigit() else 0
+        recent = self.results.recent(self._client_id(), offset, RESOURCES_PAGE_SIZE + 1)
+        resources: List[Resource] = []
+        for result_id, entry in recent[:RESOURCES_PAGE_SIZE]:
+            modes = ", ".join(entry["focusModes"])
+            resources.append(
+                Resource(
+                    uri=AnyUrl(result_uri(result_id, "answer")),
+                    name=f"{result_id}/answer",
+                    title=entry["query"],
+                    description=f"Answer ({modes})",
+                    mimeType="text/markdown",
+                    size=len(entry["answer"].encode("utf-8")),
+                )
+            )
+            resources.append(
+                Resource(
+                    uri=AnyUrl(result_uri(result_id, "sources")),
+                    name=f"{result_id}/sources",
+                    title=entry["query"],
+                    description=f"{len(entry['sources'])} sources ({modes})",
+                    mimeType="application/json",
+                )
+            )
+        next_cursor = str(offset + RESOURCES_PAGE_SIZE) if len(recent) > RESOURCES_PAGE_SIZE else None
+        return ListResourcesResult(resources=resources, nextCursor=next_cursor)
+
+    async def list_resource_templates(
+        self, request: Optional[ListResourceTemplatesRequest] = None
+    ) -> ListResourceTemplatesResult:
+        """List the URI templates of search result resources."""
+        return ListResourceTemplatesResult(resourceTemplates=RESOURCE_TEMPLATE_LIST)
+
+    async def read_resource(self, request: ReadResourceRequest) -> ReadResourceResult:
+        """Read the answer, a page of the source list, or the text of one source of a search result."""
+        assert self.results is not None
+        mime_type, text, meta = self.results.read(str(request.params.uri), self.sources)
+        return ReadResourceResult(
+            contents=[TextResourceContents(uri=request.params.uri, mimeType=mime_type, text=text, _meta=meta or None)]
         )
 
     async def call_tool(self, request: CallToolRequest) -> CallToolResult:
-        """Handle tool calls."""
+        """Handle tool calls, recording latency and result size.
+
+        A call cancelled by the client, or running past its ``deadline``
+        argument, cancels its upstream request; both are counted with their own
+        outcome.
+        """
+        arguments = request.params.arguments or {}
+        tool = request.params.name if request.params.name in TOOL_NAMES else "unknown"
+        focus_mode = optimization_mode = None
+        if tool == "perplexica_search":
+            focus_mode = _known(arguments.get("focusMode", "webSearch"), FOCUS_MODES)
+            optimization_mode = _known(arguments.get("optimizationMode", "balanced"), OPTIMIZATION_MODES)
+
+        self.metrics.tool_started(tool)
+        start = time.monotonic()
+        outcome = "cancelled"
+        result: Optional[CallToolResult] = None
+        trace = self.tracer.trace("tools/call", tool=tool) if self.tracer is not None else contextlib.nullcontext()
+        with trace as root:
+            try:
+                result = await self._call_tool(request)
+                outcome = "error" if result.isError else "ok"
+                return result
+            except DeadlineExceeded as e:
+                outcome = "deadline_exceeded"
+                result = CallToolResult(content=[TextContent(type="text", text=f"Error: {str(e)}")], isError=True)
+                return result
+            finally:
+                response_bytes = _result_size(result) if result is not None else 0
+                if root is not None:
+                    root.set(outcome=outcome, responseBytes=response_bytes)
+                self.metrics.tool_finished(
+                    tool,
+                    time.monotonic() - start,
+                    outcome,
+                    response_bytes=response_bytes,
+                    focus_mode=focus_mode,
+                    optimization_mode=optimization_mode,
+                )
+
+    async def _call_tool(self, request: CallToolRequest) -> CallToolResult:
+        """Dispatch a tool call, turning errors into error results."""
         try:
+            arguments = request.params.arguments or {}
             if request.params.name == "perplexica_search":
-                return await self._handle_search(request.params.arguments or {})
+                progress_token = request.params.meta.progressToken if request.params.meta else None
+                deadline = _deadline(arguments)
+                return await _with_deadline(self._handle_search(arguments, progress_token), deadline)
+            elif request.params.name == "perplexica_batch_search":
+                return await self._handle_batch_search(arguments)
+            elif request.params.name == "perplexica_multi_search":
+                progress_token = request.params.meta.progressToken if request.params.meta else None
+                return await self._handle_multi_search(arguments, progress_token)
+            elif request.params.name == "perplexica_get_source":
+                return self._handle_get_source(arguments)
             elif request.params.name == "perplexica_get_models":
                 return await self._handle_get_models()
+            elif request.params.name == "perplexica_stats":
+                return self._handle_stats(request.params.arguments or {})
             else:
                 raise ValueError(f"Unknown tool: {request.params.name}")
 
+        except DeadlineExceeded:
+            raise
         except Exception as e:
             return CallToolResult(
                 content=[TextContent(type="text", text=f"Error: {str(e)}")],
                 isError=True,
             )
 
-    async def _handle_search(self, arguments: Dict[str, Any]) -> CallToolResult:
+    async def _handle_search(
+        self, arguments: Dict[str, Any], progress_token: Optional[ProgressToken] = None
+    ) -> CallToolResult:
         """Handle search requests."""
+        with span("validate"):
+            search_request = self._build_search_request(arguments)
+            priority = _priority(arguments, "interactive")
+            output_format = self._requested_format(arguments)
+            budget = self.output_budget.with_arguments(arguments)
+
+        # Perform search
+        on_chunk = self._progress_callback(progress_token) if search_request.stream else None
+        result = await self._search(
+            search_request,
+            bypass_cache=bool(arguments.get("bypassCache", False)),
+            on_chunk=on_chunk,
+            priority=priority,
+        )
+
+        self._record_turn(arguments, result)
+
+        with span("format"):
+            response_text, links = self._search_result_content(search_request, result, budget, output_format)
+        return CallToolResult(content=[TextContent(type="text", text=response_text), *links])
+
+    async def _handle_batch_search(self, arguments: Dict[str, Any]) -> CallToolResult:
+        """Handle batch search requests.
+
+        Searches run concurrently up to ``maxConcurrency``. Each one succeeds or
+        fails on its own, including when it runs past its own ``deadline``, and
+        results are returned in input order. Searches still unfinished at the
+        batch ``deadline`` are cancelled and fail; finished ones are kept.
+        """
+        searches = arguments.get("searches")
+        if not isinstance(searches, list) or not searches:
+            raise ValueError("searches must be a non-empty list")
+        batch_deadline = _deadline(arguments)
+
+        max_concurrency = int(arguments.get("maxConcurrency", self.batch_concurrency))
+        if max_concurrency < 1:
+            raise ValueError("maxConcurrency must be at least 1")
+        semaphore = asyncio.Semaphore(max_concurrency)
+
+        async def search_one(search_request: SearchRequest, bypass_cache: bool, priority: str) -> SearchResponse:
+            with span("search", focusMode=search_request.focusMode):
+                async with semaphore:
+                    return await self._search(search_request, bypass_cache=bypass_cache, priority=priority)
+
+        async def run_one(search_arguments: Any) -> Tuple[str, List[ContentBlock]]:
+            if not isinstance(search_arguments, dict):
+                raise ValueError("Each search must be an object")
+            search_request = self._build_search_request(search_arguments)
+            deadline = _deadline(search_arguments)
+            priority = _priority(search_arguments, "batch")
+            output_format = self._requested_format(search_arguments)
+            budget = self.output_budget.with_arguments(search_arguments)
+            result = await _with_deadline(
+                search_one(search_request, bool(search_arguments.get("bypassCache", False)), priority), deadline
+            )
+            self._record_turn(search_arguments, result)
+            return self._search_result_content(search_request, result, budget, output_format)
+
+        outcomes = await _gather_within([run_one(search) for search in searches], batch_deadline)
+
+        content: List[ContentBlock] = []
+        failures = 0
+        for i, (search, outcome) in enumerate(zip(searches, outcomes), 1):
+            json_output = isinstance(search, dict) and search.get("format", self.output_format) == "json"
+            if isinstance(outcome, BaseException):
+                failures += 1
+                if json_output:
+                    text = json.dumps({"error": str(outcome)}, ensure_ascii=False)
+                else:
+                    text = f"### Search {i} of {len(outcomes)} failed\n\nError: {outcome}\n"
+                content.append(TextContent(type="text", text=text))
+                continue
+            text, links = outcome
+            if not json_output:
+                text = f"### Search {i} of {len(outcomes)}\n\n{text}"
+            content.append(TextContent(type="text", text=text))
+            content.extend(links)
+
+        return CallToolResult(content=content, isError=failures == len(outcomes))
+
+    async def _handle_multi_search(
+        self, arguments: Dict[str, Any], progress_token: Optional[ProgressToken] = None
+    ) -> CallToolResult:
+        """Handle multi-focus search requests.
+
+        The query is searched in every focus mode concurrently. Each answer is
+        sent as a progress notification as soon as it arrives, and the result
+        holds every answer and the sources of all modes merged by URL. Focus
+        modes still unfinished at the ``deadline`` are cancelled and reported as
+        failed, keeping the answers that arrived in time.
+        """
+        focus_modes = arguments.get("focusModes", list(DEFAULT_MULTI_FOCUS_MODES))
+        if not isinstance(focus_modes, list) or not focus_modes or any(mode not in FOCUS_MODES for mode in focus_modes):
+            raise ValueError(f"focusModes must be a non-empty list of: {', '.join(FOCUS_MODES)}")
+        focus_modes = list(dict.fromkeys(focus_modes))
+
+        base_arguments = {key: value for key, value in arguments.items() if key not in ("focusModes", "sessionId")}
+        requests = [self._build_search_request(dict(base_arguments, focusMode=mode)) for mode in focus_modes]
+        output_format = self._requested_format(arguments)
+        budget = self.output_budget.with_arguments(arguments)
+        bypass_cache = bool(arguments.get("bypassCache", False))
+        priority = _priority(arguments, "interactive")
+        deadline = _deadline(arguments)
+        notify = self._progress_notifier(progress_token)
+        answered = 0
+
+        async def run_one(search_request: SearchRequest) -> SearchResponse:
+            nonlocal answered
+            with span("search", focusMode=search_request.focusMode):
+                result = await self._search(search_request, bypass_cache=bypass_cache, priority=priority)
+            answered += 1
+            if notify is not None:
+                message = f"**{search_request.focusMode}:**\n{result.message}"
+                await notify(float(answered), float(len(requests)), message)
+            return result
+
+        outcomes = await _gather_within([run_one(request) for request in requests], deadline)
+
+        answers: List[Tuple[str, SearchResponse]] = []
+        errors: List[Tuple[str, str]] = []
+        for focus_mode, outcome in zip(focus_modes, outcomes):
+            if isinstance(outcome, BaseException):
+                errors.append((focus_mode, str(outcome)))
+            else:
+                answers.append((focus_mode, outcome))
+
+        merged = merge_sources(answers)
+        sources = [entry["source"] for entry in merged]
+        source_ids = self.sources.add((s.pageContent, s.metadata) for s in sources) if self.sources and sources else []
+        source_modes = [entry["focusModes"] for entry in merged]
+        failed = dict(errors)
+        responses = dict(answers)
+        sections: List[str] = []
+        for focus_mode in focus_modes:
+            if focus_mode in failed:
+                sections.append(f"**{focus_mode} failed:** {failed[focus_mode]}\n\n")
+            else:
+                response = responses[focus_mode]
+                sections.append(f"**{focus_mode} Answer:**\n{response.message}\n\n{_approximate_note(response)}")
+        answer_text = "".join(sections)
+        result_id = self._store_result(requests[0].query, focus_modes, answer_text, sources, source_ids, source_modes)
+        heading = f"**Search Results for:** {requests[0].query}\n\n**Focus Modes:** {', '.join(focus_modes)}\n\n"
+
+        if output_format == "links" and result_id is not None:
+            response_text, links = self._linked_result(result_id, heading, answer_text, len(sources))
+            return CallToolResult(content=[TextContent(type="text", text=response_text), *links], isError=not answers)
+        elif output_format == "json":
+            out = BudgetedText(budget.max_bytes, reserve=JSON_RESERVE)
+            out.write("{")
+            out.write_json_field("query", requests[0].query, first=True)
+            out.write_json_field("focusModes", focus_modes)
+            approximate = {mode: r.approximateMatch.model_dump() for mode, r in answers if r.approximateMatch}
+            if approximate:
+                out.write_json_field("approximateMatches", approximate)
+            out.write_json_object("answers", ((mode, result.message) for mode, result in answers))
+            if errors:
+                out.write_json_object("errors", errors)
+            response_text = self._finish_json(out, budget, sources, source_ids, source_modes)
+        else:
+            out = BudgetedText(budget.max_bytes, reserve=len(TRUNCATED_NOTE))
+            out.write_prefix(heading)
+            for section in sections:
+                out.write_prefix(section)
+            if sources:
+                self._write_sources(out, budget, sources, source_ids, source_modes)
+            response_text = self._finish_markdown(out)
+
+        return CallToolResult(content=[TextContent(type="text", text=response_text)], isError=not answers)
+
+    def _build_search_request(self, arguments: Dict[str, Any]) -> SearchRequest:
+        """Validate tool arguments and build a search request."""
         # Extract and validate arguments
         query = arguments.get("query")
         if not query:
@@ -268,35 +1090,369 @@ class PerplexicaServer:
         if "systemInstructions" in arguments:
             search_request.systemInstructions = arguments["systemInstructions"]
 
-        # Perform search
-        result = await self.client.search(search_request)
+        # Prepend the history stored for the session
+        session_key = self._session_key(arguments)
+        if session_key is not None:
+            history = self.sessions.history(session_key) + (search_request.history or [])
+            search_request.history = history or None
+
+        return search_request
+
+    def _session_key(self, arguments: Dict[str, Any]) -> Optional[str]:
+        """Return the key of the ``sessionId`` argument's history, namespaced by the calling MCP session."""
+        session_id = arguments.get("sessionId")
+        if session_id is None:
+            return None
+        if not isinstance(session_id, str) or not session_id:
+            raise ValueError("sessionId must be a non-empty string")
+        return f"{self._client_id()}:{session_id}"
+
+    def _record_turn(self, arguments: Dict[str, Any], result: SearchResponse) -> None:
+        """Append a search and its answer to the history of its session, if any."""
+        session_key = self._session_key(arguments)
+        if session_key is None:
+            return
+        messages = list(arguments.get("history") or [])
+        messages.extend([["human", arguments["query"]], ["assistant", result.message]])
+        self.sessions.append(session_key, messages)
+
+    def _store_sources(self, result: SearchResponse) -> List[str]:
+        """Keep the full text of a response's sources and return their ids."""
+        if self.sources is None:
+            return []
+        return self.sources.add((source.pageContent, source.metadata) for source in result.sources)
+
+    def _requested_format(self, arguments: Dict[str, Any]) -> str:
+        """Return and validate the output format of a search."""
+        output_format = requested_format(arguments, self.output_format)
+        if output_format == "links" and self.results is None:
+            raise ValueError("format links needs the result store, which is disabled")
+        return output_format
+
+    def _search_result_content(
+        self, search_request: SearchRequest, result: SearchResponse, budget: OutputBudget, output_format: str
+    ) -> Tuple[str, List[ContentBlock]]:
+        """Store a search result and return its formatted text, plus resource links in the ``links`` format.
+
+        A result too large for the result store is returned as markdown.
+        """
+        source_ids = self._store_sources(result)
+        result_id = self._store_result(
+            search_request.query, [search_request.focusMode], result.message, result.sources, source_ids
+        )
+        if output_format == "links":
+            if result_id is not None:
+                heading = f"**Search Results for:** {search_request.query}\n\n"
+                heading += f"**Focus Mode:** {search_request.focusMode}\n\n"
+                heading += _approximate_note(result)
+                return self._linked_result(result_id, heading, result.message, len(result.sources))
+            output_format = "markdown"
+        return self._format_search_result(search_request, result, source_ids, budget, output_format), []
+
+    def _store_result(
+        self,
+        query: str,
+        focus_modes: Sequence[str],
+        answer: str,
+        sources: Sequence[SearchSource],
+        source_ids: Sequence[str] = (),
+        source_modes: Optional[Sequence[Sequence[str]]] = None,
+    ) -> Optional[str]:
+        """Keep a search result to be read as resources, and return its id."""
+        if self.results is None:
+            return None
+        listed: List[Dict[str, Any]] = []
+        for i, source in enumerate(sources):
+            item: Dict[str, Any] = {
+                "title": source.metadata.get("title", "Unknown Title"),
+                "url": source.metadata.get("url", ""),
+            }
+            if source_ids:
+                item["id"] = source_ids[i]
+            if source_modes is not None:
+                item["focusModes"] = list(source_modes[i])
+            listed.append(item)
+        return self.results.add(query, focus_modes, answer, listed, owner=self._client_id())
+
+    def _linked_result(
+        self, result_id: str, heading: str, answer: str, source_count: int
+    ) -> Tuple[str, List[ContentBlock]]:
+        """Summarize a stored search result and link to its answer and sources."""
+        summary = f"{heading}**Answer** ({len(answer)} characters):\n{snippet(answer, LINKS_SUMMARY_LENGTH)}\n\n"
+        summary += f"**Sources:** {source_count}, listed in the linked source list\n"
+        links: List[ContentBlock] = [
+            ResourceLink(
+                type="resource_link",
+                uri=AnyUrl(result_uri(result_id, "answer")),
+                name="answer",
+                mimeType="text/markdown",
+                size=len(answer.encode("utf-8")),
+                description="Full answer; add ?offset=N&length=N to read a range of characters",
+            ),
+            ResourceLink(
+                type="resource_link",
+                uri=AnyUrl(result_uri(result_id, "sources")),
+                name="sources",
+                mimeType="application/json",
+                description=(
+                    f"{source_count} sources with titles and URLs, 20 per page (?page=N); "
+                    "the full text of source N is at sources/N"
+                ),
+            ),
+        ]
+        return summary, links
 
-        # Format response
-        response_text = f"**Search Results for:** {query}\n\n"
-        response_text += f"**Focus Mode:** {focus_mode}\n\n"
-        response_text += f"**Answer:**\n{result.message}\n\n"
+    def _format_search_result(
+        self,
+        search_request: SearchRequest,
+        result: SearchResponse,
+        source_ids: Sequence[str] = (),
+        budget: Optional[OutputBudget] = None,
+        output_format: str = "markdown",
+    ) -> str:
+        """Format a search response as markdown or JSON within ``budget``."""
+        budget = budget or self.output_budget
+        if output_format == "json":
+            out = BudgetedText(budget.max_bytes, reserve=JSON_RESERVE)
+            out.write("{")
+            out.write_json_field("query", search_request.query, first=True)
+            out.write_json_field("focusMode", search_request.focusMode)
+            if result.approximateMatch is not None:
+                out.write_json_field("approximateMatch", result.approximateMatch.model_dump())
+            out.write_json_field("answer", result.message)
+            return self._finish_json(out, budget, result.sources, source_ids)
 
+        out = BudgetedText(budget.max_bytes, reserve=len(TRUNCATED_NOTE))
+        out.write_prefix(f"**Search Results for:** {search_request.query}\n\n")
+        out.write_prefix(f"**Focus Mode:** {search_request.focusMode}\n\n")
+        out.write_prefix(_approximate_note(result))
+        out.write_prefix(f"**Answer:**\n{result.message}\n\n")
         if result.sources:
-            response_text += "**Sources:**\n"
-            for i, source in enumerate(result.sources, 1):
-                title = source.metadata.get("title", "Unknown Title")
-                url = source.metadata.get("url", "")
-                response_text += f"{i}. [{title}]({url})\n"
-                if source.pageContent:
-                    # Truncate long content
-                    content = (
-                        source.pageContent[:200] + "..."
-                        if len(source.pageContent) > 200
-                        else source.pageContent
-                    )
-                    response_text += f"   {content}\n\n"
+            self._write_sources(out, budget, result.sources, source_ids)
+        return self._finish_markdown(out)
+
+    def _write_sources(
+        self,
+        out: BudgetedText,
+        budget: OutputBudget,
+        sources: Sequence[SearchSource],
+        source_ids: Sequence[str] = (),
+        focus_modes: Optional[Sequence[Sequence[str]]] = None,
+    ) -> None:
+        """Write a numbered source list with snippets, ids and the focus modes that found each source.
+
+        Only whole entries are written, up to ``budget.max_sources``.
+        """
+        if not out.write("**Sources:**\n"):
+            return
+        listed = 0
+        for i, source in enumerate(sources[: budget.max_sources], 1):
+            title = source.metadata.get("title", "Unknown Title")
+            url = source.metadata.get("url", "")
+            entry = f"{i}. [{title}]({url})"
+            if focus_modes is not None:
+                entry += f" ({', '.join(focus_modes[i - 1])})"
+            if source_ids:
+                entry += f" (source id: `{source_ids[i - 1]}`)"
+            entry += "\n"
+            content = snippet(source.pageContent, budget.snippet_length)
+            if content:
+                entry += f"   {content}\n\n"
+            if not out.write(entry):
+                return
+            listed += 1
+        if listed < len(sources):
+            out.write(f"*{len(sources) - listed} more sources not shown*\n")
+
+    def _json_sources(
+        self,
+        budget: OutputBudget,
+        sources: Sequence[SearchSource],
+        source_ids: Sequence[str] = (),
+        focus_modes: Optional[Sequence[Sequence[str]]] = None,
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield sources as compact JSON objects, up to ``budget.max_sources``."""
+        for i, source in enumerate(sources[: budget.max_sources]):
+            item: Dict[str, Any] = {
+                "title": source.metadata.get("title", "Unknown Title"),
+                "url": source.metadata.get("url", ""),
+                "snippet": snippet(source.pageContent, budget.snippet_length),
+            }
+            if source_ids:
+                item["id"] = source_ids[i]
+            if focus_modes is not None:
+                item["focusModes"] = list(focus_modes[i])
+            yield item
+
+    def _finish_json(
+        self,
+        out: BudgetedText,
+        budget: OutputBudget,
+        sources: Sequence[SearchSource],
+        source_ids: Sequence[str] = (),
+        focus_modes: Optional[Sequence[Sequence[str]]] = None,
+    ) -> str:
+        """Write the sources and closing fields of a JSON result, and return it."""
+        listed = out.write_json_items("sources", self._json_sources(budget, sources, source_ids, focus_modes))
+        omitted = len(sources) - listed
+        out.write(f',"omittedSources":{omitted},"truncated":{"true" if out.truncated else "false"}}}', reserved=True)
+        return out.getvalue()
+
+    def _finish_markdown(self, out: BudgetedText) -> str:
+        """Mark a markdown result cut short by its budget, and return it."""
+        if out.truncated:
+            out.write(TRUNCATED_NOTE, reserved=True)
+        return out.getvalue()
+
+    async def _search(
+        self,
+        search_request: SearchRequest,
+        bypass_cache: bool = False,
+        on_chunk: Optional[ChunkCallback] = None,
+        priority: str = "interactive",
+    ) -> SearchResponse:
+        """Run a search, serving and filling the response cache.
+
+        Concurrent misses for the same request share a single upstream call,
+        which waits for admission with the first caller's priority. While the
+        admission queue is deep, ``balanced`` searches are run in ``speed``
+        mode instead.
+        """
+        with span("cache") as cache_span:
+            key = request_key(search_request.model_dump())
+            cached = None if bypass_cache else self._cached(key)
+            if cached is None and self.admission.should_downgrade(search_request.optimizationMode or "balanced"):
+                search_request = search_request.model_copy(update={"optimizationMode": "speed"})
+                key = request_key(search_request.model_dump())
+                cached = None if bypass_cache else self._cached(key)
+            if cached is None and not bypass_cache:
+                cached = self._cached_similar(search_request)
+            if cache_span is not None:
+                cache_span.set(hit=cached is not None, approximate=bool(cached and cached.approximateMatch))
+        if cached is not None:
+            return cached
+
+        async def fetch() -> SearchResponse:
+            result = await self.admission.call(lambda: self._fetch(search_request, on_chunk), priority)
+            if self.cache is not None or self.similar is not None:
+                payload = result.model_dump()
+                if self.cache is not None:
+                    self.cache.set(key, search_request.focusMode, payload)
+                if self.similar is not None:
+                    self.similar.set(search_request.model_dump(), payload)
+            return result
 
+        return await self.inflight.do(key, fetch)
+
+    def _cached(self, key: str) -> Optional[SearchResponse]:
+        if self.cache is None:
+            return None
+        cached = self.cache.get(key)
+        return SearchResponse.model_validate(cached) if cached is not None else None
+
+    def _cached_similar(self, search_request: SearchRequest) -> Optional[SearchResponse]:
+        if self.similar is None:
+            return None
+        match = self.similar.get(search_request.model_dump())
+        if match is None:
+            return None
+        payload, query, similarity = match
+        result = SearchResponse.model_validate(payload)
+        result.approximateMatch = ApproximateMatch(query=query, similarity=similarity)
+        return result
+
+    async def _fetch(self, search_request: SearchRequest, on_chunk: Optional[ChunkCallback] = None) -> SearchResponse:
+        """Call Perplexica, streaming answer chunks when requested."""
+        if search_request.stream:
+            return await self.client.search_stream(search_request, on_chunk)
+        return await self.client.search(search_request)
+
+    def _client_id(self) -> str:
+        """Return a random id of the MCP session of the current request, or ``""`` outside of one.
+
+        Under the HTTP transport one process serves many clients, so state kept
+        for a client is filed under this id.
+        """
+        try:
+            session = self.server.request_context.session
+        except LookupError:
+            return ""
+        client_id = self._client_ids.get(session)
+        if client_id is None:
+            client_id = self._client_ids[session] = uuid.uuid4().hex
+        return client_id
+
+    def _progress_notifier(self, progress_token: Optional[ProgressToken]) -> Optional[ProgressNotifier]:
+        """Build a function that sends MCP progress notifications for the current request."""
+        if progress_token is None:
+            return None
+        try:
+            context = self.server.request_context
+        except LookupError:
+            return None
+
+        session = context.session
+        request_id = str(context.request_id)
+
+        async def notify(progress: float, total: Optional[float], message: Optional[str]) -> None:
+            await session.send_progress_notification(
+                progress_token, progress, total=total, message=message, related_request_id=request_id
+            )
+
+        return notify
+
+    def _progress_callback(self, progress_token: Optional[ProgressToken]) -> Optional[ChunkCallback]:
+        """Build a callback that forwards answer chunks as MCP progress notifications."""
+        notify = self._progress_notifier(progress_token)
+        if notify is None:
+            return None
+        received = 0
+
+        async def on_chunk(chunk: str) -> None:
+            nonlocal received
+            received += len(chunk)
+            await notify(float(received), None, chunk)
+
+        return on_chunk
+
+    def _handle_get_source(self, arguments: Dict[str, Any]) -> CallToolResult:
+        """Handle get source requests."""
+        if self.sources is None:
+            raise ValueError("The source store is disabled")
+        source_id = arguments.get("id")
+        if not isinstance(source_id, str) or not source_id:
+            raise ValueError("id is required")
+        offset = arguments.get("offset", 0)
+        length = arguments.get("length")
+        if not isinstance(offset, int) or offset < 0:
+            raise ValueError("offset must be a non-negative integer")
+        if length is not None and (not isinstance(length, int) or length < 1):
+            raise ValueError("length must be a positive integer")
+
+        source = self.sources.get(source_id)
+        if source is None:
+            raise ValueError(f"Unknown or expired source id: {source_id}")
+
+        content = source["content"]
+        end = len(content) if length is None else min(offset + length, len(content))
+        start = min(offset, end)
+        response_text = f"**Source:** [{source['title'] or 'Unknown Title'}]({source['url']})\n\n"
+        response_text += f"**Characters:** {start}-{end} of {len(content)}\n\n"
+        response_text += content[start:end]
         return CallToolResult(content=[TextContent(type="text", text=response_text)])
 
     async def _handle_get_models(self) -> CallToolResult:
         """Handle get models requests."""
+        _, response_text = await self.models.get()
+        return CallToolResult(content=[TextContent(type="text", text=response_text)])
+
+    async def _load_models(self) -> Tuple[Dict[str, Any], str]:
+        """Fetch the model list and its formatted text."""
         models = await self.client.get_models()
+        return models, self._format_models(models)
 
+    def _format_models(self, models: Dict[str, Any]) -> str:
+        """Format the model list as markdown."""
         response_text = "**Available Models:**\n\n"
 
         # Format chat models
@@ -317,27 +1473,126 @@ class PerplexicaServer:
                     display_name = model_info.get("displayName", model_key)
                     response_text += f"- `{model_key}`: {display_name}\n"
 
-        return CallToolResult(content=[TextContent(type="text", text=response_text)])
+        return response_text
+
+    def _handle_stats(self, arguments: Dict[str, Any]) -> CallToolResult:
+        """Handle stats requests."""
+        output_format = arguments.get("format", "json")
+        if output_format == "prometheus":
+            text = self.render_prometheus()
+        elif output_format == "json":
+            text = json.dumps(self.stats(), indent=2)
+        else:
+            raise ValueError(f"Unknown stats format: {output_format}")
+        return CallToolResult(content=[TextContent(type="text", text=text)])
+
+    def stats(self) -> Dict[str, Any]:
+        """Collect metrics and component counters."""
+        stats = self.metrics.snapshot()
+        stats["cache"] = self.cache.stats() if self.cache is not None else None
+        stats["similarCache"] = self.similar.stats() if self.similar is not None else None
+        stats["coalescing"] = self.inflight.stats()
+        stats["admission"] = self.admission.stats()
+        stats["sources"] = self.sources.stats() if self.sources is not None else None
+        stats["sessions"] = self.sessions.stats()
+        stats["results"] = self.results.stats() if self.results is not None else None
+        stats["models"] = self.models.stats()
+        if isinstance(self.client, BackendPool):
+            stats["backends"] = self.client.stats()
+        else:
+            stats["backends"] = [
+                {
+                    "baseUrl": self.client.base_url,
+                    "circuit": self.client.breaker.stats(),
+                    "timeouts": self.client.timeouts.stats(),
+                    "http": self.client.http.stats(),
+                }
+            ]
+        stats["hedging"] = self.client.hedger.stats() if self.client.hedger is not None else None
+        stats["cassette"] = self.cassette.stats() if self.cassette is not None else None
+        stats["tracing"] = self.tracer.stats() if self.tracer is not None else None
+        return stats
+
+    def render_prometheus(self) -> str:
+        """Render metrics and component counters in the Prometheus text format."""
+        gauges: Dict[str, float] = {}
+        components = {
+            "cache": self.cache.stats() if self.cache is not None else {},
+            "similar_cache": self.similar.stats() if self.similar is not None else {},
+            "coalescing": self.inflight.stats(),
+            "admission": self.admission.stats(),
+            "sources": self.sources.stats() if self.sources is not None else {},
+            "sessions": self.sessions.stats(),
+            "results": self.results.stats() if self.results is not None else {},
+            "models_cache": self.models.stats(),
+            "hedging": self.client.hedger.stats() if self.client.hedger is not None else {},
+            "cassette": self.cassette.stats() if self.cassette is not None else {},
+            "tracing": self.tracer.stats() if self.tracer is not None else {},
+        }
+        for component, values in components.items():
+            for key, value in values.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    gauges[f"perplexica_mcp_{component}_{_snake_case(key)}"] = value
+        return self.metrics.render_prometheus(gauges)
+
+    def initialization_options(self) -> InitializationOptions:
+        """Options sent to clients during ``initialize``."""
+        return InitializationOptions(
+            server_name="perplexica",
+            server_version="0.1.0",
+            capabilities=self.server.get_capabilities(
+                notification_options=NotificationOptions(),
+                experimental_capabilities=cast(Dict[str, Dict[str, Any]], {}),
+            ),
+        )
+
+    async def startup(self, warm_up: bool = True) -> None:
+        """Start background work shared by every session.
+
+        With ``warm_up=False``, :meth:`warm_up` is left until the first session
+        has been initialized, so that it does not hold up the ``initialize``
+        response.
+        """
+        if warm_up:
+            self.warm_up()
+        if self.exporter is not None:
+            await self.exporter.start()
+
+    def warm_up(self) -> None:
+        """Create the HTTP client, fetch the model list and open warm connections in the background, once."""
+        if self._warming is None:
+            self._warming = asyncio.create_task(self._warm_up())
+
+    async def _warm_up(self) -> None:
+        await self.client.prepare()
+        # Warm the model list so the first perplexica_get_models call is served locally.
+        self.models.start()
+        await self.client.warm()
 
     async def run(self) -> None:
-        """Run the server."""
+        """Run the server over stdio."""
+        await self.startup(warm_up=False)
         async with stdio_server() as (read_stream, write_stream):
-            await self.server.run(
-                read_stream,
-                write_stream,
-                InitializationOptions(
-                    server_name="perplexica",
-                    server_version="0.1.0",
-                    capabilities=self.server.get_capabilities(
-                        notification_options=NotificationOptions(),
-                        experimental_capabilities=cast(Dict[str, Dict[str, Any]], {}),
-                    ),
-                ),
-            )
+            await self.server.run(read_stream, write_stream, self.initialization_options())
 
     async def cleanup(self) -> None:
         """Cleanup resources."""
+        if self.exporter is not None:
+            await self.exporter.close()
+        if self._warming is not None:
+            self._warming.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._warming
+        await self.models.close()
         await self.client.close()
+        if self.cache is not None:
+            self.cache.close()
+        if self.sources is not None:
+            self.sources.close()
+        if self.cassette is not None:
+            self.cassette.close()
+        if self.tracer is not None:
+            self.tracer.close()
 
 
 async def main() -> None:
@@ -0,0 +1,102 @@
+"""Server-side conversation sessions."""
+
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Sequence
+
+History = List[List[str]]
+
+
+def _size(turn: Sequence[Sequence[str]]) -> int:
+    return sum(len(message.encode("utf-8")) for _, message in turn)
+
+
+class SessionStore:
+    """Conversation histories kept between searches with the same ``sessionId``.
+
+    Each session holds a list of turns, where a turn is the history messages
+    added by one search: any messages sent with it, the query and the answer.
+    Only the last ``max_turns`` turns are kept, and older turns are dropped
+    until the history fits in ``max_bytes`` (the latest turn is always kept),
+    so the history sent to Perplexica stops growing over long conversations.
+    Sessions unused for ``idle_seconds`` are evicted, as is the least recently
+    used session once there are more than ``max_sessions``.
+    """
+
+    def __init__(
+        self,
+        max_turns: int = 10,
+        max_bytes: int = 32768,
+        idle_seconds: float = 3600.0,
+        max_sessions: int = 1000,
+    ) -> None:
+        self.max_turns = max_turns
+        self.max_bytes = max_bytes
+        self.idle_seconds = idle_seconds
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+        self.turns = 0
+        self.compacted = 0
+        self.evicted = 0
+
+    @classmethod
+    def from_env(cls) -> "SessionStore":
+        """Create a store configured from ``PERPLEXICA_SESSION_*`` variables."""
+        return cls(
+            max_turns=int(os.getenv("PERPLEXICA_SESSION_MAX_TURNS", "10")),
+            max_bytes=int(os.getenv("PERPLEXICA_SESSION_MAX_BYTES", "32768")),
+            idle_seconds=float(os.getenv("PERPLEXICA_SESSION_IDLE_SECONDS", "3600")),
+            max_sessions=int(os.getenv("PERPLEXICA_SESSION_MAX_SESSIONS", "1000")),
+        )
+
+    def history(self, session_id: str) -> History:
+        """Return the stored history of a session, oldest message first."""
+        self._evict_idle()
+        session = self._sessions.get(session_id)
+        if session is None:
+            return []
+        return [list(message) for turn in session["turns"] for message in turn]
+
+    def append(self, session_id: str, messages: Sequence[Sequence[str]]) -> None:
+        """Add one turn of ``[role, message]`` pairs to a session, compacting its history."""
+        self._evict_idle()
+        session = self._sessions.pop(session_id, None) or {"turns": [], "bytes": 0}
+        turn = [[role, message] for role, message in messages]
+        session["turns"].append(turn)
+        session["bytes"] += _size(turn)
+        session["used_at"] = time.monotonic()
+        self.turns += 1
+
+        turns = session["turns"]
+        while len(turns) > 1 and (len(turns) > self.max_turns or session["bytes"] > self.max_bytes):
+            session["bytes"] -= _size(turns.pop(0))
+            self.compacted += 1
+
+        self._sessions[session_id] = session
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+            self.evicted += 1
+
+    def clear(self, session_id: str) -> None:
+        """Forget a session."""
+        self._sessions.pop(session_id, None)
+
+    def _evict_idle(self) -> None:
+        cutoff = time.monotonic() - self.idle_seconds
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if session["used_at"] > cutoff:
+                break
+            del self._sessions[session_id]
+            self.evicted += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Return session counts."""
+        return {
+            "sessions": len(self._sessions),
+            "turns": self.turns,
+            "compactedTurns": self.compacted,
+            "evicted": self.evicted,
+        }
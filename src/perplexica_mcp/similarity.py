@@ -0,0 +1,229 @@
+"""Approximate search cache for differently worded queries."""
+
+import functools
+import hashlib
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Dict, FrozenSet, List, Optional, Set, Tuple
+
+from .cache import DEFAULT_FOCUS_TTLS, parse_ttls, request_key
+
+# Large Mersenne prime for the MinHash permutations (a * x + b) mod p.
+_PRIME = (1 << 61) - 1
+_SEED = b"perplexica-mcp-minhash"
+
+STOPWORDS = frozenset(
+    "a an and are about as at be by can do does for from how i in is it me my of on or the to what when where "
+    "which who why with".split()
+)
+
+
+def query_terms(query: str) -> FrozenSet[str]:
+    """Reduce a query to its set of content words.
+
+    Case, punctuation, word order, common function words and plural ``s``
+    endings are ignored, so rewordings of a question share most terms.
+    """
+    terms: Set[str] = set()
+    for word in re.findall(r"\w+", query.casefold()):
+        if word in STOPWORDS:
+            continue
+        if len(word) > 3 and word.endswith("s") and not word.endswith("ss"):
+            word = word[:-1]
+        terms.add(word)
+    return frozenset(terms)
+
+
+def jaccard(a: FrozenSet[str], b: FrozenSet[str]) -> float:
+    """Share of terms two term sets have in common."""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def _term_hash(term: str) -> int:
+    return int.from_bytes(hashlib.blake2b(term.encode("utf-8"), digest_size=8, key=_SEED).digest(), "little")
+
+
+def _permutations(count: int) -> List[Tuple[int, int]]:
+    permutations = []
+    for i in range(count):
+        digest = hashlib.blake2b(i.to_bytes(4, "little"), digest_size=16, key=_SEED).digest()
+        a = int.from_bytes(digest[:8], "little") % (_PRIME - 1) + 1
+        b = int.from_bytes(digest[8:], "little") % _PRIME
+        permutations.append((a, b))
+    return permutations
+
+
+class SimilarQueryCache:
+    """Cache that answers a search from an earlier search with a similar query.
+
+    Queries are reduced to term sets (see :func:`query_terms`) and indexed
+    with MinHash locality-sensitive hashing: each entry's ``num_perm``
+    MinHash signature is split into ``bands``, and entries sharing any band
+    with a new query are candidates. Candidates are checked with the exact
+    Jaccard similarity of the term sets, and the best one at or above
+    ``threshold`` is a hit. Lookups therefore only touch the few entries in
+    matching buckets, however large the index grows.
+
+    Entries are partitioned by every other request field (focus mode, models,
+    optimization mode, history and system instructions), so an answer is only
+    reused for an otherwise identical search. At most ``max_entries`` are kept,
+    least recently used first out, and each expires after its focus mode's TTL.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.8,
+        max_entries: int = 1024,
+        num_perm: int = 96,
+        bands: int = 16,
+        default_ttl: float = 600.0,
+        focus_ttls: Optional[Dict[str, float]] = None,
+    ) -> None:
+        if not 0 < threshold <= 1:
+            raise ValueError("Similarity threshold must be in (0, 1]")
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.default_ttl = default_ttl
+        self.focus_ttls = dict(DEFAULT_FOCUS_TTLS)
+        if focus_ttls:
+            self.focus_ttls.update(focus_ttls)
+        self._permutations = _permutations(num_perm)
+        # Queries share most of their words, so each word's hashes are computed once.
+        self._term_hashes = functools.lru_cache(maxsize=16384)(self._hash_term)
+        self._entries: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._buckets: Dict[Tuple[str, int, Tuple[int, ...]], Set[int]] = {}
+        self._next_id = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.rejected = 0
+        self.evictions = 0
+
+    @classmethod
+    def from_env(cls) -> Optional["SimilarQueryCache"]:
+        """Create a cache from ``PERPLEXICA_SIMILAR_CACHE_*`` variables, or ``None`` when disabled."""
+        if os.getenv("PERPLEXICA_SIMILAR_CACHE_ENABLED", "false").lower() not in ("1", "true", "yes"):
+            return None
+        return cls(
+            threshold=float(os.getenv("PERPLEXICA_SIMILAR_CACHE_THRESHOLD", "0.8")),
+            max_entries=int(os.getenv("PERPLEXICA_SIMILAR_CACHE_SIZE", "1024")),
+            default_ttl=float(os.getenv("PERPLEXICA_CACHE_TTL", "600")),
+            focus_ttls=parse_ttls(os.getenv("PERPLEXICA_CACHE_TTLS", "")),
+        )
+
+    def get(self, request: Dict[str, Any]) -> Optional[Tuple[Dict[str, Any], str, float]]:
+        """Return ``(payload, cached query, similarity)`` for the closest fresh match of a dumped request."""
+        terms = query_terms(str(request.get("query", "")))
+        if not terms:
+            self.misses += 1
+            return None
+        partition = _partition(request)
+        now = time.time()
+
+        best: Optional[Dict[str, Any]] = None
+        best_similarity = 0.0
+        for entry_id in self._candidates(partition, self._signature(terms)):
+            entry = self._entries[entry_id]
+            if entry["expires_at"] <= now:
+                self._remove(entry_id)
+                continue
+            similarity = jaccard(terms, entry["terms"])
+            if similarity > best_similarity:
+                best, best_similarity = entry, similarity
+
+        if best is None or best_similarity < self.threshold:
+            if best is not None:
+                self.rejected += 1
+            self.misses += 1
+            return None
+        self._entries.move_to_end(best["id"])
+        self.hits += 1
+        return best["payload"], best["query"], best_similarity
+
+    def set(self, request: Dict[str, Any], payload: Dict[str, Any]) -> None:
+        """Index the response payload of a dumped request."""
+        ttl = self.focus_ttls.get(str(request.get("focusMode")), self.default_ttl)
+        query = str(request.get("query", ""))
+        terms = query_terms(query)
+        if ttl <= 0 or not terms or self.max_entries <= 0:
+            return
+        partition = _partition(request)
+        signature = self._signature(terms)
+        keys = self._band_keys(partition, signature)
+        for entry_id in self._candidates(partition, signature):
+            if self._entries[entry_id]["terms"] == terms:
+                self._remove(entry_id)
+
+        entry_id = self._next_id
+        self._next_id += 1
+        self._entries[entry_id] = {
+            "id": entry_id,
+            "query": query,
+            "terms": terms,
+            "keys": keys,
+            "expires_at": time.time() + ttl,
+            "payload": payload,
+        }
+        for key in keys:
+            self._buckets.setdefault(key, set()).add(entry_id)
+        while len(self._entries) > self.max_entries:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _hash_term(self, term: str) -> Tuple[int, ...]:
+        h = _term_hash(term)
+        return tuple((a * h + b) % _PRIME for a, b in self._permutations)
+
+    def _signature(self, terms: FrozenSet[str]) -> List[int]:
+        return list(map(min, zip(*(self._term_hashes(term) for term in terms))))
+
+    def _band_keys(self, partition: str, signature: List[int]) -> List[Tuple[str, int, Tuple[int, ...]]]:
+        rows = self.rows
+        return [(partition, band, tuple(signature[band * rows : (band + 1) * rows])) for band in range(self.bands)]
+
+    def _candidates(self, partition: str, signature: List[int]) -> Set[int]:
+        candidates: Set[int] = set()
+        for key in self._band_keys(partition, signature):
+            bucket = self._buckets.get(key)
+            if bucket:
+                candidates |= bucket
+        return candidates
+
+    def _remove(self, entry_id: int) -> None:
+        entry = self._entries.pop(entry_id)
+        for key in entry["keys"]:
+            bucket = self._buckets.get(key)
+            if bucket is not None:
+                bucket.discard(entry_id)
+                if not bucket:
+                    del self._buckets[key]
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters and current sizes."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "rejected": self.rejected,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "buckets": len(self._buckets),
+            "maxEntries": self.max_entries,
+            "threshold": self.threshold,
+        }
+
+    def clear(self) -> None:
+        """Drop every entry."""
+        self._entries.clear()
+        self._buckets.clear()
+
+
+def _partition(request: Dict[str, Any]) -> str:
+    return request_key(dict(request, query=""))
@@ -0,0 +1,179 @@
+"""Store of full source documents, keyed by URL and content."""
+
+import hashlib
+import os
+import sqlite3
+import sys
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .fanout import normalize_url
+
+# Once over its limit, the disk tier is pruned to this share of it, so pruning runs once per batch of adds.
+DISK_PRUNE_TARGET = 0.9
+
+
+def source_id(content: str, url: str = "") -> str:
+    """Return the stable id of a source document's text at its URL.
+
+    The URL is part of the id so that different pages with the same text,
+    such as empty or paywalled pages, keep their own title and URL.
+    """
+    key = f"{normalize_url(url) if url else ''}\0{content}"
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:16]
+
+
+class SourceStore:
+    """Bounded store of the full text of search sources, keyed by a hash of URL and content.
+
+    Search results only show the start of each source, so the full text is
+    kept here for ``perplexica_get_source``. The same document at the same
+    URL returned by different searches is stored once. Documents live in an in-memory LRU
+    capped at ``max_bytes`` and, when ``path`` is given, in a SQLite table
+    capped at ``max_disk_bytes`` of text that survives restarts.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = 64 * 2**20,
+        path: Optional[str] = None,
+        max_disk_bytes: int = 512 * 2**20,
+    ) -> None:
+        self.max_bytes = max_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._bytes = 0
+        self._disk_bytes = 0
+        self._db: Optional[sqlite3.Connection] = None
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS sources ("
+                "id TEXT PRIMARY KEY, title TEXT NOT NULL, url TEXT NOT NULL, content TEXT NOT NULL, "
+                "size INTEGER NOT NULL, used_at REAL NOT NULL)"
+            )
+            self._db.execute("CREATE INDEX IF NOT EXISTS sources_used ON sources (used_at)")
+            self._db.commit()
+            self._disk_bytes = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM sources").fetchone()[0]
+
+        self.stored = 0
+        self.duplicates = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @classmethod
+    def from_env(cls) -> Optional["SourceStore"]:
+        """Create a store from ``PERPLEXICA_SOURCE_STORE_*`` variables, or ``None`` when disabled."""
+        max_bytes = int(os.getenv("PERPLEXICA_SOURCE_STORE_BYTES", str(64 * 2**20)))
+        path = os.getenv("PERPLEXICA_SOURCE_STORE_PATH") or None
+        if max_bytes <= 0 and not path:
+            return None
+        return cls(
+            max_bytes=max(max_bytes, 0),
+            path=path,
+            max_disk_bytes=int(os.getenv("PERPLEXICA_SOURCE_STORE_DISK_BYTES", str(512 * 2**20))),
+        )
+
+    def add(self, sources: Iterable[Tuple[str, Dict[str, Any]]]) -> List[str]:
+        """Store ``(pageContent, metadata)`` pairs and return their ids."""
+        ids: List[str] = []
+        now = time.time()
+        for content, metadata in sources:
+            key = source_id(content, str(metadata.get("url") or ""))
+            ids.append(key)
+            record = self._entries.get(key)
+            if record is not None:
+                self._entries.move_to_end(key)
+                self.duplicates += 1
+            else:
+                self.stored += 1
+                record = {
+                    "title": str(metadata.get("title") or ""),
+                    "url": str(metadata.get("url") or ""),
+                    "content": content,
+                }
+                self._remember(key, record)
+            if self._db is not None:
+                inserted = self._db.execute(
+                    "INSERT OR IGNORE INTO sources (id, title, url, content, size, used_at) VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, record["title"], record["url"], content, len(content), now),
+                ).rowcount
+                if inserted:
+                    self._disk_bytes += len(content)
+                else:
+                    self._db.execute("UPDATE sources SET used_at = ? WHERE id = ?", (now, key))
+        if self._db is not None and ids:
+            if self._disk_bytes > self.max_disk_bytes:
+                self._prune_disk()
+            self._db.commit()
+        return ids
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the ``title``, ``url`` and full ``content`` of a stored source."""
+        record = self._entries.get(key)
+        if record is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return record
+
+        if self._db is not None:
+            row = self._db.execute("SELECT title, url, content FROM sources WHERE id = ?", (key,)).fetchone()
+            if row is not None:
+                record = {"title": row[0], "url": row[1], "content": row[2]}
+                self._remember(key, record)
+                self.hits += 1
+                self.disk_hits += 1
+                return record
+
+        self.misses += 1
+        return None
+
+    def _remember(self, key: str, record: Dict[str, Any]) -> None:
+        size = sys.getsizeof(record["content"])
+        if size > self.max_bytes:
+            return
+        self._entries[key] = record
+        self._bytes += size
+        while self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= sys.getsizeof(evicted["content"])
+            self.evictions += 1
+
+    def _prune_disk(self) -> None:
+        """Delete the least recently used documents until the disk tier is back under its prune target."""
+        assert self._db is not None
+        excess = self._disk_bytes - int(self.max_disk_bytes * DISK_PRUNE_TARGET)
+        victims: List[Tuple[str]] = []
+        for key, size in self._db.execute("SELECT id, size FROM sources ORDER BY used_at"):
+            if excess <= 0:
+                break
+            victims.append((key,))
+            excess -= size
+            self._disk_bytes -= size
+        self._db.executemany("DELETE FROM sources WHERE id = ?", victims)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return counters and current sizes."""
+        return {
+            "stored": self.stored,
+            "duplicates": self.duplicates,
+            "hits": self.hits,
+            "diskHits": self.disk_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "maxBytes": self.max_bytes,
+            "persistent": self._db is not None,
+            "diskBytes": self._disk_bytes,
+        }
+
+    def close(self) -> None:
+        """Close the SQLite tier, if any."""
+        if self._db is not None:
+            self._db.close()
+            self._db = None
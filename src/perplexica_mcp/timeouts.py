@@ -0,0 +1,95 @@
+"""Adaptive HTTP timeouts for searches."""
+
+import os
+from typing import Any, Dict, Optional
+
+import httpx
+
+from .hedging import LatencyTracker
+
+
+class AdaptiveTimeouts:
+    """Per-request timeouts learned from recent search latency.
+
+    A non-streamed search gets no bytes back until the whole answer is ready,
+    so its first-byte limit is ``multiplier`` times the ``percentile`` latency
+    of recent searches with the same focus and optimization mode, clamped to
+    ``[floor, ceiling]``; ``default`` is used until ``min_samples`` searches
+    have completed. Streamed searches send events as they go and are instead
+    limited to ``read`` seconds between events. Opening a connection is
+    limited to ``connect`` seconds in both cases.
+    """
+
+    def __init__(
+        self,
+        connect: float = 5.0,
+        read: float = 30.0,
+        default: float = 60.0,
+        floor: float = 5.0,
+        ceiling: float = 120.0,
+        multiplier: float = 3.0,
+        percentile: float = 0.99,
+        min_samples: int = 10,
+    ) -> None:
+        self.connect = connect
+        self.read = read
+        self.default = default
+        self.floor = floor
+        self.ceiling = ceiling
+        self.multiplier = multiplier
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.latency = LatencyTracker()
+        self.timeouts = {"connect": 0, "firstByte": 0, "read": 0, "other": 0}
+
+    @classmethod
+    def from_env(cls) -> "AdaptiveTimeouts":
+        """Create timeouts configured from ``PERPLEXICA_*_TIMEOUT`` variables."""
+        return cls(
+            connect=float(os.getenv("PERPLEXICA_CONNECT_TIMEOUT", "5")),
+            read=float(os.getenv("PERPLEXICA_READ_TIMEOUT", "30")),
+            default=float(os.getenv("PERPLEXICA_SEARCH_TIMEOUT", "60")),
+            floor=float(os.getenv("PERPLEXICA_TIMEOUT_FLOOR", "5")),
+            ceiling=float(os.getenv("PERPLEXICA_TIMEOUT_CEILING", "120")),
+            multiplier=float(os.getenv("PERPLEXICA_TIMEOUT_MULTIPLIER", "3")),
+        )
+
+    @property
+    def client_timeout(self) -> httpx.Timeout:
+        """Timeout for requests other than searches."""
+        return httpx.Timeout(self.default, connect=self.connect)
+
+    def first_byte(self, focus_mode: str, optimization_mode: Optional[str]) -> float:
+        """Seconds to wait for a non-streamed answer."""
+        recent = self.latency.percentile(_key(focus_mode, optimization_mode), self.percentile, self.min_samples)
+        limit = self.default if recent is None else recent * self.multiplier
+        return min(max(limit, self.floor), self.ceiling)
+
+    def for_search(self, focus_mode: str, optimization_mode: Optional[str], stream: bool) -> httpx.Timeout:
+        """Timeout for a search request."""
+        if stream:
+            return httpx.Timeout(self.read, connect=self.connect)
+        return httpx.Timeout(self.first_byte(focus_mode, optimization_mode), connect=self.connect)
+
+    def observe(self, focus_mode: str, optimization_mode: Optional[str], seconds: float) -> None:
+        """Record how long a completed search took."""
+        self.latency.observe(_key(focus_mode, optimization_mode), seconds)
+
+    def record_error(self, error: httpx.HTTPError, stream: bool) -> None:
+        """Count ``error`` if it was caused by one of the limits."""
+        if isinstance(error, httpx.ConnectTimeout):
+            self.timeouts["connect"] += 1
+        elif isinstance(error, httpx.ReadTimeout):
+            self.timeouts["read" if stream else "firstByte"] += 1
+        elif isinstance(error, httpx.TimeoutException):
+            self.timeouts["other"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Return timeout counts and the current first-byte limit per mode."""
+        stats: Dict[str, Any] = {f"{kind}Timeouts": count for kind, count in self.timeouts.items()}
+        stats["firstByteLimits"] = {key: self.first_byte(*key.split("/", 1)) for key in sorted(self.latency.keys())}
+        return stats
+
+
+def _key(focus_mode: str, optimization_mode: Optional[str]) -> str:
+    return f"{focus_mode}/{optimization_mode or 'balanced'}"
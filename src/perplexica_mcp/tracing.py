@@ -0,0 +1,247 @@
+"""Opt-in per-request tracing with a phase-level time breakdown."""
+
+import contextlib
+import json
+import logging
+import logging.handlers
+import os
+import random
+import time
+from contextvars import ContextVar, Token
+from typing import Any, Callable, ContextManager, Dict, List, Optional
+
+EXPORTERS = ("jsonl", "otel")
+
+_current: ContextVar[Optional["Span"]] = ContextVar("perplexica_mcp_span", default=None)
+_NO_SPAN: ContextManager[None] = contextlib.nullcontext()
+
+
+class Span:
+    """One timed phase of a traced tool call."""
+
+    __slots__ = ("spans", "trace_id", "span_id", "parent_id", "name", "start_ns", "end_ns", "attributes", "error")
+
+    def __init__(self, spans: List["Span"], trace_id: str, parent_id: Optional[str], name: str, **attributes: Any):
+        self.spans = spans
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent_id
+        self.name = name
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.attributes: Dict[str, Any] = attributes
+        self.error: Optional[str] = None
+        spans.append(self)
+
+    def child(self, name: str, **attributes: Any) -> "Span":
+        """Start a span nested in this one."""
+        return Span(self.spans, self.trace_id, self.span_id, name, **attributes)
+
+    def set(self, **attributes: Any) -> None:
+        """Add attributes to the span."""
+        self.attributes.update(attributes)
+
+    def end(self, error: Optional[BaseException] = None) -> None:
+        """Finish the span, marking it failed when ``error`` is given."""
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            if error is not None:
+                self.error = f"{type(error).__name__}: {error}"
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the span in the field names of the OpenTelemetry JSON encoding."""
+        end_ns = self.end_ns if self.end_ns is not None else time.time_ns()
+        return {
+            "traceId": self.trace_id,
+            "spanId": self.span_id,
+            "parentSpanId": self.parent_id,
+            "name": self.name,
+            "startTimeUnixNano": self.start_ns,
+            "endTimeUnixNano": end_ns,
+            "durationMs": round((end_ns - self.start_ns) / 1e6, 3),
+            "attributes": self.attributes,
+            "status": "error" if self.error else "ok",
+            "error": self.error,
+        }
+
+
+class _SpanContext:
+    __slots__ = ("span", "token")
+
+    def __init__(self, span: Span) -> None:
+        self.span = span
+        self.token: Optional[Token[Optional[Span]]] = None
+
+    def __enter__(self) -> Span:
+        self.token = _current.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type: Any, exc: Optional[BaseException], tb: Any) -> None:
+        assert self.token is not None
+        _current.reset(self.token)
+        self.span.end(exc)
+
+
+def span(name: str, **attributes: Any) -> ContextManager[Optional[Span]]:
+    """Time a phase as a child of the current span.
+
+    Outside a traced tool call this returns a shared no-op context manager, so
+    instrumented code costs one context variable lookup when tracing is off.
+    """
+    parent = _current.get()
+    if parent is None:
+        return _NO_SPAN
+    return _SpanContext(parent.child(name, **attributes))
+
+
+class _HttpTrace:
+    """httpx ``trace`` extension turning httpcore events into spans.
+
+    httpcore reports each step of a request, such as
+    ``connection.connect_tcp``, ``http11.receive_response_headers`` (waiting
+    for the first byte) or ``http11.receive_response_body``, as ``.started``
+    followed by ``.complete`` or ``.failed``.
+    """
+
+    def __init__(self, parent: Span) -> None:
+        self.parent = parent
+        self.open: Dict[str, Span] = {}
+
+    async def __call__(self, event: str, info: Dict[str, Any]) -> None:
+        name, _, phase = event.rpartition(".")
+        if phase == "started":
+            self.open[name] = self.parent.child(name)
+        elif name in self.open:
+            self.open.pop(name).end(info.get("exception") if phase == "failed" else None)
+
+
+def http_extensions() -> Dict[str, Any]:
+    """Return httpx request extensions that trace connection and transfer phases of a traced call."""
+    parent = _current.get()
+    if parent is None:
+        return {}
+    return {"trace": _HttpTrace(parent)}
+
+
+class Tracer:
+    """Records a span tree per tool call and exports it when the call ends.
+
+    Spans are written as one JSON object per line to a size-rotated file, or
+    handed to the OpenTelemetry API with their original timestamps so that a
+    configured OpenTelemetry SDK exports them. ``sample_rate`` is the share of
+    tool calls traced.
+    """
+
+    def __init__(self, export: Callable[[List[Span]], None], sample_rate: float = 1.0) -> None:
+        self.export = export
+        self.sample_rate = sample_rate
+        self.traces = 0
+        self.spans = 0
+        self.export_errors = 0
+
+    @classmethod
+    def from_env(cls) -> Optional["Tracer"]:
+        """Create a tracer from ``PERPLEXICA_TRACE_*`` variables, or ``None`` when tracing is off."""
+        path = os.getenv("PERPLEXICA_TRACE_FILE")
+        exporter = os.getenv("PERPLEXICA_TRACE_EXPORTER", "jsonl" if path else "").lower()
+        if not exporter:
+            return None
+        sample_rate = float(os.getenv("PERPLEXICA_TRACE_SAMPLE_RATE", "1"))
+        if exporter == "otel":
+            return cls(otel_exporter(), sample_rate)
+        if exporter != "jsonl" or not path:
+            raise ValueError(
+                f"PERPLEXICA_TRACE_EXPORTER must be one of: {', '.join(EXPORTERS)} (jsonl needs PERPLEXICA_TRACE_FILE)"
+            )
+        return cls(
+            JsonlExporter(
+                path,
+                max_bytes=int(os.getenv("PERPLEXICA_TRACE_MAX_BYTES", str(10 * 2**20))),
+                backups=int(os.getenv("PERPLEXICA_TRACE_BACKUPS", "3")),
+            ),
+            sample_rate,
+        )
+
+    def trace(self, name: str, **attributes: Any) -> ContextManager[Optional[Span]]:
+        """Start the root span of a tool call; its tree is exported when it ends."""
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return _NO_SPAN
+        return _RootContext(self, Span([], os.urandom(16).hex(), None, name, **attributes))
+
+    def _finish(self, root: Span) -> None:
+        self.traces += 1
+        self.spans += len(root.spans)
+        try:
+            self.export(root.spans)
+        except Exception:
+            self.export_errors += 1
+
+    def close(self) -> None:
+        """Close the exporter, if it holds a file."""
+        close = getattr(self.export, "close", None)
+        if close is not None:
+            close()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return trace counters."""
+        return {
+            "traces": self.traces,
+            "spans": self.spans,
+            "exportErrors": self.export_errors,
+            "sampleRate": self.sample_rate,
+        }
+
+
+class _RootContext(_SpanContext):
+    __slots__ = ("tracer",)
+
+    def __init__(self, tracer: Tracer, root: Span) -> None:
+        super().__init__(root)
+        self.tracer = tracer
+
+    def __exit__(self, exc_type: Any, exc: Optional[BaseException], tb: Any) -> None:
+        super().__exit__(exc_type, exc, tb)
+        self.tracer._finish(self.span)
+
+
+class JsonlExporter:
+    """Appends spans to a file as JSON lines, rotating it after ``max_bytes``."""
+
+    def __init__(self, path: str, max_bytes: int = 10 * 2**20, backups: int = 3) -> None:
+        self._handler = logging.handlers.RotatingFileHandler(
+            path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8"
+        )
+
+    def __call__(self, spans: List[Span]) -> None:
+        text = "\n".join(json.dumps(s.to_dict(), separators=(",", ":"), default=str) for s in spans)
+        self._handler.emit(logging.makeLogRecord({"msg": text}))
+
+    def close(self) -> None:
+        """Close the trace file."""
+        self._handler.close()
+
+
+def otel_exporter() -> Callable[[List[Span]], None]:
+    """Return an exporter that re-creates spans through the OpenTelemetry API."""
+    # Imported here so that servers without OpenTelemetry tracing start without loading it.
+    try:
+        from opentelemetry import trace as otel_trace
+    except ImportError:  # pragma: no cover - depends on the environment
+        raise ValueError("PERPLEXICA_TRACE_EXPORTER=otel requires the opentelemetry-api package") from None
+    tracer = otel_trace.get_tracer("perplexica_mcp")
+
+    def export(spans: List[Span]) -> None:
+        created: Dict[str, Any] = {}
+        for s in spans:
+            parent = created.get(s.parent_id) if s.parent_id else None
+            context = otel_trace.set_span_in_context(parent) if parent is not None else None
+            attributes = {key: value for key, value in s.attributes.items() if value is not None}
+            created[s.span_id] = tracer.start_span(
+                s.name, context=context, start_time=s.start_ns, attributes=attributes
+            )
+            if s.error:
+                created[s.span_id].set_status(otel_trace.Status(otel_trace.StatusCode.ERROR, s.error))
+        for s in spans:
+            created[s.span_id].end(end_time=s.end_ns)
+
+    return export
@@ -0,0 +1,75 @@
+"""HTTP transports that let one server process serve many MCP clients."""
+
+import contextlib
+import os
+from typing import AsyncIterator, Optional
+
+import uvicorn
+from mcp.server.sse import SseServerTransport
+from mcp.server.streamable_http_manager import StreamableHTTPSessionManager
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import Response
+from starlette.routing import Mount, Route
+from starlette.types import Receive, Scope, Send
+
+from .server import PerplexicaServer
+
+
+class _StreamableHTTPEndpoint:
+    """ASGI endpoint forwarding requests to the streamable HTTP session manager."""
+
+    def __init__(self, session_manager: StreamableHTTPSessionManager) -> None:
+        self.session_manager = session_manager
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.session_manager.handle_request(scope, receive, send)
+
+
+def create_http_app(server: Optional[PerplexicaServer] = None, stateless: Optional[bool] = None) -> Starlette:
+    """Create an ASGI app serving MCP over streamable HTTP (``/mcp``) and SSE (``/sse``).
+
+    Every session shares one ``PerplexicaServer``, and with it the HTTP
+    connection pool, caches and metrics. ``stateless`` defaults to
+    ``PERPLEXICA_MCP_STATELESS``; stateless sessions are needed when several
+    worker processes share a port, since any worker may receive any request.
+    """
+    server = server or PerplexicaServer()
+    if stateless is None:
+        stateless = os.getenv("PERPLEXICA_MCP_STATELESS", "false").lower() in ("1", "true", "yes")
+    session_manager = StreamableHTTPSessionManager(app=server.server, stateless=stateless)
+    sse = SseServerTransport("/messages/")
+
+    async def handle_sse(request: Request) -> Response:
+        async with sse.connect_sse(request.scope, request.receive, request._send) as (read_stream, write_stream):
+            await server.server.run(read_stream, write_stream, server.initialization_options())
+        return Response()
+
+    @contextlib.asynccontextmanager
+    async def lifespan(app: Starlette) -> AsyncIterator[None]:
+        await server.startup()
+        try:
+            async with session_manager.run():
+                yield
+        finally:
+            await server.cleanup()
+
+    return Starlette(
+        routes=[
+            Route("/mcp", endpoint=_StreamableHTTPEndpoint(session_manager)),
+            Route("/sse", endpoint=handle_sse, methods=["GET"]),
+            Mount("/messages/", app=sse.handle_post_message),
+        ],
+        lifespan=lifespan,
+    )
+
+
+def run_http(host: str = "127.0.0.1", port: int = 8000, workers: int = 1) -> None:
+    """Serve the HTTP transports, optionally from several worker processes on one port."""
+    if workers > 1:
+        # Workers build their own app from the import string; sessions must be
+        # stateless because requests of one session may reach any worker.
+        os.environ["PERPLEXICA_MCP_STATELESS"] = "true"
+        uvicorn.run("perplexica_mcp.transport:create_http_app", factory=True, host=host, port=port, workers=workers)
+    else:
+        uvicorn.run(create_http_app(), host=host, port=port)
@@ -0,0 +1,88 @@
+"""Tests for admission control."""
+
+import asyncio
+
+import pytest
+
+from perplexica_mcp.admission import AdmissionController, AdmissionRejected
+from perplexica_mcp.server import PerplexicaServer, SearchResponse
+
+
+@pytest.mark.asyncio
+async def test_queue_is_ordered_by_priority_and_bounded():
+    """Test that waiting calls run interactive-first and overflow is rejected."""
+    admission = AdmissionController(max_concurrency=1, max_queue=2)
+    release = asyncio.Event()
+    order = []
+
+    async def work(name):
+        order.append(name)
+        if name == "first":
+            await release.wait()
+        return name
+
+    first = asyncio.create_task(admission.call(lambda: work("first")))
+    await asyncio.sleep(0)
+    batch = asyncio.create_task(admission.call(lambda: work("batch"), "batch"))
+    interactive = asyncio.create_task(admission.call(lambda: work("interactive")))
+    await asyncio.sleep(0)
+
+    with pytest.raises(AdmissionRejected):
+        await admission.call(lambda: work("rejected"))
+
+    release.set()
+    await asyncio.gather(first, batch, interactive)
+    assert order == ["first", "interactive", "batch"]
+
+    stats = admission.stats()
+    assert stats["admitted"] == 3
+    assert stats["delayed"] == 2
+    assert stats["rejected"] == 1
+    assert stats["active"] == 0 and stats["queued"] == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_leaves_the_queue():
+    """Test that a cancelled queued call frees its place for the next one."""
+    admission = AdmissionController(max_concurrency=1, max_queue=1)
+    release = asyncio.Event()
+
+    running = asyncio.create_task(admission.call(release.wait))
+    await asyncio.sleep(0)
+    waiting = asyncio.create_task(admission.call(release.wait))
+    await asyncio.sleep(0)
+    waiting.cancel()
+    await asyncio.sleep(0)
+
+    assert admission.stats()["queued"] == 0
+    queued = asyncio.create_task(admission.call(release.wait))
+    await asyncio.sleep(0)
+    release.set()
+    await asyncio.gather(running, queued)
+    assert admission.stats()["active"] == 0
+
+
+@pytest.mark.asyncio
+async def test_balanced_searches_are_downgraded_when_queue_is_deep():
+    """Test that balanced searches switch to speed mode past the queue threshold."""
+    server = PerplexicaServer()
+    server.cache = None
+    server.admission = AdmissionController(max_concurrency=1, max_queue=10, downgrade_queue_depth=1)
+    release = asyncio.Event()
+    modes = []
+
+    async def search(request):
+        modes.append(request.optimizationMode)
+        await release.wait()
+        return SearchResponse(message="answer", sources=[])
+
+    server.client.search = search
+    calls = []
+    for i in range(3):
+        calls.append(asyncio.create_task(server._search(server._build_search_request({"query": f"query {i}"}))))
+        await asyncio.sleep(0.01)
+    release.set()
+    await asyncio.gather(*calls)
+
+    assert modes == ["balanced", "balanced", "speed"]
+    assert server.admission.stats()["downgraded"] == 1
@@ -0,0 +1,91 @@
+"""Tests for multi-backend load balancing."""
+
+import asyncio
+
+import httpx
+import pytest
+
+from perplexica_mcp.backends import BackendPool, is_backend_failure
+from perplexica_mcp.server import PerplexicaClient, SearchRequest
+
+
+def _client(base_url, handler):
+    """Build a PerplexicaClient backed by a mock transport."""
+    client = PerplexicaClient(base_url)
+    client.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return client
+
+
+def _ok(request):
+    if request.url.path == "/api/models":
+        return httpx.Response(200, json={"chatModels": {}})
+    return httpx.Response(200, json={"message": request.url.host, "sources": []})
+
+
+def _down(request):
+    return httpx.Response(503, json={"error": "unavailable"})
+
+
+@pytest.mark.asyncio
+async def test_least_outstanding_spreads_concurrent_requests():
+    """Test that concurrent requests go to the least loaded backends."""
+    pool = BackendPool([_client("http://a", _ok), _client("http://b", _ok)], probe_interval=0)
+    release = asyncio.Event()
+    seen = []
+
+    async def slow(client):
+        seen.append(client.base_url)
+        await release.wait()
+        return client.base_url
+
+    tasks = [asyncio.create_task(pool.call(slow)) for _ in range(4)]
+    await asyncio.sleep(0)
+    release.set()
+    await asyncio.gather(*tasks)
+
+    assert sorted(seen) == ["http://a", "http://a", "http://b", "http://b"]
+    await pool.close()
+
+
+@pytest.mark.asyncio
+async def test_failing_backend_is_ejected_and_readmitted():
+    """Test ejection after repeated failures and re-admission by a health probe."""
+    handlers = {"http://a": _ok, "http://b": _down}
+    clients = [_client(url, lambda request, url=url: handlers[url](request)) for url in handlers]
+    pool = BackendPool(clients, probe_interval=0, eject_after=2)
+    request = SearchRequest(query="q", focusMode="webSearch")
+
+    for _ in range(6):
+        try:
+            await pool.search(request)
+        except Exception:
+            pass
+    bad = pool.backends[1]
+    assert not bad.healthy
+    assert bad.failures == 2
+
+    result = await pool.search(request)
+    assert result.message == "a"
+
+    handlers["http://b"] = _ok
+    await pool.probe()
+    assert bad.healthy
+    await pool.close()
+
+
+def test_client_errors_do_not_count_as_backend_failures():
+    """Test that 4xx responses are not treated as backend failures."""
+    request = httpx.Request("POST", "http://a/api/search")
+    bad_request = httpx.HTTPStatusError("bad", request=request, response=httpx.Response(400, request=request))
+    server_error = httpx.HTTPStatusError("bad", request=request, response=httpx.Response(502, request=request))
+
+    try:
+        try:
+            raise bad_request
+        except httpx.HTTPError as e:
+            raise Exception(f"HTTP error occurred: {e}")
+    except Exception as wrapped:
+        assert not is_backend_failure(wrapped)
+
+    assert is_backend_failure(server_error)
+    assert is_backend_failure(httpx.ConnectError("refused"))
@@ -0,0 +1,62 @@
+"""Smoke tests for the benchmark harness."""
+
+import pytest
+
+from benchmarks.bench_decode import run_decode_benchmarks
+from benchmarks.bench_server import format_results, percentile, run_benchmarks
+from benchmarks.bench_startup import run_startup_benchmarks
+from benchmarks.stub import StubConfig
+
+
+def test_percentile():
+    """Test nearest-rank percentiles."""
+    values = [float(i) for i in range(1, 101)]
+    assert percentile(values, 0.50) == 50.0
+    assert percentile(values, 0.99) == 99.0
+    assert percentile([], 0.5) == 0.0
+
+
+@pytest.mark.asyncio
+async def test_benchmarks_run_against_stub():
+    """Test that every scenario runs against the stub and reports errors."""
+    results = await run_benchmarks(StubConfig(sources=3, source_length=50), requests=4, concurrency=2)
+
+    assert [r.name for r in results] == ["search", "search_stream", "get_models", "search_concurrent"]
+    assert all(r.errors == 0 and r.throughput > 0 for r in results)
+    assert all(r.peak_memory_bytes for r in results)
+    assert "search_concurrent" in format_results(results)
+
+    failing = await run_benchmarks(StubConfig(error_rate=1.0), requests=2, trace_memory=False, scenarios=["search"])
+    assert failing[0].errors == 2
+
+
+def test_decode_benchmarks_run():
+    """Test that every decode strategy is timed against the baseline."""
+    results = run_decode_benchmarks(StubConfig(sources=3, source_length=100), iterations=2)
+
+    assert results[0].name == "json+kwargs" and results[0].speedup == 1.0
+    assert all(r.mean_ms > 0 for r in results)
+
+
+def test_startup_benchmarks_run():
+    """Test that a spawned server answers initialize and tools/list."""
+    results = run_startup_benchmarks(runs=1)
+
+    assert [r.name for r in results] == ["import mcp", "import server", "initialize", "tools/list"]
+    assert all(r.runs == 1 and r.mean_ms > 0 for r in results)
+
+
+@pytest.mark.asyncio
+async def test_benchmarks_replay_recorded_cassette(tmp_path, monkeypatch):
+    """Test that traffic recorded from the stub can be replayed without it."""
+    path = str(tmp_path / "stub.jsonl")
+    monkeypatch.setenv("PERPLEXICA_CASSETTE_MODE", "record")
+    monkeypatch.setenv("PERPLEXICA_CASSETTE_PATH", path)
+    await run_benchmarks(StubConfig(sources=2), requests=2, trace_memory=False)
+    monkeypatch.delenv("PERPLEXICA_CASSETTE_MODE")
+
+    results = await run_benchmarks(
+        StubConfig(error_rate=1.0), requests=6, concurrency=3, trace_memory=False, cassette=path, cassette_speed=100.0
+    )
+
+    assert all(r.errors == 0 for r in results)
@@ -0,0 +1,74 @@
+"""Tests for the circuit breaker."""
+
+from unittest.mock import patch
+
+import pytest
+
+from perplexica_mcp.breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+
+
+async def _ok():
+    return "ok"
+
+
+async def _fail():
+    raise Exception("connection refused")
+
+
+@pytest.mark.asyncio
+async def test_breaker_opens_on_error_rate_and_recovers():
+    """Test the closed -> open -> half-open -> closed cycle."""
+    breaker = CircuitBreaker(min_calls=4, failure_rate=0.5, open_seconds=30.0, trial_calls=2)
+
+    with patch("perplexica_mcp.breaker.time.monotonic", return_value=0.0):
+        for fn in (_ok, _ok, _fail, _fail):
+            try:
+                await breaker.call(fn)
+            except Exception:
+                pass
+        assert breaker.state == OPEN
+
+        with pytest.raises(CircuitOpenError):
+            await breaker.call(_ok)
+        assert breaker.rejected == 1
+
+    with patch("perplexica_mcp.breaker.time.monotonic", return_value=31.0):
+        assert breaker.state == HALF_OPEN
+        assert await breaker.call(_ok) == "ok"
+        assert breaker.state == HALF_OPEN
+        assert await breaker.call(_ok) == "ok"
+        assert breaker.state == CLOSED
+
+
+@pytest.mark.asyncio
+async def test_breaker_failed_trial_reopens():
+    """Test that a failing half-open trial opens the circuit again."""
+    breaker = CircuitBreaker(min_calls=1, open_seconds=10.0)
+
+    with patch("perplexica_mcp.breaker.time.monotonic", return_value=0.0):
+        with pytest.raises(Exception):
+            await breaker.call(_fail)
+        assert breaker.state == OPEN
+
+    with patch("perplexica_mcp.breaker.time.monotonic", return_value=11.0):
+        with pytest.raises(Exception):
+            await breaker.call(_fail)
+        assert breaker.state == OPEN
+        assert breaker.opened == 2
+
+
+@pytest.mark.asyncio
+async def test_breaker_opens_on_slow_calls():
+    """Test that a high share of slow calls trips the breaker."""
+    breaker = CircuitBreaker(min_calls=2, slow_call_seconds=5.0, slow_call_rate=1.0)
+    clock = [0.0]
+
+    async def slow():
+        clock[0] += 6.0
+        return "ok"
+
+    with patch("perplexica_mcp.breaker.time.monotonic", side_effect=lambda: clock[0]):
+        await breaker.call(slow)
+        assert breaker.state == CLOSED
+        await breaker.call(slow)
+        assert breaker.state == OPEN
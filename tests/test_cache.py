@@ -0,0 +1,113 @@
+"""Tests for the search response cache."""
+
+import asyncio
+from unittest.mock import patch
+
+import pytest
+
+from perplexica_mcp.cache import SearchCache, StaleWhileRevalidate, parse_ttls, request_key
+
+PAYLOAD = {"message": "Cached answer", "sources": []}
+
+
+def test_request_key_normalization():
+    """Test that whitespace, case and stream do not change the key."""
+    base = {"query": "Quantum  computing", "focusMode": "webSearch", "stream": False}
+    same = {"query": " quantum computing ", "focusMode": "webSearch", "stream": True}
+    other = {"query": "quantum computing", "focusMode": "academicSearch"}
+
+    assert request_key(base) == request_key(same)
+    assert request_key(base) != request_key(other)
+
+
+def test_cache_ttl_and_lru():
+    """Test per-focus-mode expiry and LRU eviction."""
+    cache = SearchCache(max_entries=2, focus_ttls={"webSearch": 10.0, "writingAssistant": 0.0})
+
+    with patch("perplexica_mcp.cache.time.time", return_value=1000.0):
+        cache.set("a", "webSearch", PAYLOAD)
+        cache.set("b", "webSearch", PAYLOAD)
+        cache.set("skip", "writingAssistant", PAYLOAD)
+        assert cache.get("a") == PAYLOAD
+        cache.set("c", "webSearch", PAYLOAD)
+
+        assert cache.get("b") is None  # evicted as least recently used
+        assert cache.get("skip") is None  # TTL of 0 disables caching
+
+    with patch("perplexica_mcp.cache.time.time", return_value=1011.0):
+        assert cache.get("a") is None  # expired
+
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 3
+    assert stats["evictions"] == 1
+
+
+def test_cache_sqlite_persistence(tmp_path):
+    """Test that the SQLite tier survives a new cache instance."""
+    path = str(tmp_path / "cache.db")
+    cache = SearchCache(path=path)
+    cache.set("key", "academicSearch", PAYLOAD)
+    cache.close()
+
+    reopened = SearchCache(path=path)
+    assert reopened.get("key") == PAYLOAD
+    assert reopened.stats()["diskHits"] == 1
+    reopened.close()
+
+
+def test_parse_ttls():
+    """Test parsing of TTL override strings."""
+    assert parse_ttls("webSearch=60, redditSearch=5") == {"webSearch": 60.0, "redditSearch": 5.0}
+    assert parse_ttls("") == {}
+
+
+@pytest.mark.asyncio
+async def test_stale_while_revalidate_serves_stale_copy():
+    """Test that a stale value is served immediately while a refresh runs."""
+    versions = iter(["v1", "v2"])
+    release = asyncio.Event()
+
+    async def fetch():
+        value = next(versions)
+        if value == "v2":
+            await release.wait()
+        return value
+
+    cached = StaleWhileRevalidate(fetch, max_age=10.0)
+    with patch("perplexica_mcp.cache.time.monotonic", return_value=100.0):
+        assert await cached.get() == "v1"
+        assert await cached.get() == "v1"
+
+    with patch("perplexica_mcp.cache.time.monotonic", return_value=111.0):
+        assert await cached.get() == "v1"  # stale copy, refresh started
+        release.set()
+        assert await cached.refresh() == "v2"
+        assert await cached.get() == "v2"
+
+    stats = cached.stats()
+    assert stats["misses"] == 1
+    assert stats["staleHits"] == 1
+    assert stats["refreshes"] == 2
+    await cached.close()
+
+
+@pytest.mark.asyncio
+async def test_stale_while_revalidate_keeps_value_on_failed_refresh():
+    """Test that a failing background refresh keeps the previous copy."""
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        if calls > 1:
+            raise Exception("down")
+        return "v1"
+
+    cached = StaleWhileRevalidate(fetch, max_age=0.01)
+    assert await cached.get() == "v1"
+    await asyncio.sleep(0.02)
+    assert await cached.get() == "v1"
+    await asyncio.sleep(0.01)
+    assert cached.stats()["refreshFailures"] == 1
+    await cached.close()
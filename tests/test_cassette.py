@@ -0,0 +1,115 @@
+"""Tests for cassette recording and replay."""
+
+import asyncio
+import json
+import time
+
+import httpx
+import pytest
+
+from perplexica_mcp.cassette import Cassette
+from perplexica_mcp.server import ChatModel, PerplexicaClient, SearchRequest
+
+EVENTS = [
+    {"type": "sources", "data": [{"pageContent": "text", "metadata": {"title": "T", "url": "https://t"}}]},
+    {"type": "response", "data": "Hello "},
+    {"type": "response", "data": "wörld"},
+    {"type": "done"},
+]
+
+
+class _SlowStream(httpx.AsyncByteStream):
+    """A streamed search response that pauses between events."""
+
+    async def __aiter__(self):
+        for event in EVENTS:
+            await asyncio.sleep(0.05)
+            yield (json.dumps(event, ensure_ascii=False) + "\n").encode()
+
+
+def _client(cassette, inner=None):
+    client = PerplexicaClient("http://localhost:3000")
+    client.client = httpx.AsyncClient(transport=cassette.transport(inner))
+    return client
+
+
+async def _stream(client, query="q"):
+    chunks = []
+
+    async def on_chunk(chunk):
+        chunks.append(chunk)
+
+    result = await client.search_stream(SearchRequest(query=query, focusMode="webSearch", stream=True), on_chunk)
+    return result, chunks
+
+
+@pytest.mark.asyncio
+async def test_record_then_replay_streamed_search(tmp_path):
+    """Test that a recorded stream replays the same chunks with and without timing."""
+    path = str(tmp_path / "search.jsonl")
+    recorder = Cassette(path, mode="record")
+    upstream = httpx.MockTransport(lambda request: httpx.Response(200, stream=_SlowStream()))
+    recorded, recorded_chunks = await _stream(_client(recorder, upstream))
+    recorder.close()
+    assert recorder.stats()["interactions"] == 1
+
+    fast = Cassette(path)
+    start = time.perf_counter()
+    replayed, replayed_chunks = await _stream(_client(fast))
+    assert time.perf_counter() - start < 0.1
+    assert replayed == recorded
+    assert replayed_chunks == recorded_chunks == ["Hello ", "wörld"]
+
+    timed = Cassette(path, timing=True, speed=2.0)
+    start = time.perf_counter()
+    await _stream(_client(timed))
+    assert 0.09 < time.perf_counter() - start < 0.3
+
+    with pytest.raises(Exception, match="No recorded response"):
+        await _stream(_client(Cassette(path)), query="other")
+
+    similar = Cassette(path, match="options")
+    assert (await _stream(_client(similar), query="other"))[0] == recorded
+    assert similar.stats()["replayed"] == 1
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("compress_min_bytes", [0, 1])
+async def test_api_keys_are_not_recorded(tmp_path, compress_min_bytes):
+    """Test that custom OpenAI keys are redacted on disk and ignored when matching, with or without compression."""
+    path = tmp_path / "search.jsonl"
+    recorder = Cassette(str(path), mode="record")
+    upstream = httpx.MockTransport(lambda request: httpx.Response(200, json={"message": "Answer", "sources": []}))
+
+    def request(key):
+        chat_model = ChatModel(provider="custom_openai", name="m", customOpenAIKey=key)
+        return SearchRequest(query="q", focusMode="webSearch", chatModel=chat_model)
+
+    def client(cassette, inner=None):
+        client = _client(cassette, inner)
+        client.http.compress_min_bytes = compress_min_bytes
+        return client
+
+    recorded = await client(recorder, upstream).search(request("sk-secret"))
+    recorder.close()
+    assert "sk-secret" not in path.read_text()
+    body = json.loads(json.loads(path.read_text())["request"]["body"])
+    assert body["chatModel"]["customOpenAIKey"] == "[redacted]"
+
+    assert await client(Cassette(str(path))).search(request("sk-other")) == recorded
+
+
+def test_from_env(monkeypatch, tmp_path):
+    """Test that the cassette is only created when a mode is configured."""
+    assert Cassette.from_env() is None
+
+    monkeypatch.setenv("PERPLEXICA_CASSETTE_MODE", "record")
+    with pytest.raises(ValueError):
+        Cassette.from_env()
+
+    monkeypatch.setenv("PERPLEXICA_CASSETTE_PATH", str(tmp_path / "c.jsonl"))
+    monkeypatch.setenv("PERPLEXICA_CASSETTE_SPEED", "4")
+    cassette = Cassette.from_env()
+    assert cassette is not None
+    assert (cassette.mode, cassette.speed) == ("record", 4.0)
+    cassette.close()
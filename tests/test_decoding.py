@@ -0,0 +1,16 @@
+"""Tests for response decoding."""
+
+import httpx
+
+from perplexica_mcp.decoding import loads, response_json
+from perplexica_mcp.server import SearchResponse
+
+
+def test_response_json_matches_httpx():
+    """Test that the fast decoder agrees with httpx on non-ASCII content."""
+    payload = {"message": "Grüße ✓", "sources": [{"pageContent": "x" * 1000, "metadata": {"title": "é"}}]}
+    response = httpx.Response(200, json=payload)
+
+    assert response_json(response) == response.json() == payload
+    assert loads('{"type": "done"}') == {"type": "done"}
+    assert SearchResponse.model_validate(response_json(response)).sources[0].metadata["title"] == "é"
@@ -0,0 +1,119 @@
+"""Tests for multi-focus fan-out search."""
+
+import asyncio
+import time
+
+import pytest
+from mcp.types import CallToolRequest, CallToolRequestParams
+
+from perplexica_mcp.fanout import merge_sources, normalize_url
+from perplexica_mcp.server import PerplexicaServer, SearchResponse, SearchSource
+
+
+def _source(url, content="text"):
+    return SearchSource(pageContent=content, metadata={"title": url, "url": url})
+
+
+def test_normalize_url_ignores_trivial_differences():
+    """Test that scheme, host case, www, slashes, fragments and tracking params are ignored."""
+    assert normalize_url("http://WWW.Example.com:80/a/?b=2&utm_source=x&a=1#top") == "https://example.com/a?a=1&b=2"
+    assert normalize_url("https://example.com/a?a=1&b=2&fbclid=y") == "https://example.com/a?a=1&b=2"
+    assert normalize_url("https://example.com:8443/a") == "https://example.com:8443/a"
+    assert normalize_url("https://example.com/a") != normalize_url("https://example.com/b")
+
+
+def test_merge_sources_deduplicates_and_attributes():
+    """Test that sources shared between focus modes are merged and keep first-seen order."""
+    web = SearchResponse(message="", sources=[_source("https://a.com/x"), _source("https://b.com")])
+    academic = SearchResponse(
+        message="", sources=[_source("http://www.a.com/x/"), _source("", "no url"), _source("", "no url")]
+    )
+
+    merged = merge_sources([("webSearch", web), ("academicSearch", academic)])
+
+    assert [entry["source"].metadata["url"] for entry in merged] == ["https://a.com/x", "https://b.com", ""]
+    assert [entry["focusModes"] for entry in merged] == [
+        ["webSearch", "academicSearch"],
+        ["webSearch"],
+        ["academicSearch"],
+    ]
+
+
+@pytest.mark.asyncio
+async def test_multi_search_runs_modes_concurrently():
+    """Test that modes run at once, sources are merged and one failing mode is reported."""
+    server = PerplexicaServer()
+    server.cache = None
+    delays = {"webSearch": 0.2, "academicSearch": 0.2, "redditSearch": 0.2}
+
+    async def search(request):
+        await asyncio.sleep(delays[request.focusMode])
+        if request.focusMode == "redditSearch":
+            raise Exception("upstream down")
+        return SearchResponse(message=f"{request.focusMode} answer", sources=[_source("https://shared.com")])
+
+    server.client.search = search
+
+    start = time.perf_counter()
+    result = await server.call_tool(
+        CallToolRequest(
+            method="tools/call",
+            params=CallToolRequestParams(name="perplexica_multi_search", arguments={"query": "test query"}),
+        )
+    )
+    elapsed = time.perf_counter() - start
+
+    text = result.content[0].text
+    assert elapsed < 0.5
+    assert not result.isError
+    assert "webSearch answer" in text and "academicSearch answer" in text
+    assert "**redditSearch failed:** upstream down" in text
+    assert text.count("https://shared.com)") == 1
+    assert "(webSearch, academicSearch)" in text
+
+
+@pytest.mark.asyncio
+async def test_multi_search_deadline_keeps_finished_modes():
+    """Test that a deadline fails only the unfinished focus modes and cancels their searches."""
+    server = PerplexicaServer()
+    server.cache = None
+    cancelled = asyncio.Event()
+
+    async def search(request):
+        if request.focusMode == "redditSearch":
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+        return SearchResponse(message=f"{request.focusMode} answer", sources=[_source("https://shared.com")])
+
+    server.client.search = search
+    result = await server.call_tool(
+        CallToolRequest(
+            method="tools/call",
+            params=CallToolRequestParams(name="perplexica_multi_search", arguments={"query": "q", "deadline": 0.05}),
+        )
+    )
+
+    text = result.content[0].text
+    assert not result.isError
+    assert "webSearch answer" in text and "academicSearch answer" in text
+    assert "**redditSearch failed:** Deadline of 0.05s exceeded" in text
+    assert "https://shared.com" in text
+    assert cancelled.is_set()
+
+
+@pytest.mark.asyncio
+async def test_multi_search_rejects_unknown_focus_modes():
+    """Test that invalid focus mode lists are rejected without searching."""
+    server = PerplexicaServer()
+    result = await server.call_tool(
+        CallToolRequest(
+            method="tools/call",
+            params=CallToolRequestParams(
+                name="perplexica_multi_search", arguments={"query": "q", "focusModes": ["webSearch", "nope"]}
+            ),
+        )
+    )
+    assert result.isError
@@ -0,0 +1,106 @@
+"""Tests for output formats and size budgets."""
+
+import json
+from unittest.mock import AsyncMock
+
+import pytest
+from mcp.types import CallToolRequest, CallToolRequestParams
+
+from perplexica_mcp.formatting import OutputBudget
+from perplexica_mcp.server import PerplexicaServer, SearchRequest, SearchResponse, SearchSource
+
+
+def _call_request(name, arguments):
+    return CallToolRequest(method="tools/call", params=CallToolRequestParams(name=name, arguments=arguments))
+
+
+def _response(sources=3, answer="The answer."):
+    return SearchResponse(
+        message=answer,
+        sources=[
+            SearchSource(pageContent=f"Body {i} " * 50, metadata={"title": f"Title {i}", "url": f"https://e.com/{i}"})
+            for i in range(sources)
+        ],
+    )
+
+
+@pytest.mark.asyncio
+async def test_json_output_lists_answer_and_sources():
+    """Test that format=json returns the answer and sources without markdown."""
+    server = PerplexicaServer()
+    server.client.search = AsyncMock(return_value=_response())
+
+    result = await server.call_tool(
+        _call_request("perplexica_search", {"query": "q", "format": "json", "maxSources": 2, "snippetLength": 10})
+    )
+
+    document = json.loads(result.content[0].text)
+    assert document["query"] == "q" and document["answer"] == "The answer."
+    assert [s["url"] for s in document["sources"]] == ["https://e.com/0", "https://e.com/1"]
+    assert document["sources"][0]["snippet"] == "Body 0 Bod..."
+    assert document["sources"][0]["id"]
+    assert (document["omittedSources"], document["truncated"]) == (1, False)
+
+
+@pytest.mark.asyncio
+async def test_multi_search_json_output():
+    """Test that multi-focus JSON results hold answers and errors by focus mode, and merged sources."""
+    server = PerplexicaServer()
+
+    async def search(request):
+        if request.focusMode == "redditSearch":
+            raise Exception("reddit is down")
+        return _response(sources=2, answer=f"{request.focusMode} answer")
+
+    server.client.search = search
+    result = await server.call_tool(
+        _call_request(
+            "perplexica_multi_search",
+            {"query": "q", "focusModes": ["webSearch", "redditSearch", "academicSearch"], "format": "json"},
+        )
+    )
+
+    document = json.loads(result.content[0].text)
+    assert document["answers"] == {"webSearch": "webSearch answer", "academicSearch": "academicSearch answer"}
+    assert "reddit is down" in document["errors"]["redditSearch"]
+    assert [s["focusModes"] for s in document["sources"]] == [["webSearch", "academicSearch"]] * 2
+
+
+@pytest.mark.parametrize("output_format", ["markdown", "json"])
+def test_budget_bounds_every_result(output_format):
+    """Test that results stay within maxBytes, and JSON stays valid, wherever the cut falls."""
+    server = PerplexicaServer()
+    answer = 'Ünïcödé "quoted" \\ text\n' * 200
+    result = _response(sources=30, answer=answer)
+    request = SearchRequest(query="q", focusMode="webSearch")
+
+    for max_bytes in range(256, 12000, 97):
+        text = server._format_search_result(request, result, (), OutputBudget(max_bytes=max_bytes), output_format)
+        assert len(text.encode("utf-8")) <= max_bytes
+        if output_format == "json":
+            document = json.loads(text)
+            assert answer.startswith(document["answer"])
+            assert document["truncated"]
+        else:
+            assert text.endswith("*[Truncated to fit the output budget]*\n")
+
+
+def test_markdown_budget_keeps_default_layout():
+    """Test that limits on sources and snippets leave the markdown layout unchanged."""
+    server = PerplexicaServer()
+    request = SearchRequest(query="q", focusMode="webSearch")
+    text = server._format_search_result(request, _response(), (), OutputBudget(max_sources=1, snippet_length=4))
+
+    assert "1. [Title 0](https://e.com/0)\n   Body...\n\n" in text
+    assert "Title 1" not in text
+    assert text.endswith("*2 more sources not shown*\n")
+
+
+@pytest.mark.asyncio
+async def test_invalid_budget_is_rejected():
+    """Test that budgets too small to hold a result are refused."""
+    server = PerplexicaServer()
+    result = await server.call_tool(_call_request("perplexica_search", {"query": "q", "maxBytes": 10}))
+
+    assert result.isError
+    assert "maxBytes must be at least 256" in result.content[0].text
@@ -0,0 +1,92 @@
+"""Tests for hedged requests."""
+
+import asyncio
+
+import httpx
+import pytest
+
+from perplexica_mcp.backends import BackendPool
+from perplexica_mcp.hedging import Hedger, LatencyTracker
+from perplexica_mcp.server import PerplexicaClient, SearchRequest
+
+
+def test_latency_tracker_percentile():
+    """Test percentiles over the recent window and the minimum sample count."""
+    tracker = LatencyTracker(window=10)
+    for seconds in range(1, 21):
+        tracker.observe("webSearch", float(seconds))
+
+    assert tracker.percentile("webSearch", 0.5) == 15.0
+    assert tracker.percentile("webSearch", 0.95) == 20.0
+    assert tracker.percentile("webSearch", 0.5, min_samples=11) is None
+    assert tracker.percentile("academicSearch", 0.5) is None
+
+
+@pytest.mark.asyncio
+async def test_slow_call_is_hedged_and_loser_cancelled():
+    """Test that a call slower than the tracked percentile is raced against a backup."""
+    hedger = Hedger(min_delay=0.0, min_samples=1, budget=1.0)
+    hedger.latency.observe("webSearch", 0.01)
+    cancelled = asyncio.Event()
+    attempts = 0
+
+    async def call():
+        nonlocal attempts
+        attempts += 1
+        if attempts == 1:
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+        return attempts
+
+    assert await hedger.run("webSearch", call) == 2
+    await asyncio.wait_for(cancelled.wait(), 1)
+    assert hedger.stats() == {"calls": 1, "hedged": 1, "wins": 1, "overBudget": 0}
+
+
+@pytest.mark.asyncio
+async def test_hedging_respects_budget():
+    """Test that no backup request is sent once the budget is spent."""
+    hedger = Hedger(min_delay=0.0, min_samples=1, budget=0.0)
+    hedger.latency.observe("webSearch", 0.001)
+    attempts = 0
+
+    async def call():
+        nonlocal attempts
+        attempts += 1
+        await asyncio.sleep(0.02)
+        return attempts
+
+    assert await hedger.run("webSearch", call) == 1
+    assert hedger.stats()["hedged"] == 0
+    assert hedger.stats()["overBudget"] == 1
+
+
+@pytest.mark.asyncio
+async def test_pool_hedges_to_another_backend():
+    """Test that the backup request goes to a different backend."""
+
+    async def slow(request):
+        await asyncio.sleep(10)
+
+    def fast(request):
+        return httpx.Response(200, json={"message": request.url.host, "sources": []})
+
+    clients = []
+    for url, handler in (("http://a", slow), ("http://b", fast)):
+        client = PerplexicaClient(url)
+        client.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+        clients.append(client)
+    hedger = Hedger(min_delay=0.0, min_samples=1, budget=1.0)
+    hedger.latency.observe("webSearch", 0.01)
+    pool = BackendPool(clients, probe_interval=0, hedger=hedger)
+
+    result = await pool.search(SearchRequest(query="q", focusMode="webSearch"))
+
+    assert result.message == "b"
+    assert hedger.stats()["wins"] == 1
+    await asyncio.sleep(0)
+    assert pool.backends[0].outstanding == 0
+    await pool.close()
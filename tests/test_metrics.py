@@ -0,0 +1,101 @@
+"""Tests for metrics and the Prometheus exporter."""
+
+import json
+
+import httpx
+import pytest
+from mcp.types import CallToolRequest, CallToolRequestParams
+
+from perplexica_mcp.backends import BackendPool
+from perplexica_mcp.metrics import Histogram, Metrics, PrometheusExporter
+from perplexica_mcp.server import PerplexicaClient, PerplexicaServer, SearchRequest
+
+
+def test_histogram_quantiles():
+    """Test quantile estimation from bucket counts."""
+    histogram = Histogram(buckets=(1.0, 2.0, 4.0))
+    for value in (0.5, 0.5, 1.5, 3.0):
+        histogram.observe(value)
+
+    assert histogram.quantile(0.5) == 1.0
+    assert 2.0 < histogram.quantile(0.99) <= 4.0
+    assert list(histogram.cumulative()) == [("1", 2), ("2", 3), ("4", 4), ("+Inf", 4)]
+
+
+def test_prometheus_rendering():
+    """Test the Prometheus text output."""
+    metrics = Metrics()
+    metrics.tool_started("perplexica_search")
+    metrics.tool_finished("perplexica_search", 0.2, "ok", 100, focus_mode="webSearch", optimization_mode="speed")
+    metrics.upstream_status("/api/search", "200")
+
+    text = metrics.render_prometheus({"perplexica_mcp_cache_hits": 3})
+    assert 'perplexica_mcp_tool_calls_total{outcome="ok",tool="perplexica_search"} 1' in text
+    assert (
+        'perplexica_mcp_search_latency_seconds_bucket{focus_mode="webSearch",optimization_mode="speed",le="0.25"} 1'
+        in text
+    )
+    assert 'perplexica_mcp_upstream_responses_total{endpoint="/api/search",status="200"} 1' in text
+    assert 'perplexica_mcp_in_flight{tool="perplexica_search"} 0' in text
+    assert "perplexica_mcp_cache_hits 3" in text
+
+
+def test_exporter_writes_file(tmp_path):
+    """Test that the exporter atomically writes the metrics file."""
+    path = tmp_path / "metrics.prom"
+    exporter = PrometheusExporter(lambda: "perplexica_mcp_up 1\n", path=str(path))
+    exporter.write()
+    assert path.read_text() == "perplexica_mcp_up 1\n"
+
+
+@pytest.mark.asyncio
+async def test_stats_tool_reports_search_metrics():
+    """Test that perplexica_stats reports tool calls and upstream statuses."""
+
+    def handler(request):
+        return httpx.Response(200, json={"message": "Answer", "sources": []})
+
+    server = PerplexicaServer()
+    server.client.client = httpx.AsyncClient(
+        transport=httpx.MockTransport(handler), event_hooks={"response": [server.client._on_response]}
+    )
+
+    def call(name, arguments):
+        return server.call_tool(
+            CallToolRequest(method="tools/call", params=CallToolRequestParams(name=name, arguments=arguments))
+        )
+
+    await call("perplexica_search", {"query": "test", "focusMode": "academicSearch"})
+    result = await call("perplexica_stats", {})
+    stats = json.loads(result.content[0].text)
+
+    assert stats["toolCalls"] == [{"outcome": "ok", "tool": "perplexica_search", "value": 1}]
+    assert stats["searchLatency"][0]["focus_mode"] == "academicSearch"
+    assert stats["upstreamResponses"] == [{"endpoint": "/api/search", "status": "200", "value": 1}]
+    assert stats["cache"]["misses"] == 1
+    assert stats["backends"][0]["circuit"]["state"] == "closed"
+
+    prometheus = await call("perplexica_stats", {"format": "prometheus"})
+    assert "perplexica_mcp_cache_misses 1" in prometheus.content[0].text
+
+
+@pytest.mark.asyncio
+async def test_probes_and_warm_up_are_not_counted_as_upstream_responses():
+    """Test that health probes and warm-up requests stay out of the upstream status counts."""
+    metrics = Metrics()
+    client = PerplexicaClient("http://localhost:3000", metrics)
+    client.http.warm_connections = 2
+
+    def handler(request):
+        if request.url.path == "/api/models":
+            return httpx.Response(200, json={"chatModels": {}})
+        return httpx.Response(200, json={"message": "Answer", "sources": []})
+
+    client.client = httpx.AsyncClient(
+        transport=httpx.MockTransport(handler), event_hooks={"response": [client._on_response]}
+    )
+    await client.warm()
+    await BackendPool([client], probe_interval=0).probe()
+    await client.search(SearchRequest(query="q", focusMode="webSearch"))
+
+    assert metrics.snapshot()["upstreamResponses"] == [{"endpoint": "/api/search", "status": "200", "value": 1}]
@@ -0,0 +1,68 @@
+"""Tests for HTTP connection pool settings."""
+
+import gzip
+import json
+
+import httpx
+import pytest
+
+from benchmarks.stub import StubConfig, run_stub
+from perplexica_mcp.pool import HAS_HTTP2, HttpPool
+from perplexica_mcp.server import PerplexicaClient, SearchRequest
+
+
+@pytest.mark.asyncio
+async def test_warm_connections_are_reused(monkeypatch):
+    """Test that warmed connections serve the following searches."""
+    monkeypatch.setenv("PERPLEXICA_WARM_CONNECTIONS", "2")
+    monkeypatch.setenv("PERPLEXICA_POOL_MAX_KEEPALIVE", "4")
+    async with run_stub(StubConfig(sources=1)) as base_url:
+        client = PerplexicaClient(base_url)
+        try:
+            await client.warm()
+            for i in range(4):
+                await client.search(SearchRequest(query=f"q{i}", focusMode="webSearch"))
+        finally:
+            await client.close()
+
+    stats = client.http.stats()
+    assert stats["warmed"] == 2
+    assert stats["newConnections"] == 2
+    assert stats["reusedResponses"] == 4
+    assert stats["maxKeepalive"] == 4
+    assert stats["bytesDecoded"] > 0
+
+
+@pytest.mark.asyncio
+async def test_compressed_request_and_response_bodies(monkeypatch):
+    """Test that large request bodies are gzipped and compressed responses are counted on the wire."""
+    monkeypatch.setenv("PERPLEXICA_COMPRESS_REQUESTS_MIN_BYTES", "200")
+    monkeypatch.setenv("PERPLEXICA_ACCEPT_ENCODING", "gzip")
+    received = []
+
+    def handler(request):
+        body = request.content
+        if request.headers.get("content-encoding") == "gzip":
+            body = gzip.decompress(body)
+        received.append((request.headers.get("content-encoding"), request.headers["accept-encoding"], json.loads(body)))
+        payload = json.dumps({"message": "a" * 5000, "sources": []}).encode()
+        return httpx.Response(200, content=gzip.compress(payload), headers={"Content-Encoding": "gzip"})
+
+    client = PerplexicaClient("http://perplexica")
+    client.client = httpx.AsyncClient(transport=httpx.MockTransport(handler), **client.http.client_options())
+    await client.search(SearchRequest(query="short", focusMode="webSearch"))
+    await client.search(SearchRequest(query="long", focusMode="webSearch", history=[["human", "x" * 500]]))
+    await client.close()
+
+    assert [(encoding, accept) for encoding, accept, _ in received] == [(None, "gzip"), ("gzip", "gzip")]
+    assert received[1][2]["history"] == [["human", "x" * 500]]
+    stats = client.http.stats()
+    assert stats["compressedRequests"] == 1
+    assert stats["bytesReceived"] < stats["bytesDecoded"]
+
+
+@pytest.mark.skipif(HAS_HTTP2, reason="h2 is installed")
+def test_http2_needs_h2():
+    """Test that asking for HTTP/2 without h2 fails clearly."""
+    with pytest.raises(ValueError, match="h2"):
+        HttpPool(http2=True)
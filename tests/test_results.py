@@ -0,0 +1,131 @@
+"""Tests for search results served as MCP resources."""
+
+import json
+from unittest.mock import AsyncMock
+
+import pytest
+from mcp.server.lowlevel import NotificationOptions
+from mcp.shared.memory import create_connected_server_and_client_session
+from pydantic import AnyUrl
+
+from perplexica_mcp.results import ResultStore, result_uri
+from perplexica_mcp.server import PerplexicaServer, SearchResponse, SearchSource
+from perplexica_mcp.sources import SourceStore
+
+
+def _sources(count):
+    return [{"title": f"Title {i}", "url": f"https://e.com/{i}", "id": f"id{i}"} for i in range(count)]
+
+
+def test_store_is_bounded_by_entries_and_bytes():
+    """Test that the oldest results are evicted once either limit is reached."""
+    store = ResultStore(max_entries=2)
+    first = store.add("q1", ["webSearch"], "a", [])
+    store.add("q2", ["webSearch"], "b", [])
+    store.add("q3", ["webSearch"], "c", [])
+    assert store.get(first) is None
+    assert [entry["query"] for _, entry in store.recent()] == ["q3", "q2"]
+
+    store = ResultStore(max_bytes=20_000)
+    ids = [store.add(f"q{i}", ["webSearch"], "x" * 5_000, []) for i in range(5)]
+    assert store.stats()["bytes"] <= 20_000
+    assert store.get(ids[0]) is None and store.get(ids[-1]) is not None
+    assert store.add("huge", ["webSearch"], "x" * 30_000, []) is None
+
+
+def test_read_answer_ranges_and_source_pages():
+    """Test that answers are read in character ranges and source lists in pages."""
+    sources = SourceStore()
+    source_ids = sources.add([("Full text of the first source", {"title": "Title 0", "url": "https://e.com/0"})])
+    store = ResultStore()
+    result_id = store.add(
+        "q", ["webSearch"], "0123456789", [dict(_sources(45)[0], id=source_ids[0])] + _sources(45)[1:]
+    )
+
+    assert store.read(result_uri(result_id, "answer"))[1] == "0123456789"
+    mime_type, text, meta = store.read(result_uri(result_id, "answer") + "?offset=3&length=4")
+    assert (mime_type, text, meta) == ("text/markdown", "3456", {"offset": 3, "end": 7, "total": 10})
+
+    page = json.loads(store.read(result_uri(result_id, "sources") + "?page=3")[1])
+    assert (page["total"], page["page"], len(page["sources"])) == (45, 3, 5)
+    assert "nextPage" not in page
+    assert page["sources"][0]["number"] == 41
+    assert page["sources"][0]["uri"] == result_uri(result_id, "sources", 41)
+
+    assert store.read(result_uri(result_id, "sources", 1) + "?length=4", sources)[1] == "Full"
+    with pytest.raises(ValueError, match="no longer stored"):
+        store.read(result_uri(result_id, "sources", 2), sources)
+    for uri in (result_uri(result_id, "sources", 46), result_uri("missing", "answer"), "https://e.com/results/x/y"):
+        with pytest.raises(ValueError):
+            store.read(uri, sources)
+
+
+@pytest.mark.asyncio
+async def test_links_format_returns_summary_and_readable_resources():
+    """Test that a search in the links format is read back through MCP resource requests."""
+    server = PerplexicaServer()
+    server.cache = None
+    answer = "Long answer. " * 200
+    server.client.search = AsyncMock(
+        return_value=SearchResponse(
+            message=answer,
+            sources=[
+                SearchSource(pageContent=f"Source text {i}", metadata={"title": f"T{i}", "url": f"https://e.com/{i}"})
+                for i in range(30)
+            ],
+        )
+    )
+
+    async with create_connected_server_and_client_session(server.server) as session:
+        result = await session.call_tool("perplexica_search", {"query": "big question", "format": "links"})
+        summary, answer_link, sources_link = result.content
+        assert summary.type == "text" and len(summary.text) < 600
+        assert "**Sources:** 30" in summary.text
+        assert (answer_link.type, sources_link.type) == ("resource_link", "resource_link")
+
+        read = await session.read_resource(answer_link.uri)
+        assert read.contents[0].text == answer
+
+        page = json.loads((await session.read_resource(sources_link.uri)).contents[0].text)
+        assert page["nextPage"] == 2
+        assert [s["url"] for s in page["sources"][:2]] == ["https://e.com/0", "https://e.com/1"]
+
+        source = await session.read_resource(AnyUrl(page["sources"][1]["uri"]))
+        assert source.contents[0].text == "Source text 1"
+
+        listed = await session.list_resources()
+        assert str(answer_link.uri) in [str(resource.uri) for resource in listed.resources]
+        templates = await session.list_resource_templates()
+        assert len(templates.resourceTemplates) == 3
+
+    assert server.stats()["results"]["reads"] == 3
+
+
+@pytest.mark.asyncio
+async def test_links_format_needs_the_result_store(monkeypatch):
+    """Test that resources are not offered when the result store is disabled."""
+    monkeypatch.setenv("PERPLEXICA_RESULT_STORE_SIZE", "0")
+    server = PerplexicaServer()
+    server.client.search = AsyncMock(return_value=SearchResponse(message="Answer", sources=[]))
+
+    assert server.server.get_capabilities(NotificationOptions(), {}).resources is None
+    async with create_connected_server_and_client_session(server.server) as session:
+        result = await session.call_tool("perplexica_search", {"query": "q", "format": "links"})
+
+    assert result.isError
+    assert "result store" in result.content[0].text
+
+
+@pytest.mark.asyncio
+async def test_results_are_listed_only_to_the_client_that_searched():
+    """Test that clients sharing one server do not see each other's results in resources/list."""
+    server = PerplexicaServer()
+    server.client.search = AsyncMock(return_value=SearchResponse(message="Private answer", sources=[]))
+
+    async with create_connected_server_and_client_session(server.server) as owner:
+        result = await owner.call_tool("perplexica_search", {"query": "private question", "format": "links"})
+        answer_uri = str(result.content[1].uri)
+        assert answer_uri in [str(resource.uri) for resource in (await owner.list_resources()).resources]
+
+        async with create_connected_server_and_client_session(server.server) as other:
+            assert (await other.list_resources()).resources == []
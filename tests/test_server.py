@@ -1,17 +1,42 @@
 """Tests for the Perplexica MCP server."""
 
+import asyncio
+import json
 from unittest.mock import AsyncMock, patch
 
+import httpx
 import pytest
+from mcp.types import CallToolRequest, CallToolRequestParams, InitializedNotification
 
 from perplexica_mcp.server import (
     PerplexicaClient,
+    PerplexicaServer,
     SearchRequest,
     SearchResponse,
     SearchSource,
 )
 
 
+def _call_request(name, arguments=None):
+    """Build a CallToolRequest for the given tool."""
+    return CallToolRequest(method="tools/call", params=CallToolRequestParams(name=name, arguments=arguments))
+
+
+def _stream_transport(chunks):
+    """Build a mock transport that streams Perplexica's line-delimited events."""
+    events = [{"type": "init", "data": "Stream connected"}]
+    events.append({"type": "sources", "data": [{"pageContent": "Body", "metadata": {"title": "T", "url": "u"}}]})
+    events.extend({"type": "response", "data": chunk} for chunk in chunks)
+    events.append({"type": "done"})
+    body = "".join(json.dumps(event) + "\n" for event in events).encode()
+
+    def handler(request):
+        assert json.loads(request.content)["stream"] is True
+        return httpx.Response(200, content=body)
+
+    return httpx.MockTransport(handler)
+
+
 @pytest.mark.asyncio
 async def test_perplexica_client_search():
     """Test the PerplexicaClient search functionality."""
@@ -130,3 +155,248 @@ def test_search_response_parsing():
     assert len(response.sources) == 2
     assert response.sources[0].pageContent == "Content 1"
     assert response.sources[1].metadata["title"] == "Title 2"
+
+
+@pytest.mark.asyncio
+async def test_search_uses_cache():
+    """Test that repeated searches are served from the cache unless bypassed."""
+    server = PerplexicaServer()
+    server.client.search = AsyncMock(return_value=SearchResponse(message="Cached", sources=[]))
+
+    arguments = {"query": "test query", "focusMode": "webSearch"}
+    first = await server.call_tool(_call_request("perplexica_search", arguments))
+    second = await server.call_tool(_call_request("perplexica_search", dict(arguments, query="Test  Query")))
+    assert not first.isError
+    assert "Cached" in second.content[0].text
+    assert server.client.search.await_count == 1
+
+    await server.call_tool(_call_request("perplexica_search", dict(arguments, bypassCache=True)))
+    assert server.client.search.await_count == 2
+    assert server.cache.stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_perplexica_client_search_stream():
+    """Test parsing of streamed search responses."""
+    client = PerplexicaClient("http://localhost:3000")
+    client.client = httpx.AsyncClient(transport=_stream_transport(["Hello", ", world"]))
+    received = []
+
+    async def on_chunk(chunk):
+        received.append(chunk)
+
+    request = SearchRequest(query="test query", focusMode="webSearch", stream=True)
+    result = await client.search_stream(request, on_chunk)
+
+    assert received == ["Hello", ", world"]
+    assert result.message == "Hello, world"
+    assert result.sources[0].metadata["title"] == "T"
+    await client.close()
+
+
+@pytest.mark.asyncio
+async def test_streamed_search_sends_progress_notifications():
+    """Test that streamed chunks reach the MCP client as progress notifications."""
+    from mcp.shared.memory import create_connected_server_and_client_session
+
+    server = PerplexicaServer()
+    server.cache = None
+    server.client.client = httpx.AsyncClient(transport=_stream_transport(["Hello", ", world"]))
+    progress = []
+
+    async def on_progress(value, total, message):
+        progress.append((value, message))
+
+    async with create_connected_server_and_client_session(server.server) as session:
+        tools = await session.list_tools()
+        assert "perplexica_search" in [tool.name for tool in tools.tools]
+
+        result = await session.call_tool(
+            "perplexica_search", {"query": "test query", "stream": True}, progress_callback=on_progress
+        )
+
+    assert not result.isError
+    assert "Hello, world" in result.content[0].text
+    assert progress == [(5.0, "Hello"), (12.0, ", world")]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_searches_share_one_upstream_call():
+    """Test that identical searches in flight at the same time make a single upstream request."""
+    server = PerplexicaServer()
+    server.cache = None
+    calls = 0
+
+    async def search(request):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return SearchResponse(message=f"Answer to {request.query}", sources=[])
+
+    server.client.search = search
+    results = await asyncio.gather(
+        *(server.call_tool(_call_request("perplexica_search", {"query": "same"})) for _ in range(3))
+    )
+
+    assert calls == 1
+    assert all("Answer to same" in result.content[0].text for result in results)
+    assert server.inflight.stats() == {"leaders": 1, "coalesced": 2, "inFlight": 0}
+
+
+@pytest.mark.asyncio
+async def test_batch_search_keeps_order_and_isolates_failures():
+    """Test that batch results keep input order and one failure does not fail the batch."""
+    server = PerplexicaServer()
+    server.cache = None
+    in_flight = 0
+    peak = 0
+
+    async def search(request):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        if request.query == "bad":
+            raise Exception("upstream failure")
+        return SearchResponse(message=f"Answer to {request.query}", sources=[])
+
+    server.client.search = search
+    searches = [{"query": "one"}, {"query": "bad"}, {"query": "three"}, {"query": "four"}]
+    result = await server.call_tool(
+        _call_request("perplexica_batch_search", {"searches": searches, "maxConcurrency": 2})
+    )
+
+    assert not result.isError
+    texts = [content.text for content in result.content]
+    assert "Answer to one" in texts[0]
+    assert "failed" in texts[1] and "upstream failure" in texts[1]
+    assert "Answer to three" in texts[2]
+    assert "Answer to four" in texts[3]
+    assert peak == 2
+
+
+@pytest.mark.asyncio
+async def test_get_models_is_cached():
+    """Test that the formatted model list is fetched once and then served locally."""
+    server = PerplexicaServer()
+    server.client.get_models = AsyncMock(
+        return_value={"chatModels": {"openai": {"gpt-4o-mini": {"displayName": "GPT 4 omni mini"}}}}
+    )
+
+    first = await server.call_tool(_call_request("perplexica_get_models"))
+    second = await server.call_tool(_call_request("perplexica_get_models"))
+
+    assert "GPT 4 omni mini" in first.content[0].text
+    assert first.content[0].text == second.content[0].text
+    assert server.client.get_models.await_count == 1
+    await server.cleanup()
+
+
+class _HangingStream(httpx.AsyncByteStream):
+    """A streamed response body that sends one event and then stalls."""
+
+    def __init__(self):
+        self.closed = asyncio.Event()
+
+    async def __aiter__(self):
+        yield (json.dumps({"type": "response", "data": "partial"}) + "\n").encode()
+        await asyncio.Event().wait()
+
+    async def aclose(self):
+        self.closed.set()
+
+
+def _hanging_server():
+    """Build a server whose upstream never finishes streaming an answer."""
+    server = PerplexicaServer()
+    server.cache = None
+    body = _HangingStream()
+    server.client.client = httpx.AsyncClient(
+        transport=httpx.MockTransport(lambda request: httpx.Response(200, stream=body))
+    )
+    return server, body
+
+
+@pytest.mark.asyncio
+async def test_deadline_aborts_upstream_stream():
+    """Test that a call past its deadline returns an error and closes the upstream stream."""
+    server, body = _hanging_server()
+
+    result = await server.call_tool(
+        _call_request("perplexica_search", {"query": "test query", "stream": True, "deadline": 0.05})
+    )
+
+    assert result.isError
+    assert "Deadline of 0.05s exceeded" in result.content[0].text
+    await asyncio.wait_for(body.closed.wait(), 1)
+    outcomes = {call["outcome"] for call in server.metrics.snapshot()["toolCalls"]}
+    assert outcomes == {"deadline_exceeded"}
+    assert {"endpoint": "/api/search", "status": "cancelled", "value": 1} in server.metrics.snapshot()[
+        "upstreamResponses"
+    ]
+
+    invalid = await server.call_tool(_call_request("perplexica_search", {"query": "test query", "deadline": -1}))
+    assert invalid.isError
+    assert "deadline must be a positive number" in invalid.content[0].text
+
+
+@pytest.mark.asyncio
+async def test_batch_deadline_keeps_finished_searches():
+    """Test that a batch deadline fails only the unfinished searches and cancels them."""
+    server = PerplexicaServer()
+    server.cache = None
+    cancelled = asyncio.Event()
+
+    async def search(request):
+        if request.query == "slow":
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+        return SearchResponse(message=f"Answer to {request.query}", sources=[])
+
+    server.client.search = search
+    result = await server.call_tool(
+        _call_request("perplexica_batch_search", {"searches": [{"query": "fast"}, {"query": "slow"}], "deadline": 0.05})
+    )
+
+    assert not result.isError
+    assert "Answer to fast" in result.content[0].text
+    assert "failed" in result.content[1].text and "Deadline of 0.05s exceeded" in result.content[1].text
+    assert cancelled.is_set()
+
+
+@pytest.mark.asyncio
+async def test_cancelled_call_aborts_upstream_stream():
+    """Test that cancelling a tool call, as an MCP cancellation does, closes the upstream stream."""
+    server, body = _hanging_server()
+
+    task = asyncio.create_task(
+        server.call_tool(_call_request("perplexica_search", {"query": "test query", "stream": True}))
+    )
+    await asyncio.sleep(0.05)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    await asyncio.wait_for(body.closed.wait(), 1)
+    assert server.metrics.snapshot()["toolCalls"] == [{"outcome": "cancelled", "tool": "perplexica_search", "value": 1}]
+    assert server.inflight.stats()["inFlight"] == 0
+
+
+@pytest.mark.asyncio
+async def test_startup_defers_http_client_until_initialized():
+    """Test that the HTTP client is only created once the first session is initialized."""
+    server = PerplexicaServer()
+    assert server.client._client is None
+    assert await server.list_tools() is await server.list_tools()
+
+    await server.startup(warm_up=False)
+    assert server._warming is None
+    initialized = server.server.notification_handlers[InitializedNotification]
+    await initialized(InitializedNotification(method="notifications/initialized"))
+    await server._warming
+    assert server.client._client is not None
+    await server.cleanup()
@@ -0,0 +1,99 @@
+"""Tests for server-side conversation sessions."""
+
+from unittest.mock import patch
+
+import pytest
+from mcp.shared.memory import create_connected_server_and_client_session
+from mcp.types import CallToolRequest, CallToolRequestParams
+
+from perplexica_mcp.server import PerplexicaServer, SearchResponse
+from perplexica_mcp.sessions import SessionStore
+
+
+def _turn(i, answer="answer"):
+    return [["human", f"question {i}"], ["assistant", answer]]
+
+
+def test_history_is_compacted_by_turns_and_bytes():
+    """Test that only the newest turns that fit the limits are kept."""
+    store = SessionStore(max_turns=3, max_bytes=100)
+    for i in range(5):
+        store.append("s", _turn(i))
+    assert [message for role, message in store.history("s") if role == "human"] == [
+        "question 2",
+        "question 3",
+        "question 4",
+    ]
+
+    store.append("s", _turn(5, "x" * 80))
+    assert store.history("s") == _turn(5, "x" * 80)
+    assert store.stats()["compactedTurns"] == 5
+
+
+def test_idle_sessions_are_evicted():
+    """Test that sessions unused for longer than the idle limit are forgotten."""
+    store = SessionStore(idle_seconds=60, max_sessions=2)
+    with patch("perplexica_mcp.sessions.time.monotonic", return_value=100.0):
+        store.append("old", _turn(1))
+    with patch("perplexica_mcp.sessions.time.monotonic", return_value=150.0):
+        store.append("new", _turn(2))
+    with patch("perplexica_mcp.sessions.time.monotonic", return_value=170.0):
+        assert store.history("old") == []
+        assert store.history("new") == _turn(2)
+        store.append("a", _turn(3))
+        store.append("b", _turn(4))
+
+    assert store.stats()["sessions"] == 2
+    assert store.stats()["evicted"] == 2
+
+
+@pytest.mark.asyncio
+async def test_search_sends_stored_history_and_delta():
+    """Test that a session's history is sent upstream and extended by each search."""
+    server = PerplexicaServer()
+    server.cache = None
+    sent = []
+
+    async def search(request):
+        sent.append(request.history)
+        return SearchResponse(message=f"Answer to {request.query}", sources=[])
+
+    server.client.search = search
+
+    async def call(arguments):
+        request = CallToolRequest(
+            method="tools/call", params=CallToolRequestParams(name="perplexica_search", arguments=arguments)
+        )
+        return await server.call_tool(request)
+
+    await call({"query": "first", "sessionId": "chat"})
+    await call({"query": "second", "sessionId": "chat", "history": [["human", "aside"]]})
+    await call({"query": "third", "sessionId": "chat"})
+
+    assert sent[0] is None
+    assert sent[1] == [["human", "first"], ["assistant", "Answer to first"], ["human", "aside"]]
+    assert sent[2] == sent[1] + [["human", "second"], ["assistant", "Answer to second"]]
+    assert server.stats()["sessions"]["turns"] == 3
+
+
+@pytest.mark.asyncio
+async def test_same_session_id_is_separate_per_client():
+    """Test that clients sharing one server keep separate histories under the same sessionId."""
+    server = PerplexicaServer()
+    server.cache = None
+    sent = []
+
+    async def search(request):
+        sent.append(request.history)
+        return SearchResponse(message=f"Answer to {request.query}", sources=[])
+
+    server.client.search = search
+
+    async with create_connected_server_and_client_session(server.server) as first:
+        async with create_connected_server_and_client_session(server.server) as second:
+            await first.call_tool("perplexica_search", {"query": "mine", "sessionId": "chat"})
+            await second.call_tool("perplexica_search", {"query": "theirs", "sessionId": "chat"})
+            await first.call_tool("perplexica_search", {"query": "again", "sessionId": "chat"})
+
+    assert sent[1] is None
+    assert sent[2] == [["human", "mine"], ["assistant", "Answer to mine"]]
@@ -0,0 +1,86 @@
+"""Tests for the approximate search cache."""
+
+import time
+from unittest.mock import AsyncMock
+
+import pytest
+from mcp.types import CallToolRequest, CallToolRequestParams
+
+from perplexica_mcp.server import PerplexicaServer, SearchRequest, SearchResponse
+from perplexica_mcp.similarity import SimilarQueryCache, jaccard, query_terms
+
+
+def _request(query, **fields):
+    return SearchRequest(query=query, focusMode=fields.pop("focusMode", "webSearch"), **fields).model_dump()
+
+
+def test_query_terms_ignore_wording():
+    """Test that case, order, punctuation, function words and plurals are ignored."""
+    assert query_terms("Latest quantum computing news") == query_terms("quantum computing: the latest news?")
+    assert query_terms("What are the best GPUs") == query_terms("best GPU")
+    assert jaccard(query_terms("rust async runtime"), query_terms("rust async runtimes comparison")) == 0.75
+
+
+def test_similar_queries_hit_within_their_partition():
+    """Test that rewordings hit, while other focus modes and dissimilar queries miss."""
+    cache = SimilarQueryCache(threshold=0.7)
+    payload = {"message": "Answer", "sources": []}
+    cache.set(_request("latest quantum computing news"), payload)
+
+    hit = cache.get(_request("quantum computing latest news"))
+    assert hit is not None
+    assert hit[0] is payload
+    assert hit[1:] == ("latest quantum computing news", 1.0)
+
+    assert cache.get(_request("quantum computing latest news", focusMode="academicSearch")) is None
+    assert cache.get(_request("latest quantum physics news")) is None
+    assert cache.stats()["rejected"] == 1
+
+
+def test_size_and_ttl_are_bounded():
+    """Test that the index keeps at most max_entries and drops expired entries."""
+    cache = SimilarQueryCache(max_entries=2, focus_ttls={"redditSearch": 0.01})
+    for topic in ("alpha", "beta", "gamma"):
+        cache.set(_request(f"{topic} release notes"), {"message": topic, "sources": []})
+    assert cache.stats()["entries"] == 2
+    assert cache.get(_request("alpha release notes")) is None
+
+    cache.set(_request("delta release notes", focusMode="redditSearch"), {"message": "delta", "sources": []})
+    time.sleep(0.02)
+    assert cache.get(_request("release notes delta", focusMode="redditSearch")) is None
+
+
+def test_lookup_stays_fast_as_index_grows():
+    """Test that lookups only examine matching buckets."""
+    cache = SimilarQueryCache(max_entries=5000)
+    for i in range(5000):
+        cache.set(_request(f"topic{i} subject{i % 97} overview"), {"message": str(i), "sources": []})
+
+    requests = [_request(f"overview of subject{i % 97} topic{i}") for i in range(0, 5000, 50)]
+    start = time.perf_counter()
+    for request in requests:
+        assert cache.get(request) is not None
+    assert (time.perf_counter() - start) / len(requests) < 0.001
+
+
+@pytest.mark.asyncio
+async def test_server_marks_approximate_hits(monkeypatch):
+    """Test that a reworded query is answered from the cache with a marker."""
+    monkeypatch.setenv("PERPLEXICA_SIMILAR_CACHE_ENABLED", "true")
+    server = PerplexicaServer()
+    server.client.search = AsyncMock(return_value=SearchResponse(message="Qubits!", sources=[]))
+
+    async def call(query):
+        request = CallToolRequest(
+            method="tools/call", params=CallToolRequestParams(name="perplexica_search", arguments={"query": query})
+        )
+        return (await server.call_tool(request)).content[0].text
+
+    first = await call("latest quantum computing news")
+    second = await call("Quantum computing: latest news")
+
+    assert "Approximate cache hit" not in first
+    assert 'similar query "latest quantum computing news" (similarity 1.00)' in second
+    assert "Qubits!" in second
+    assert server.client.search.await_count == 1
+    assert server.stats()["similarCache"]["hits"] == 1
@@ -0,0 +1,96 @@
+"""Tests for single-flight call coalescing."""
+
+import asyncio
+
+import pytest
+
+from perplexica_mcp.singleflight import SingleFlight
+
+
+@pytest.mark.asyncio
+async def test_concurrent_calls_share_one_result():
+    """Test that identical concurrent calls run the function once."""
+    flight = SingleFlight()
+    calls = 0
+    release = asyncio.Event()
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return "answer"
+
+    tasks = [asyncio.create_task(flight.do("key", fetch)) for _ in range(5)]
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await asyncio.gather(*tasks) == ["answer"] * 5
+    assert calls == 1
+    assert flight.stats() == {"leaders": 1, "coalesced": 4, "inFlight": 0}
+
+
+@pytest.mark.asyncio
+async def test_cancelling_one_waiter_keeps_shared_call():
+    """Test that the shared call survives until its last waiter is cancelled."""
+    flight = SingleFlight()
+    release = asyncio.Event()
+    started = asyncio.Event()
+    cancelled = asyncio.Event()
+
+    async def fetch():
+        started.set()
+        try:
+            await release.wait()
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+        return "answer"
+
+    first = asyncio.create_task(flight.do("key", fetch))
+    second = asyncio.create_task(flight.do("key", fetch))
+    await started.wait()
+
+    first.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await first
+    release.set()
+    assert await second == "answer"
+    assert not cancelled.is_set()
+
+    release.clear()
+    started.clear()
+    third = asyncio.create_task(flight.do("key", fetch))
+    await started.wait()
+    third.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await third
+    await asyncio.sleep(0)
+    assert cancelled.is_set()
+
+
+@pytest.mark.asyncio
+async def test_retry_after_cancel_starts_a_new_call():
+    """Test that a caller arriving while an abandoned call is still cancelling does not join it."""
+    flight = SingleFlight()
+    started = asyncio.Event()
+    calls = 0
+
+    async def fetch():
+        nonlocal calls
+        calls += 1
+        started.set()
+        try:
+            await asyncio.sleep(0.01 if calls > 1 else 10)
+        except asyncio.CancelledError:
+            await asyncio.sleep(0.01)
+            raise
+        return "answer"
+
+    first = asyncio.create_task(flight.do("key", fetch))
+    await started.wait()
+    first.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await first
+
+    assert await flight.do("key", fetch) == "answer"
+    assert calls == 2
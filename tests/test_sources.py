@@ -0,0 +1,107 @@
+"""Tests for the source document store."""
+
+import re
+from unittest.mock import AsyncMock
+
+import pytest
+from mcp.types import CallToolRequest, CallToolRequestParams
+
+from perplexica_mcp.server import PerplexicaServer, SearchResponse, SearchSource
+from perplexica_mcp.sources import SourceStore, source_id
+
+LONG = "Full document text. " * 100
+
+
+def test_store_deduplicates_and_evicts_by_size():
+    """Test that identical documents share an id and memory stays within its limit."""
+    store = SourceStore(max_bytes=3000)
+    first = store.add([(LONG, {"title": "A", "url": "https://a"})])
+    second = store.add([(LONG, {"title": "A again", "url": "https://a"}), ("short", {"url": "https://b"})])
+
+    assert first[0] == second[0] == source_id(LONG, "https://a")
+    assert store.get(first[0])["title"] == "A"
+    assert store.stats()["duplicates"] == 1
+
+    store.add([(LONG.upper(), {"url": "https://c"})])
+    assert store.get(first[0]) is None
+    assert store.stats()["evictions"] == 2
+    assert store.stats()["bytes"] <= 3000
+
+
+def test_same_text_at_different_urls_keeps_each_url():
+    """Test that pages with the same text get their own ids and metadata."""
+    store = SourceStore()
+    ids = store.add([("", {"url": "http://a"}), ("", {"url": "http://b"}), ("", {"url": "https://www.a/"})])
+
+    assert ids[0] != ids[1]
+    assert ids[2] == ids[0]
+    assert [store.get(key)["url"] for key in ids[:2]] == ["http://a", "http://b"]
+
+
+def test_store_sqlite_tier(tmp_path):
+    """Test that documents survive a restart and the disk tier is pruned by size."""
+    path = str(tmp_path / "sources.db")
+    store = SourceStore(path=path, max_disk_bytes=len(LONG) + 10)
+    ids = store.add([(LONG, {"title": "A", "url": "https://a"})])
+    store.add([("x" * 10, {"title": "B", "url": "https://b"})])
+    store.close()
+
+    reopened = SourceStore(path=path)
+    assert reopened.get(ids[0])["content"] == LONG
+    assert reopened.stats()["diskHits"] == 1
+    reopened.close()
+
+    pruned = SourceStore(path=path, max_disk_bytes=len(LONG) + 10)
+    pruned.add([("y" * 20, {"url": "https://c"})])
+    assert pruned.get(ids[0]) is None
+    pruned.close()
+
+
+def test_disk_tier_tracks_its_size_and_prunes_below_the_limit(tmp_path):
+    """Test that the disk size survives a restart and pruning frees room for later adds."""
+    path = str(tmp_path / "sources.db")
+    store = SourceStore(path=path, max_disk_bytes=1000)
+    store.add([("a" * 100, {"url": f"https://e.com/{i}"}) for i in range(9)])
+    store.add([("a" * 100, {"url": "https://e.com/0"})])
+    assert store.stats()["diskBytes"] == 900
+    store.close()
+
+    reopened = SourceStore(path=path, max_disk_bytes=1000)
+    assert reopened.stats()["diskBytes"] == 900
+    reopened.add([("b" * 200, {"url": "https://e.com/new"})])
+    assert reopened.stats()["diskBytes"] <= 900
+    assert reopened.get(reopened.add([("b" * 200, {"url": "https://e.com/new"})])[0]) is not None
+    assert reopened._db.execute("SELECT SUM(size) FROM sources").fetchone()[0] == reopened.stats()["diskBytes"]
+    reopened.close()
+
+
+@pytest.mark.asyncio
+async def test_get_source_returns_full_and_ranged_text():
+    """Test that search results carry source ids that perplexica_get_source resolves."""
+    server = PerplexicaServer()
+    server.client.search = AsyncMock(
+        return_value=SearchResponse(
+            message="Answer",
+            sources=[SearchSource(pageContent=LONG, metadata={"title": "Doc", "url": "https://example.com"})],
+        )
+    )
+
+    def call(name, arguments):
+        return server.call_tool(
+            CallToolRequest(method="tools/call", params=CallToolRequestParams(name=name, arguments=arguments))
+        )
+
+    result = await call("perplexica_search", {"query": "test query"})
+    found = re.search(r"source id: `([0-9a-f]+)`", result.content[0].text)
+    assert found is not None
+
+    full = await call("perplexica_get_source", {"id": found.group(1)})
+    assert full.content[0].text.endswith(LONG)
+    assert f"0-{len(LONG)} of {len(LONG)}" in full.content[0].text
+
+    ranged = await call("perplexica_get_source", {"id": found.group(1), "offset": 5, "length": 8})
+    assert ranged.content[0].text.endswith("document")
+
+    missing = await call("perplexica_get_source", {"id": "0" * 16})
+    assert missing.isError
+    assert server.client.search.await_count == 1
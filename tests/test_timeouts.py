@@ -0,0 +1,56 @@
+"""Tests for adaptive search timeouts."""
+
+import httpx
+import pytest
+
+from perplexica_mcp.server import PerplexicaClient, SearchRequest
+from perplexica_mcp.timeouts import AdaptiveTimeouts
+
+
+def test_first_byte_limit_adapts_within_floor_and_ceiling():
+    """Test that the limit follows recent latency per mode and stays clamped."""
+    timeouts = AdaptiveTimeouts(default=60.0, floor=5.0, ceiling=100.0, multiplier=3.0, min_samples=3)
+    assert timeouts.first_byte("webSearch", "speed") == 60.0
+
+    for seconds in (2.0, 3.0, 4.0):
+        timeouts.observe("webSearch", "speed", seconds)
+        timeouts.observe("wolframAlphaSearch", "speed", seconds / 10)
+        timeouts.observe("academicSearch", "balanced", seconds * 20)
+
+    assert timeouts.first_byte("webSearch", "speed") == 12.0
+    assert timeouts.first_byte("wolframAlphaSearch", "speed") == 5.0
+    assert timeouts.first_byte("academicSearch", "balanced") == 100.0
+    assert timeouts.first_byte("webSearch", "balanced") == 60.0
+
+    limit = timeouts.for_search("webSearch", "speed", stream=False)
+    assert (limit.connect, limit.read) == (5.0, 12.0)
+    assert timeouts.for_search("webSearch", "speed", stream=True).read == 30.0
+
+
+@pytest.mark.asyncio
+async def test_client_sends_adaptive_timeout_and_counts_timeouts():
+    """Test that searches carry the per-mode timeout and timeouts are counted."""
+    seen = []
+
+    def handler(request):
+        seen.append(request.extensions["timeout"])
+        if len(seen) > 2:
+            raise httpx.ReadTimeout("timed out", request=request)
+        return httpx.Response(200, json={"message": "ok", "sources": []})
+
+    client = PerplexicaClient("http://localhost:3000")
+    client.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    client.timeouts = AdaptiveTimeouts(floor=1.0, min_samples=1)
+    request = SearchRequest(query="q", focusMode="webSearch", optimizationMode="speed")
+
+    await client.search(request)
+    await client.search(request)
+    assert seen[0]["read"] == 60.0
+    assert 1.0 <= seen[1]["read"] < 60.0
+    assert seen[1]["connect"] == 5.0
+
+    with pytest.raises(Exception):
+        await client.search(request)
+    assert client.timeouts.stats()["firstByteTimeouts"] == 1
+    assert "webSearch/speed" in client.timeouts.stats()["firstByteLimits"]
+    await client.close()
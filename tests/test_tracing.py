@@ -0,0 +1,71 @@
+"""Tests for per-request tracing."""
+
+import json
+
+import pytest
+from mcp.types import CallToolRequest, CallToolRequestParams
+
+from benchmarks.stub import StubConfig, run_stub
+from perplexica_mcp.server import PerplexicaServer
+from perplexica_mcp.tracing import JsonlExporter, Span, Tracer, http_extensions, span
+
+
+def test_span_is_free_outside_a_trace():
+    """Test that instrumentation is a shared no-op when no tool call is traced."""
+    assert span("parse") is span("model")
+    with span("parse") as current:
+        assert current is None
+    assert http_extensions() == {}
+
+
+def test_jsonl_exporter_rotates(tmp_path):
+    """Test that the trace file is rotated once it reaches its size limit."""
+    path = tmp_path / "traces.jsonl"
+    export = JsonlExporter(str(path), max_bytes=500, backups=1)
+    for _ in range(5):
+        export([Span([], "t" * 32, None, "tools/call", tool="perplexica_search")])
+
+    assert (tmp_path / "traces.jsonl.1").exists()
+    assert path.stat().st_size <= 500
+    export.close()
+
+
+@pytest.mark.asyncio
+async def test_search_records_phase_spans(tmp_path, monkeypatch):
+    """Test that a traced search records a span tree from validation to formatting."""
+    path = tmp_path / "traces.jsonl"
+    monkeypatch.setenv("PERPLEXICA_TRACE_FILE", str(path))
+    async with run_stub(StubConfig(sources=2)) as base_url:
+        monkeypatch.setenv("PERPLEXICA_BASE_URL", base_url)
+        server = PerplexicaServer()
+        try:
+            result = await server.call_tool(
+                CallToolRequest(
+                    method="tools/call",
+                    params=CallToolRequestParams(name="perplexica_search", arguments={"query": "traced"}),
+                )
+            )
+        finally:
+            await server.cleanup()
+
+    assert not result.isError
+    spans = [json.loads(line) for line in path.read_text().splitlines()]
+    by_name = {s["name"]: s for s in spans}
+    root = by_name["tools/call"]
+    assert root["parentSpanId"] is None
+    assert (root["attributes"]["tool"], root["attributes"]["outcome"]) == ("perplexica_search", "ok")
+    assert {s["traceId"] for s in spans} == {root["traceId"]}
+    for name in ("validate", "cache", "upstream", "parse", "model", "format"):
+        assert name in by_name
+    assert by_name["cache"]["attributes"]["hit"] is False
+    assert by_name["http11.receive_response_headers"]["parentSpanId"] == by_name["upstream"]["spanId"]
+    assert "connection.connect_tcp" in by_name
+    assert server.stats()["tracing"]["traces"] == 1
+
+
+def test_tracer_from_env(monkeypatch):
+    """Test that tracing is off unless configured."""
+    assert Tracer.from_env() is None
+    monkeypatch.setenv("PERPLEXICA_TRACE_EXPORTER", "jsonl")
+    with pytest.raises(ValueError):
+        Tracer.from_env()
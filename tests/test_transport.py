@@ -0,0 +1,67 @@
+"""Tests for the HTTP transports."""
+
+import asyncio
+
+import httpx
+import pytest
+import pytest_asyncio
+import uvicorn
+from mcp import ClientSession
+from mcp.client.sse import sse_client
+from mcp.client.streamable_http import streamablehttp_client
+
+from perplexica_mcp.server import PerplexicaServer
+from perplexica_mcp.transport import create_http_app
+
+
+@pytest_asyncio.fixture
+async def http_server():
+    """Serve a PerplexicaServer backed by a mock Perplexica over HTTP."""
+    calls = []
+
+    def handler(request):
+        calls.append(request.url.path)
+        if request.url.path == "/api/models":
+            return httpx.Response(200, json={"chatModels": {}})
+        return httpx.Response(200, json={"message": "Shared answer", "sources": []})
+
+    server = PerplexicaServer()
+    server.client.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    config = uvicorn.Config(create_http_app(server), host="127.0.0.1", port=0, log_level="warning")
+    uvicorn_server = uvicorn.Server(config)
+    task = asyncio.create_task(uvicorn_server.serve())
+    while not uvicorn_server.started:
+        await asyncio.sleep(0.01)
+    port = uvicorn_server.servers[0].sockets[0].getsockname()[1]
+
+    yield f"http://127.0.0.1:{port}", calls
+
+    uvicorn_server.should_exit = True
+    await task
+
+
+async def _search(session, query):
+    await session.initialize()
+    return await session.call_tool("perplexica_search", {"query": query})
+
+
+@pytest.mark.asyncio
+async def test_many_sessions_share_one_server(http_server):
+    """Test that streamable HTTP and SSE sessions are served by one shared server."""
+    base_url, calls = http_server
+
+    async def streamable_session():
+        async with streamablehttp_client(f"{base_url}/mcp") as (read_stream, write_stream, _):
+            async with ClientSession(read_stream, write_stream) as session:
+                return await _search(session, "shared query")
+
+    async def sse_session():
+        async with sse_client(f"{base_url}/sse") as (read_stream, write_stream):
+            async with ClientSession(read_stream, write_stream) as session:
+                return await _search(session, "shared query")
+
+    results = await asyncio.gather(streamable_session(), streamable_session(), sse_session())
+
+    assert all("Shared answer" in result.content[0].text for result in results)
+    # Caching and request coalescing are shared, so only one call reaches Perplexica.
+    assert calls.count("/api/search") == 1